@@ -0,0 +1,45 @@
+"""driver lat/lng columns
+
+Revision ID: 3c5e1f7a9b2d
+Revises: a92f03a60609
+Create Date: 2026-10-17 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f7a9b2d'
+down_revision: Union[str, Sequence[str], None] = 'a92f03a60609'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('drivers', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('drivers', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('drivers', sa.Column('location_updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_drivers_available_lat_lng', 'drivers', ['is_available', 'latitude', 'longitude'], unique=False)
+
+    # Backfill from the JSONB position
+    op.execute(
+        """
+        UPDATE drivers
+        SET latitude = (current_location->>'latitude')::double precision,
+            longitude = (current_location->>'longitude')::double precision,
+            location_updated_at = updated_at
+        WHERE current_location ? 'latitude' AND current_location ? 'longitude'
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_drivers_available_lat_lng', table_name='drivers')
+    op.drop_column('drivers', 'location_updated_at')
+    op.drop_column('drivers', 'longitude')
+    op.drop_column('drivers', 'latitude')
@@ -6,6 +6,7 @@ from .driver_agent import DriverAgent
 from .tracking_agent import TrackingAgent
 from .support_agent import SupportAgent
 from .post_delivery_agent import PostDeliveryAgent
+from .agent_pool import AgentPool
 
 __all__ = [
     "CustomerOrderAgent",
@@ -14,4 +15,5 @@ __all__ = [
     "TrackingAgent",
     "SupportAgent",
     "PostDeliveryAgent",
+    "AgentPool",
 ]
@@ -0,0 +1,93 @@
+"""
+app/agents/agent_pool.py
+
+Agent pool
+----------
+- One prototype agent per agent type, built on first use: it owns the
+  formatted system prompt, the LLMService (and its pooled HTTP clients)
+  and the ToolRegistry with its cached tool schema
+- Each request gets a cheap fork of the prototype carrying only the
+  per-conversation state (history, context window, tool limiter)
+- With a session_id, that state is loaded from and saved back to the
+  StateManager session (field `agent_state:<agent_type>`), so a
+  conversation continues across requests and replicas
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Type
+
+from ..orchestration.state_manager import StateManager
+from .base_agent import BaseAgent
+from .customer_order_agent import CustomerOrderAgent
+from .driver_agent import DriverAgent
+from .post_delivery_agent import PostDeliveryAgent
+from .restaurant_agent import RestaurantAgent
+from .support_agent import SupportAgent
+from .tracking_agent import TrackingAgent
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    AGENT_CLASSES: Dict[str, Type[BaseAgent]] = {
+        "customer_order_agent": CustomerOrderAgent,
+        "restaurant_agent": RestaurantAgent,
+        "driver_agent": DriverAgent,
+        "tracking_agent": TrackingAgent,
+        "support_agent": SupportAgent,
+        "post_delivery_agent": PostDeliveryAgent,
+    }
+
+    _prototypes: Dict[str, BaseAgent] = {}
+
+    @staticmethod
+    def state_field(agent_type: str) -> str:
+        return f"agent_state:{agent_type}"
+
+    @classmethod
+    def prototype(cls, agent_type: str) -> BaseAgent:
+        """Shared, never-conversing instance for an agent type."""
+        agent = cls._prototypes.get(agent_type)
+        if agent is None:
+            agent_class = cls.AGENT_CLASSES.get(agent_type)
+            if agent_class is None:
+                raise ValueError(f"Unknown agent type: {agent_type}")
+            agent = cls._prototypes.setdefault(agent_type, agent_class())
+            logger.info(f"Built shared {agent_type} prototype")
+        return agent
+
+    @classmethod
+    def create(cls, agent_type: str) -> BaseAgent:
+        """Fresh conversation for an agent type, without any saved state."""
+        return cls.prototype(agent_type).fork()
+
+    @classmethod
+    async def acquire(cls, agent_type: str, session_id: Optional[str] = None) -> BaseAgent:
+        """Agent for a session with its saved conversation state attached."""
+        agent = cls.create(agent_type)
+        if session_id:
+            session = await StateManager.get_session(session_id)
+            if session:
+                agent.load_state(session.get(cls.state_field(agent_type)))
+        return agent
+
+    @classmethod
+    async def release(cls, agent: BaseAgent, session_id: Optional[str] = None) -> bool:
+        """Persist the agent's conversation state back to the session."""
+        if not session_id:
+            return False
+        return await StateManager.update_session(session_id, **{cls.state_field(agent.name): agent.export_state()})
+
+    @classmethod
+    @asynccontextmanager
+    async def session(cls, agent_type: str, session_id: Optional[str] = None) -> AsyncIterator[BaseAgent]:
+        """acquire() on entry, release() on a clean exit."""
+        agent = await cls.acquire(agent_type, session_id)
+        yield agent
+        await cls.release(agent, session_id)
+
+    @classmethod
+    def clear(cls):
+        """Drop the prototypes (tests / config reloads)."""
+        cls._prototypes.clear()
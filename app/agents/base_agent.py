@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any, Callable
+import asyncio
+import copy
 import logging
+from contextlib import nullcontext
+from ..core.config import settings
 from ..services.llm_service import LLMService
 from ..tools.registry import ToolRegistry
+from .context_window import ContextWindow
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,9 @@ class BaseAgent(ABC):
         self.llm_service = LLMService()
         self.tool_registry = ToolRegistry()
         self.conversation_history: List[Dict[str, str]] = []
+        # Bounds what is sent to the LLM: recent turns verbatim, older ones summarized
+        self.context = ContextWindow()
+        self._tool_limiter = asyncio.Semaphore(settings.AGENT_TOOL_CONCURRENCY)
 
         # Initialize conversation with system prompt
         self.conversation_history.append({
@@ -25,6 +33,32 @@ class BaseAgent(ABC):
             "content": system_prompt
         })
 
+    def fork(self) -> "BaseAgent":
+        """
+        New conversation on top of this agent's shared parts.
+        The prompt, LLM client and tool registry are shared with this agent;
+        history, context window and tool limiter are per conversation.
+        """
+        agent = copy.copy(self)
+        agent.conversation_history = [{"role": "system", "content": self.system_prompt}]
+        agent.context = ContextWindow()
+        agent._tool_limiter = asyncio.Semaphore(settings.AGENT_TOOL_CONCURRENCY)
+        return agent
+
+    def export_state(self) -> Dict[str, Any]:
+        """Per-conversation state to persist between requests (system prompt excluded)."""
+        return {
+            "history": self.conversation_history[1:],
+            "summary": self.context.summary,
+        }
+
+    def load_state(self, state: Optional[Dict[str, Any]]):
+        """Restore a conversation saved with export_state()."""
+        if not state:
+            return
+        self.conversation_history = [self.conversation_history[0]] + list(state.get("history", []))
+        self.context.summary = state.get("summary", "")
+
     def add_message(self, role: str, content: str):
         """Add message to conversation history."""
         self.conversation_history.append({
@@ -46,8 +80,9 @@ class BaseAgent(ABC):
             tools = self.get_available_tools()
 
             # Generate LLM response
+            self.context.compact(self.conversation_history)
             response = await self.llm_service.generate_response(
-                messages=self.conversation_history,
+                messages=self.context.render(self.conversation_history),
                 tools=tools,
                 tool_choice="auto"
             )
@@ -74,36 +109,48 @@ class BaseAgent(ABC):
             return {"content": error_response, "tool_calls": []}
 
     async def _execute_tool_calls(self, tool_calls: List[Dict], session_data: Dict[str, Any]) -> List[Dict]:
-        """Execute tool calls and return results."""
-        results = []
-
-        for tool_call in tool_calls:
-            try:
-                tool_name = tool_call.get("name")
-                arguments = tool_call.get("arguments", {})
-
-                # Add session data to arguments if needed by tool
-                if "session_data" in self.tool_registry.get_tool_parameters(tool_name):
-                    arguments["session_data"] = session_data
-
-                # Execute tool (tool implementations may be async)
-                result = await self.tool_registry.execute_tool(tool_name, arguments)
-
-                results.append({
-                    "tool_call_id": tool_call.get("id"),
-                    "tool_name": tool_name,
-                    "result": result
-                })
-
-            except Exception as e:
-                logger.error(f"Error executing tool {tool_call.get('name')}: {e}")
-                results.append({
-                    "tool_call_id": tool_call.get("id"),
-                    "tool_name": tool_call.get("name"),
-                    "result": f"Error: {str(e)}"
-                })
+        """
+        Execute tool calls concurrently and return results in call order.
+        At most AGENT_TOOL_CONCURRENCY run at once per agent, each bounded by
+        AGENT_TOOL_TIMEOUT_SECONDS; a failing or slow tool only affects its own result.
+        Tools that take session_data mutate shared order state, so they run one at a time.
+        """
+        session_lock = asyncio.Lock()
+        return list(await asyncio.gather(*[
+            self._execute_tool_call(tool_call, session_data, session_lock) for tool_call in tool_calls
+        ]))
+
+    async def _execute_tool_call(self, tool_call: Dict, session_data: Dict[str, Any], session_lock: asyncio.Lock) -> Dict:
+        tool_name = tool_call.get("name")
+        try:
+            arguments = tool_call.get("arguments", {})
+
+            # Add session data to arguments if needed by tool
+            needs_session = "session_data" in self.tool_registry.get_tool_parameters(tool_name)
+            if needs_session:
+                arguments["session_data"] = session_data
+
+            # Serialize session-mutating tools before taking a concurrency slot
+            async with session_lock if needs_session else nullcontext():
+                async with self._tool_limiter:
+                    # Tool implementations may be async
+                    result = await asyncio.wait_for(
+                        self.tool_registry.execute_tool(tool_name, arguments),
+                        timeout=settings.AGENT_TOOL_TIMEOUT_SECONDS,
+                    )
+
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {tool_name} timed out after {settings.AGENT_TOOL_TIMEOUT_SECONDS}s")
+            result = f"Error: {tool_name} timed out"
+        except Exception as e:
+            logger.error(f"Error executing tool {tool_name}: {e}")
+            result = f"Error: {str(e)}"
 
-        return results
+        return {
+            "tool_call_id": tool_call.get("id"),
+            "tool_name": tool_name,
+            "result": result
+        }
 
     async def _handle_tool_results(self, initial_response: Dict, tool_results: List[Dict]) -> Dict[str, Any]:
         """Add tool results to conversation and request final LLM response."""
@@ -111,14 +158,15 @@ class BaseAgent(ABC):
         for result in tool_results:
             self.conversation_history.append({
                 "role": "tool",
-                "content": str(result["result"]),
+                "content": self.context.cap_tool_result(result["result"]),
                 "tool_call_id": result["tool_call_id"],
                 "name": result["tool_name"]
             })
 
         # Request final response from LLM after tool execution
+        self.context.compact(self.conversation_history)
         final_response = await self.llm_service.generate_response(
-            messages=self.conversation_history,
+            messages=self.context.render(self.conversation_history),
             tools=self.get_available_tools()
         )
 
@@ -131,7 +179,8 @@ class BaseAgent(ABC):
     def get_transfer_summary(self) -> str:
         """Generate a short summary for handing off to the next agent."""
         recent_messages = self.conversation_history[-4:]  # Last few exchanges
-        summary = "Recent conversation:\n"
+        summary = f"Earlier: {self.context.summary}\n" if self.context.summary else ""
+        summary += "Recent conversation:\n"
         for msg in recent_messages:
             if msg.get("role") in ["user", "assistant"]:
                 summary += f"{msg.get('role')}: {msg.get('content')}\n"
@@ -140,3 +189,4 @@ class BaseAgent(ABC):
     def clear_conversation(self):
         """Clear conversation history but keep the system prompt."""
         self.conversation_history = [self.conversation_history[0]]  # Keep system prompt
+        self.context.reset()
@@ -0,0 +1,109 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+from ..core.config import settings
+from ..services.summarization_service import SummarizationService
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+class ContextWindow:
+    """
+    Token-budgeted view of an agent's conversation.
+    - The system prompt (history[0]) and the last `keep_turns` turns stay verbatim
+    - Older turns, or more if the history is over `max_tokens`, are folded into a
+      rolling summary via SummarizationService
+    - Tool results are serialized and capped before they enter the history
+    A turn starts at each user message and runs until the next one.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = None,
+        keep_turns: int = None,
+        max_tool_result_chars: int = None,
+        summary_max_chars: int = None,
+    ):
+        self.max_tokens = max_tokens or settings.AGENT_CONTEXT_MAX_TOKENS
+        self.keep_turns = keep_turns or settings.AGENT_CONTEXT_KEEP_TURNS
+        self.max_tool_result_chars = max_tool_result_chars or settings.AGENT_TOOL_RESULT_MAX_CHARS
+        self.summary_max_chars = summary_max_chars or settings.AGENT_SUMMARY_MAX_CHARS
+        self.summary = ""
+
+    def cap_tool_result(self, result: Any) -> str:
+        """Serialize a tool result for the LLM, truncated to max_tool_result_chars."""
+        if isinstance(result, str):
+            text = result
+        else:
+            try:
+                text = json.dumps(result, default=str, separators=(",", ":"))
+            except (TypeError, ValueError):
+                text = str(result)
+        if len(text) > self.max_tool_result_chars:
+            dropped = len(text) - self.max_tool_result_chars
+            text = f"{text[:self.max_tool_result_chars]}... [truncated {dropped} chars]"
+        return text
+
+    def compact(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold old turns out of `history` (in place) into the rolling summary."""
+        turn_starts = [i for i, msg in enumerate(history) if i > 0 and msg.get("role") == "user"]
+        if len(turn_starts) <= 1:
+            return history
+
+        fold_turns = max(0, len(turn_starts) - self.keep_turns)
+        # Over budget: keep folding until it fits, but never fold the current turn
+        while fold_turns < len(turn_starts) - 1 and self._tokens(history, turn_starts[fold_turns]) > self.max_tokens:
+            fold_turns += 1
+        if fold_turns == 0:
+            return history
+
+        folded_end = turn_starts[fold_turns]
+        for start, end in zip(turn_starts[:fold_turns], turn_starts[1:fold_turns + 1]):
+            self._fold(history[start:end])
+        # Anything between the system prompt and the first user turn goes too
+        if turn_starts[0] > 1:
+            self._fold(history[1:turn_starts[0]])
+        del history[1:folded_end]
+        logger.debug(f"Folded {fold_turns} turns into the conversation summary")
+        return history
+
+    def render(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages to send to the LLM: system prompt (+ summary) and the verbatim recent turns."""
+        if not self.summary or not history:
+            return history
+        system = dict(history[0])
+        system["content"] = f"{system['content']}\n\nSummary of the earlier conversation:\n{self.summary}"
+        return [system] + history[1:]
+
+    def reset(self):
+        self.summary = ""
+
+    def _fold(self, messages: List[Dict[str, Any]]):
+        lines = []
+        for msg in messages:
+            content = msg.get("content") or ""
+            if msg.get("role") == "tool":
+                lines.append(f"tool {msg.get('name')}: {content[:200]}")
+            elif content:
+                lines.append(f"{msg.get('role')}: {content}")
+        if not lines:
+            return
+        # Summarize the new turn on its own, then drop the oldest summary text to
+        # make room: the summary keeps rolling forward instead of freezing on the
+        # first turns once it is full
+        recent = SummarizationService.summarize([" ".join(lines)], max_length=self.summary_max_chars // 2)
+        room = self.summary_max_chars - len(recent) - 1
+        older = self.summary
+        if len(older) > room:
+            older = "..." + older[len(older) - room + 3:].split(" ", 1)[-1] if room > 3 else ""
+        self.summary = f"{older} {recent}".strip()
+
+    def _tokens(self, history: List[Dict[str, Any]], recent_start: int) -> int:
+        total = estimate_tokens(history[0].get("content") or "") + estimate_tokens(self.summary)
+        return total + sum(estimate_tokens(msg.get("content") or "") for msg in history[recent_start:])
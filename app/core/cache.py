@@ -0,0 +1,67 @@
+"""
+In-process caches.
+
+TTLCache is a size-bounded LRU whose entries also expire after a TTL.
+It is thread-safe and cheap enough to call from the event loop; values
+are returned as stored, so cache immutable data (or copy on read).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.stats["misses"] += 1
+                return default
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store `value`; `ttl` overrides the cache default for this entry."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[0] > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
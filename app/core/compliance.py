@@ -8,7 +8,8 @@ Compliance utilities:
 from datetime import datetime, time
 import logging
 from typing import Dict, Any
-from ..core.database import SessionLocal
+from sqlalchemy import select
+from ..core.database import AsyncSessionLocal
 from ..models.database import CallSession
 
 logger = logging.getLogger(__name__)
@@ -36,24 +37,24 @@ def check_dnd(phone_number: str) -> bool:
         return True
     return False
 
-def record_consent(call_sid: str, consent: Dict[str, Any]):
+async def record_consent(call_sid: str, consent: Dict[str, Any]):
     """
     Persist consent into call_sessions.metrics or separate table. We'll attach to CallSession.metrics.
     """
-    session = SessionLocal()
-    try:
-        cs = session.query(CallSession).filter(CallSession.call_sid == call_sid).first()
-        if not cs:
-            logger.warning("Call session not found to record consent")
+    async with AsyncSessionLocal() as session:
+        try:
+            result = await session.execute(select(CallSession).where(CallSession.call_sid == call_sid))
+            cs = result.scalar_one_or_none()
+            if not cs:
+                logger.warning("Call session not found to record consent")
+                return False
+            # Assign a new dict: in-place changes to a JSON column are not tracked
+            metrics = dict(cs.metrics or {})
+            metrics["consents"] = [*metrics.get("consents", []), consent]
+            cs.metrics = metrics
+            await session.commit()
+            return True
+        except Exception as e:
+            logger.exception("Error recording consent")
+            await session.rollback()
             return False
-        metrics = cs.metrics or {}
-        metrics.setdefault("consents", []).append(consent)
-        cs.metrics = metrics
-        session.commit()
-        return True
-    except Exception as e:
-        logger.exception("Error recording consent")
-        session.rollback()
-        return False
-    finally:
-        session.close()
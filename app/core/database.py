@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import redis.asyncio as aioredis
@@ -9,9 +11,59 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async drivers for the sync URLs used by alembic and scripts
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL (postgresql://, sqlite://) onto its asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = None, **kwargs) -> AsyncEngine:
+    """
+    Build an async engine for `url` (default DATABASE_URL).
+    Server databases get an explicit pool: DB_POOL_SIZE connections kept open,
+    up to DB_MAX_OVERFLOW more under bursts, and callers wait at most
+    DB_POOL_TIMEOUT_SECONDS for a free connection before failing.
+    """
+    url = async_database_url(url or settings.DATABASE_URL)
+    if not url.startswith("sqlite"):
+        kwargs.setdefault("pool_size", settings.DB_POOL_SIZE)
+        kwargs.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+        kwargs.setdefault("pool_timeout", settings.DB_POOL_TIMEOUT_SECONDS)
+        kwargs.setdefault("pool_recycle", settings.DB_POOL_RECYCLE_SECONDS)
+    return create_async_engine(url, pool_pre_ping=True, **kwargs)
+
+
+# Async engine for code running on the event loop (tools, compliance, routers)
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+def create_redis_client(url: str = None):
+    """
+    Build an async Redis client. A `fakeredis://` URL returns an in-process
+    fakeredis server so tests can exercise Redis code paths without a server.
+    """
+    url = url or settings.REDIS_URL
+    if url.startswith("fakeredis://"):
+        import fakeredis.aioredis
+        return fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return aioredis.from_url(url, decode_responses=True)
+
+
 # Redis for session storage (async client)
 # Use redis.asyncio so state_manager can await Redis operations
-redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+redis_client = create_redis_client(settings.REDIS_URL)
 
 
 def get_db():
@@ -25,3 +77,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency that yields an AsyncSession; use it from async routes:
+        db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """Close pooled async connections (app shutdown)."""
+    await async_engine.dispose()
@@ -0,0 +1,77 @@
+"""
+Shared async HTTP clients for outbound provider calls.
+
+Each provider (Deepgram, ElevenLabs, ...) gets one keep-alive connection
+pool per event loop instead of a new TCP/TLS connection per request, plus a
+concurrency limiter so a burst of calls queues instead of exhausting sockets.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Tuple, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_limiters: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def get_http_client(
+    name: str,
+    base_url: str = "",
+    timeout: float = 10.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    http2: bool = True,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient registered under `name`, creating it on first use.
+    Clients are bound to the running event loop, so a new loop gets a new pool.
+    """
+    loop = asyncio.get_running_loop()
+    cached = _clients.get(name)
+    if cached and cached[0] is loop and not cached[1].is_closed:
+        return cached[1]
+
+    client = httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        headers=headers,
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+    )
+    _clients[name] = (loop, client)
+    logger.info(f"Created shared HTTP client '{name}' (http2={http2 and HTTP2_AVAILABLE})")
+    return client
+
+
+def get_limiter(name: str, limit: int) -> asyncio.Semaphore:
+    """Return the per-loop semaphore bounding concurrent calls to a provider."""
+    loop = asyncio.get_running_loop()
+    cached = _limiters.get(name)
+    if cached and cached[0] is loop:
+        return cached[1]
+    limiter = asyncio.Semaphore(limit)
+    _limiters[name] = (loop, limiter)
+    return limiter
+
+
+async def close_http_clients():
+    """Close every shared client owned by the running loop (call on shutdown)."""
+    loop = asyncio.get_running_loop()
+    for name, (client_loop, client) in list(_clients.items()):
+        if client_loop is loop:
+            await client.aclose()
+            del _clients[name]
@@ -5,8 +5,16 @@ from ..core.config import settings
 validator = RequestValidator(settings.TWILIO_AUTH_TOKEN)
 
 async def verify_twilio_request(request: Request):
-    # Twilio sends form-encoded body; construct full URL + params
+    # Explicit opt-out for local development; a missing auth token still fails closed
+    if settings.TWILIO_SKIP_SIGNATURE_VALIDATION:
+        return True
+    # Twilio sends form-encoded body; construct full URL + params.
+    # Twilio signs the public URL it was given, not the one behind the tunnel/proxy.
     url = str(request.url)
+    if settings.PUBLIC_BASE_URL:
+        url = f"https://{settings.PUBLIC_BASE_URL}{request.url.path}"
+        if request.url.query:
+            url += f"?{request.url.query}"
     signature = request.headers.get("X-Twilio-Signature")
     if not signature:
         raise HTTPException(status_code=400, detail="Missing Twilio signature")
@@ -7,7 +7,7 @@ Implements:
 - API key validation (for internal services)
 - Data encryption/decryption for PII (AES)
 - Webhook signature verification (Twilio, Stripe)
-- Rate limiting hooks (Redis-based, optional)
+- Rate limiting (Redis token bucket, in-process fallback, middleware/dependency)
 """
 
 import os
@@ -116,31 +116,220 @@ def verify_webhook_signature(request: Request, signature_header: str, secret: st
     return True
 
 # ============================================================
-# RATE LIMITING (Optional, Redis-based)
+# RATE LIMITING (Redis token bucket, in-process fallback)
 # ============================================================
 
+import asyncio
+import ipaddress
 import time
-import redis
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, NamedTuple, Tuple
+
+# One atomic read-refill-take per request. Time comes from the Redis server,
+# so every replica refills a bucket on the same clock.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
 
-def check_rate_limit(client_id: str, limit: int = 30, period: int = 60):
+
+class LocalTokenBucket:
     """
-    Simple token bucket rate limiter using Redis.
-    client_id: unique identifier (e.g., IP or user ID)
-    limit: max requests allowed per period
+    In-process token buckets (LRU-bounded), used while Redis is unreachable.
+    Limits then apply per replica rather than globally.
     """
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, key: str, capacity: float, rate: float, cost: float = 1) -> RateLimitResult:
+        now = self._clock()
+        tokens, ts = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+        if tokens >= cost:
+            result = RateLimitResult(True, tokens - cost, 0.0)
+            tokens -= cost
+        else:
+            result = RateLimitResult(False, tokens, (cost - tokens) / rate)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return result
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per key: `capacity` requests at once, refilled at `rate` per second.
+    Buckets live in Redis (shared async pool, one Lua call per request); while Redis
+    is failing, requests are counted in a LocalTokenBucket and Redis is retried
+    after RATE_LIMIT_REDIS_RETRY_SECONDS.
+    """
+
+    def __init__(self, client=None, prefix: str = "ratelimit", local: Optional[LocalTokenBucket] = None):
+        if client is None:
+            from .database import redis_client
+            client = redis_client
+        self.client = client
+        self.prefix = prefix
+        self.local = local or LocalTokenBucket(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._redis_down_until = 0.0
+
+    async def acquire(self, key: str, capacity: float, rate: float, cost: float = 1) -> RateLimitResult:
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, remaining, retry_after = await asyncio.wait_for(
+                    self._script(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, cost]),
+                    settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+                )
+                return RateLimitResult(bool(int(allowed)), float(remaining), float(retry_after))
+            except Exception as e:
+                logger.warning(f"Rate limiter using in-process buckets, Redis failed: {e!r}")
+                self._redis_down_until = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+        return self.local.acquire(key, capacity, rate, cost)
+
+
+_rate_limiter: Optional[TokenBucketLimiter] = None
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """Process-wide limiter on the shared Redis client."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucketLimiter()
+    return _rate_limiter
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(proxies: str) -> tuple:
+    return tuple(ipaddress.ip_network(p.strip(), strict=False) for p in proxies.split(",") if p.strip())
+
+
+def _is_trusted_proxy(host: str, networks: tuple) -> bool:
     try:
-        r = redis.from_url(settings.REDIS_URL)
-        key = f"ratelimit:{client_id}"
-        current = r.get(key)
-        if current and int(current) >= limit:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
-        pipe = r.pipeline()
-        pipe.incr(key, 1)
-        pipe.expire(key, period)
-        pipe.execute()
-    except Exception as e:
-        logger.warning(f"Rate limiting failed: {e}")
-        pass  # Fail open (don’t block requests if Redis down)
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_address(request: Request) -> str:
+    """
+    The direct peer, unless it is one of RATE_LIMIT_TRUSTED_PROXIES: then the
+    right-most X-Forwarded-For hop that is not a trusted proxy. Hops left of it
+    are written by the client and never believed.
+    """
+    host = request.client.host if request.client else "unknown"
+    networks = _trusted_networks(settings.RATE_LIMIT_TRUSTED_PROXIES)
+    if not networks or not _is_trusted_proxy(host, networks):
+        return host
+    hops = ",".join(request.headers.getlist("x-forwarded-for")).split(",")
+    for hop in reversed(hops):
+        hop = hop.strip()
+        if hop and not _is_trusted_proxy(hop, networks):
+            return hop
+    return host
+
+
+def rate_limit_key(request: Request) -> str:
+    """The internal API key if a valid one is sent, otherwise the client address."""
+    api_key = request.headers.get("x-api-key")
+    if api_key and settings.INTERNAL_API_KEY and hmac.compare_digest(api_key, settings.INTERNAL_API_KEY):
+        return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+    return f"ip:{client_address(request)}"
+
+
+async def check_rate_limit(client_id: str, limit: int = 30, period: int = 60):
+    """
+    Token bucket rate limiter using Redis.
+    client_id: unique identifier (e.g., IP or user ID)
+    limit: max requests allowed per period (also the burst size)
+    """
+    result = await get_rate_limiter().acquire(client_id, limit, limit / period)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429, detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, round(result.retry_after)))},
+        )
+    return result
+
+
+def rate_limit(limit: int, period: int = 60, key_func: Callable[[Request], str] = rate_limit_key):
+    """
+    FastAPI dependency enforcing `limit` requests per `period` seconds per client:
+        @router.post("/create-intent", dependencies=[Depends(rate_limit(10))])
+    """
+    async def dependency(request: Request):
+        await check_rate_limit(f"{request.url.path}:{key_func(request)}", limit, period)
+    return dependency
+
+
+class RateLimitMiddleware:
+    """
+    App-wide limit per client (RATE_LIMIT_REQUESTS per RATE_LIMIT_PERIOD_SECONDS,
+    bursts up to RATE_LIMIT_BURST). Paths under RATE_LIMIT_EXEMPT_PATHS (provider
+    webhooks, metrics) are not limited. Plain ASGI, so it adds one Redis call and
+    no extra request/response copying.
+    """
+
+    def __init__(self, app, limiter: Optional[TokenBucketLimiter] = None):
+        self.app = app
+        self.limiter = limiter
+        self.capacity = settings.RATE_LIMIT_BURST or settings.RATE_LIMIT_REQUESTS
+        self.rate = settings.RATE_LIMIT_REQUESTS / settings.RATE_LIMIT_PERIOD_SECONDS
+        self.exempt = tuple(p.strip() for p in settings.RATE_LIMIT_EXEMPT_PATHS.split(",") if p.strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter or get_rate_limiter()
+        result = await limiter.acquire(rate_limit_key(Request(scope)), self.capacity, self.rate)
+        if not result.allowed:
+            from fastapi.responses import JSONResponse
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded"}, status_code=429,
+                headers={"Retry-After": str(max(1, round(result.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        remaining = str(int(result.remaining)).encode()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-ratelimit-remaining", remaining)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 # ============================================================
 # REQUEST AUTHENTICATION DEPENDENCIES
@@ -139,6 +139,7 @@ and initializes monitoring endpoints, databases, and agents.
 Main entry point for the Food Delivery Voice AI system.
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -146,6 +147,14 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.core.config import settings
 from app.orchestration.state_manager import StateManager
+from app.core.http_client import close_http_clients
+from app.core.database import dispose_async_engine
+from app.core.security import RateLimitMiddleware
+from app.services.driver_index import load_driver_index, run_driver_index_refresh
+from app.services.eta_model import get_eta_model, run_recalibration
+from app.services.tts_prewarm import prewarm_on_startup
+from app.services.vector_service import get_vector_service, run_local_index_refresh
+from app.services.webhook_queue import get_webhook_queue
 from app.routers import orders, voice, agents, analytics, monitoring
 from app.monitoring.prometheus_metrics import register_metrics
 
@@ -178,6 +187,12 @@ async def startup_event():
     logger.info("📊 Prometheus metrics ready.")
     logger.info(f"✅ Environment: {settings.ENVIRONMENT}")
 
+# ------------------------------------------------------------
+# RATE LIMITING (per client; provider webhooks exempt; inside CORS so 429s carry CORS headers)
+# ------------------------------------------------------------
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # ------------------------------------------------------------
 # CORS
 # ------------------------------------------------------------
@@ -230,7 +245,41 @@ async def startup_event():
     # Initialize StateManager
     await StateManager.initialize()
     logger.info("✅ StateManager initialized")
+
+    # Static prompts ready before the first call
+    await prewarm_on_startup()
+
+    # Online drivers for nearest-driver lookups, reloaded to pick up other replicas' updates
+    await load_driver_index()
+    app.state.driver_index_refresh = asyncio.create_task(run_driver_index_refresh())
+
+    # Offline ETA model for tracking; Maps only recalibrates it in the background
+    await get_eta_model().load()
+    app.state.eta_recalibration = asyncio.create_task(run_recalibration())
+
+    # Menu search indexes (lexical + local vectors), from the snapshot or Qdrant
+    try:
+        await get_vector_service().load_local_index()
+    except Exception as e:
+        logger.warning(f"Menu search indexes not loaded: {e}")
+    app.state.vector_index_refresh = asyncio.create_task(run_local_index_refresh())
+
+    # Webhook workers: apply queued Stripe/Twilio callbacks (and any left from a restart)
+    get_webhook_queue().start()
     
     logger.info("📦 Database initialized.")
     logger.info("📊 Prometheus metrics ready.")
     logger.info(f"✅ Environment: {settings.ENVIRONMENT}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Startup may have failed before the tasks were created
+    for name in ("driver_index_refresh", "eta_recalibration", "vector_index_refresh"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    await get_webhook_queue().stop()
+    await close_http_clients()
+    logger.info("🔌 Shared HTTP clients closed")
+    await dispose_async_engine()
+    logger.info("🔌 Database pool closed")
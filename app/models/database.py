@@ -96,12 +96,20 @@ class Driver(Base):
     phone_number: Mapped[str] = mapped_column(String(20), unique=True)
     vehicle_number: Mapped[str] = mapped_column(String(50))
     current_location: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    # Queryable position; current_location is kept in sync for existing readers
+    latitude: Mapped[float] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float] = mapped_column(Float, nullable=True)
+    location_updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=True)
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
     rating: Mapped[float] = mapped_column(Float, default=4.5)
 
     created_at: Mapped[datetime.datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_drivers_available_lat_lng", "is_available", "latitude", "longitude"),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -13,6 +13,12 @@ CALLS_TOTAL = Counter("food_delivery_calls_total", "Total number of calls")
 CALL_DURATION = Histogram("food_delivery_call_duration_seconds", "Call duration histogram")
 ONLINE_DRIVERS = Gauge("food_delivery_online_drivers", "Number of available drivers")
 
+# TTS phrase cache
+TTS_CACHE_HITS = Counter("food_delivery_tts_cache_hits_total", "TTS phrase cache hits", ["tier"])
+TTS_CACHE_MISSES = Counter("food_delivery_tts_cache_misses_total", "TTS phrase cache misses")
+TTS_CACHE_EVICTIONS = Counter("food_delivery_tts_cache_evictions_total", "TTS phrases evicted from the memory tier")
+TTS_CACHE_MEMORY_BYTES = Gauge("food_delivery_tts_cache_memory_bytes", "Bytes held by the TTS memory tier")
+
 
 def register_metrics(app: FastAPI):
     """
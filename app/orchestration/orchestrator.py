@@ -6,11 +6,13 @@ import wave
 import audioop
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+import inspect
+from typing import Dict, Any, Optional, Callable, AsyncGenerator
 
-from ..services.stt_service import STTService
+from ..services.stt_service import STTService, pcm16le_bytes_to_wav_bytes
 from ..services.tts_service import TTSService
 from ..services.llm_service import LLMService
+from ..services.sentence_chunker import chunk_sentences
 from .state_manager import StateManager
 from ..core.config import settings
 
@@ -40,13 +42,122 @@ def ulaw_to_wav_bytes(ulaw_bytes: bytes, channels=1, sample_rate=8000) -> bytes:
 
 
 class Orchestrator:
-    def __init__(self, session_id: str, session_data: Dict[str, Any]):
+    # Pause before reopening a dropped Deepgram stream, and cap on reconnect attempts per call
+    STREAM_RECONNECT_DELAY = 0.5
+    STREAM_MAX_RECONNECTS = 3
+
+    def __init__(
+        self,
+        session_id: str,
+        session_data: Dict[str, Any],
+        on_transcript: Optional[Callable[[str, bool], Any]] = None,
+    ):
         self.session_id = session_id
         self.session_data = session_data or {}
         self.stt = STTService()
         self.tts = TTSService()
         self.llm = LLMService()
 
+        # Streaming STT: one Deepgram websocket per call, fed from a bounded frame queue.
+        # on_transcript(text, is_final) receives interim and final hypotheses (sync or async).
+        self.on_transcript = on_transcript
+        self._audio_queue: Optional[asyncio.Queue] = None
+        self._stream_task: Optional[asyncio.Task] = None
+        self.dropped_frames = 0
+
+    # ----------------------------------------------------------
+    # Streaming STT session
+    # ----------------------------------------------------------
+    @property
+    def streaming(self) -> bool:
+        return self._stream_task is not None and not self._stream_task.done()
+
+    async def start_stream(self):
+        """Open the call's STT stream. Call once when the Twilio media stream starts."""
+        if self.streaming:
+            return
+        self._audio_queue = asyncio.Queue(maxsize=settings.STT_STREAM_QUEUE_SIZE)
+        self._stream_task = asyncio.create_task(self._run_stream())
+        logger.info(f"[{self.session_id}] STT stream started")
+
+    def feed_audio(self, media_payload_b64: str):
+        """
+        Queue one Twilio media frame for the open STT stream.
+        Never blocks the media websocket: when the queue is full the oldest frame is dropped.
+        """
+        if self._audio_queue is None:
+            return
+        self._put_frame(base64.b64decode(media_payload_b64))
+
+    async def stop_stream(self, timeout: float = 5.0):
+        """Flush queued audio, close the Deepgram stream and wait for the final transcripts."""
+        if self._stream_task is None:
+            return
+        try:
+            async def _drain():
+                # Wait for queue space rather than dropping audio that is still pending
+                if not self._stream_task.done():
+                    await self._audio_queue.put(None)
+                await self._stream_task
+
+            await asyncio.wait_for(_drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[{self.session_id}] STT stream did not close in {timeout}s; cancelling")
+            self._stream_task.cancel()
+        except Exception as e:
+            logger.error(f"[{self.session_id}] STT stream error on close: {e}")
+        finally:
+            self._stream_task = None
+            self._audio_queue = None
+            if self.dropped_frames:
+                logger.warning(f"[{self.session_id}] STT stream dropped {self.dropped_frames} frames")
+
+    def _put_frame(self, frame: Optional[bytes]):
+        while True:
+            try:
+                self._audio_queue.put_nowait(frame)
+                return
+            except asyncio.QueueFull:
+                self._audio_queue.get_nowait()
+                self.dropped_frames += 1
+
+    async def _audio_frames(self):
+        while True:
+            frame = await self._audio_queue.get()
+            if frame is None:
+                return
+            yield frame
+
+    async def _run_stream(self):
+        reconnects = 0
+        while True:
+            try:
+                # Fresh generator per connection; queued frames carry over to the new stream
+                async for result in self.stt.stream_results(self._audio_frames()):
+                    await self._dispatch_transcript(result["text"], result["is_final"])
+                return
+            except Exception as e:
+                reconnects += 1
+                if reconnects > self.STREAM_MAX_RECONNECTS:
+                    logger.error(f"[{self.session_id}] STT stream failed, giving up: {e}")
+                    return
+                logger.warning(f"[{self.session_id}] STT stream dropped ({e}); reconnecting")
+                await asyncio.sleep(self.STREAM_RECONNECT_DELAY)
+
+    async def _dispatch_transcript(self, text: str, is_final: bool):
+        if self.on_transcript is None:
+            logger.info(f"[{self.session_id}] {'Final' if is_final else 'Interim'} transcript: {text}")
+            return
+        try:
+            result = self.on_transcript(text, is_final)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.exception(f"[{self.session_id}] Transcript callback failed: {e}")
+
+    # ----------------------------------------------------------
+    # Per-payload fallback
+    # ----------------------------------------------------------
     async def process_audio(self, media_payload_b64: str) -> Optional[bytes]:
         """
             Receives Twilio media payload (base64 of PCM16LE samples).
@@ -55,7 +166,12 @@ class Orchestrator:
             3. Use NLU or orchestration to produce a reply_text (synchronously or async)
             4. Call TTS to produce μ-law raw bytes
             5. Return μ-law bytes (raw) to the caller, which will base64-encode before sending back to Twilio
+            While a streaming session is open the payload is fed to it instead and replies are
+            driven by the on_transcript callback, so this returns None.
             """
+        if self.streaming:
+            self.feed_audio(media_payload_b64)
+            return None
         try:
             # 1. DECODE
             pcm_bytes = base64.b64decode(media_payload_b64)
@@ -64,29 +180,21 @@ class Orchestrator:
             logger.info(f"[process_audio] Received PCM bytes: {len(pcm_bytes)}")
 
             # 2. Create WAV bytes for STT
-            from .utils_audio import pcm16le_bytes_to_wav_bytes  # import helper
             wav_bytes = pcm16le_bytes_to_wav_bytes(pcm_bytes, sample_rate=8000)
 
             # 3. STT
-            # Blocking network call -> use thread to avoid blocking loop
-            loop = __import__("asyncio").get_running_loop()
-            transcript = await loop.run_in_executor(None, self.stt.transcribe_bytes, wav_bytes, "audio/wav")
+            # Pooled async request; no executor thread per utterance
+            transcript = await self.stt.transcribe_bytes_async(wav_bytes, "audio/wav")
             logger.info(f"[process_audio] Transcript: {transcript}")
 
             if not transcript:
                 logger.info("[process_audio] No transcript returned, skipping reply.")
                 return None
 
-            # 4. Decide reply_text (very simple example — replace with your NLU)
-            reply_text = self.decide_reply(transcript)  # implement your decision logic
-            if not reply_text:
-                logger.info("[process_audio] NLU returned no reply.")
-                return None
-
-            # 5. TTS (blocking -> thread)
-            reply_audio_bytes = await loop.run_in_executor(None, self.tts.synthesize, reply_text)
+            # 4-5. LLM reply spoken clause by clause while the model is still generating
+            reply_audio_bytes = b"".join([frame async for frame in self.speak_reply(transcript)])
             if not reply_audio_bytes:
-                logger.error("[process_audio] TTS returned None.")
+                logger.error("[process_audio] No reply audio produced.")
                 return None
 
             # reply_audio_bytes MUST be raw μ-law bytes here (per updated TTS)
@@ -96,13 +204,40 @@ class Orchestrator:
             logger.exception(f"[process_audio] Unexpected error: {e}")
             return None
         
-    # Add to your Orchestrator class
+    async def speak_reply(self, transcript: str) -> AsyncGenerator[bytes, None]:
+        """
+        Stream the spoken reply as 20 ms μ-law frames.
+        LLM deltas are cut into clauses; each clause is synthesized as soon as it
+        completes while generation of the next one continues in the background.
+        """
+        clauses: asyncio.Queue = asyncio.Queue()
+
+        async def produce_clauses():
+            try:
+                async for clause in chunk_sentences(self.llm.stream_reply(transcript)):
+                    await clauses.put(clause)
+            except Exception as e:
+                logger.exception(f"[{self.session_id}] Reply generation failed: {e}")
+            finally:
+                await clauses.put(None)
+
+        producer = asyncio.create_task(produce_clauses())
+        try:
+            while True:
+                clause = await clauses.get()
+                if clause is None:
+                    break
+                logger.debug(f"[{self.session_id}] Speaking clause: {clause}")
+                async for frame in self.tts.synthesize_stream(clause):
+                    yield frame
+        finally:
+            # Caller stopped listening (barge-in/hangup): stop generating too
+            producer.cancel()
+
     async def process_text(self, text: str) -> bytes:
         """Convert text to audio for initial greetings"""
         try:
-            from ..services.tts_service import TTSService
-            tts_service = TTSService()
-            return await tts_service.text_to_speech(text)
+            return b"".join([frame async for frame in self.tts.synthesize_stream(text)])
         except Exception as e:
             logger.error(f"TTS error: {e}")
-            return b""
\ No newline at end of file
+            return b""
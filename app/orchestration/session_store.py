@@ -0,0 +1,138 @@
+# app/orchestration/session_store.py
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    In-process store for live call sessions.
+
+    - Primary index: session_id -> session data
+    - Secondary index: call_sid -> session_id
+    - Entries are kept in last-activity order, so expiry only walks the
+      sessions that have actually expired and the least recently used
+      session is evicted first once `max_entries` is reached.
+
+    Behaves like a dict for the read/write patterns used by the voice router.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._call_index: Dict[str, str] = {}
+        # session_id -> last activity timestamp, oldest first
+        self._activity: "OrderedDict[str, float]" = OrderedDict()
+
+    # ------------------------------------------------------------
+    # WRITES
+    # ------------------------------------------------------------
+    def put(self, session_id: str, session_data: Dict[str, Any]):
+        """Insert or replace a session and index it by its call_sid."""
+        if session_id in self._sessions:
+            self._unindex_call(session_id)
+
+        self._sessions[session_id] = session_data
+        call_sid = session_data.get("call_sid")
+        if call_sid:
+            self._call_index[call_sid] = session_id
+        self.touch(session_id)
+
+        while len(self._sessions) > self.max_entries:
+            oldest_id = next(iter(self._activity))
+            logger.warning(f"Session store full ({self.max_entries}); evicting {oldest_id}")
+            self.pop(oldest_id)
+
+    def touch(self, session_id: str):
+        """Mark a session as active now."""
+        if session_id in self._sessions:
+            self._activity[session_id] = self._clock()
+            self._activity.move_to_end(session_id)
+
+    def pop(self, session_id: str, default=None) -> Optional[Dict[str, Any]]:
+        """Remove a session from every index and return its data."""
+        session_data = self._sessions.pop(session_id, None)
+        if session_data is None:
+            return default
+        self._activity.pop(session_id, None)
+        call_sid = session_data.get("call_sid")
+        if call_sid and self._call_index.get(call_sid) == session_id:
+            del self._call_index[call_sid]
+        return session_data
+
+    def pop_by_call_sid(self, call_sid: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Remove the session bound to a Twilio CallSid. Returns (session_id, data) or None."""
+        session_id = self._call_index.get(call_sid)
+        if session_id is None:
+            return None
+        return session_id, self.pop(session_id)
+
+    def evict_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL. Cost is O(expired)."""
+        cutoff = self._clock() - self.ttl_seconds
+        evicted = 0
+        while self._activity:
+            session_id, last_activity = next(iter(self._activity.items()))
+            if last_activity > cutoff:
+                break
+            self.pop(session_id)
+            evicted += 1
+        return evicted
+
+    def _unindex_call(self, session_id: str):
+        call_sid = self._sessions[session_id].get("call_sid")
+        if call_sid and self._call_index.get(call_sid) == session_id:
+            del self._call_index[call_sid]
+
+    def clear(self):
+        self._sessions.clear()
+        self._call_index.clear()
+        self._activity.clear()
+
+    # ------------------------------------------------------------
+    # READS
+    # ------------------------------------------------------------
+    def get(self, session_id: str, default=None) -> Optional[Dict[str, Any]]:
+        """Return session data and refresh its activity timestamp."""
+        session_data = self._sessions.get(session_id)
+        if session_data is None:
+            return default
+        self.touch(session_id)
+        return session_data
+
+    def get_by_call_sid(self, call_sid: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (session_id, data) for a Twilio CallSid, or None."""
+        session_id = self._call_index.get(call_sid)
+        if session_id is None:
+            return None
+        return session_id, self.get(session_id)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(list(self._sessions.items()))
+
+    # ------------------------------------------------------------
+    # DICT PROTOCOL
+    # ------------------------------------------------------------
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        session_data = self.get(session_id)
+        if session_data is None:
+            raise KeyError(session_id)
+        return session_data
+
+    def __setitem__(self, session_id: str, session_data: Dict[str, Any]):
+        self.put(session_id, session_data)
+
+    def __delitem__(self, session_id: str):
+        if self.pop(session_id) is None:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
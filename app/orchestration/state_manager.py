@@ -6,49 +6,278 @@ from typing import Dict, Any, Optional
 import logging
 from datetime import datetime, timedelta
 
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
+SESSION_TTL = timedelta(seconds=settings.SESSION_TTL_SECONDS)
+
+
+def _new_session_data(session_id: str, call_sid: str, phone_number: str) -> Dict[str, Any]:
+    now_iso = datetime.utcnow().isoformat()
+    return {
+        "session_id": session_id,
+        "call_sid": call_sid,
+        "customer_phone": phone_number,
+        "current_agent": "customer_order_agent",
+        "call_type": "inbound_customer",
+        "start_time": now_iso,
+        "last_activity": now_iso,
+        "order_items": [],
+        "agent_transitions": [],
+        "interrupt_flag": False,
+        "conversation_history": []
+    }
+
+
+class InMemoryStateBackend:
+    """
+    FALLBACK VERSION - Uses in-memory storage instead of Redis.
+    State is local to this process, so it is only suitable for a single replica.
+    """
+
+    name = "in-memory"
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._call_to_session: Dict[str, str] = {}
+
+    async def create_session(self, session_id: str, session_data: Dict[str, Any]):
+        self._sessions[session_id] = session_data
+        self._call_to_session[session_data["call_sid"]] = session_id
+
+    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session_data = self._sessions.get(session_id)
+        if session_data:
+            # Update last activity
+            session_data["last_activity"] = datetime.utcnow().isoformat()
+        return session_data
+
+    async def get_session_id(self, call_sid: str) -> Optional[str]:
+        return self._call_to_session.get(call_sid)
+
+    async def update_session(self, session_id: str, updates: Dict[str, Any]) -> bool:
+        session_data = self._sessions.get(session_id)
+        if not session_data:
+            return False
+        session_data.update(updates)
+        session_data["last_activity"] = datetime.utcnow().isoformat()
+        return True
+
+    async def add_conversation_turn(self, session_id: str, turn: Dict[str, Any]) -> bool:
+        session_data = self._sessions.get(session_id)
+        if not session_data:
+            return False
+        session_data.setdefault("conversation_history", []).append(turn)
+        return True
+
+    async def get_field(self, session_id: str, field: str, default=None):
+        session_data = self._sessions.get(session_id)
+        return session_data.get(field, default) if session_data else default
+
+    async def end_session(self, session_id: str) -> bool:
+        session_data = self._sessions.pop(session_id, None)
+        if not session_data:
+            return False
+        call_sid = session_data.get("call_sid")
+        if call_sid and call_sid in self._call_to_session:
+            del self._call_to_session[call_sid]
+        return True
+
+    async def list_session_ids(self, limit: int):
+        return list(self._sessions.keys())[:limit]
+
+    async def cleanup_expired_sessions(self) -> int:
+        now = datetime.utcnow()
+        expired_sessions = [
+            session_id
+            for session_id, session_data in self._sessions.items()
+            if now - datetime.fromisoformat(session_data.get("last_activity", now.isoformat())) > SESSION_TTL
+        ]
+        for session_id in expired_sessions:
+            await self.end_session(session_id)
+        return len(expired_sessions)
+
+
+class RedisStateBackend:
+    """
+    Redis-backed session state shared by every replica.
+
+    Layout (all keys expire after SESSION_TTL of inactivity):
+    - session:{session_id}          hash, one JSON-encoded value per session field
+    - session:{session_id}:history  list of JSON-encoded conversation turns
+    - call:{call_sid}               string, session_id for a Twilio CallSid
+    """
+
+    name = "redis"
+
+    def __init__(self, client, ttl: timedelta = SESSION_TTL):
+        self.client = client
+        self.ttl_seconds = int(ttl.total_seconds())
+
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def _history_key(session_id: str) -> str:
+        return f"session:{session_id}:history"
+
+    @staticmethod
+    def _call_key(call_sid: str) -> str:
+        return f"call:{call_sid}"
+
+    @staticmethod
+    def _encode(fields: Dict[str, Any]) -> Dict[str, str]:
+        return {key: json.dumps(value, default=str) for key, value in fields.items()}
+
+    async def create_session(self, session_id: str, session_data: Dict[str, Any]):
+        fields = {k: v for k, v in session_data.items() if k != "conversation_history"}
+        session_key = self._session_key(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(session_key, mapping=self._encode(fields))
+            pipe.expire(session_key, self.ttl_seconds)
+            pipe.set(self._call_key(session_data["call_sid"]), session_id, ex=self.ttl_seconds)
+            await pipe.execute()
+
+    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session_key = self._session_key(session_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(session_key)
+            pipe.lrange(self._history_key(session_id), 0, -1)
+            raw_fields, raw_history = await pipe.execute()
+
+        if not raw_fields:
+            return None
+
+        session_data = {key: json.loads(value) for key, value in raw_fields.items()}
+        session_data["conversation_history"] = [json.loads(turn) for turn in raw_history]
+        session_data["last_activity"] = datetime.utcnow().isoformat()
+        await self._touch(session_id, session_data.get("call_sid"), session_data["last_activity"])
+        return session_data
+
+    async def _touch(self, session_id: str, call_sid: Optional[str], last_activity: str, pipe=None):
+        """Refresh last_activity and push every key's expiry out by one TTL."""
+        owns_pipe = pipe is None
+        if owns_pipe:
+            pipe = self.client.pipeline(transaction=False)
+        pipe.hset(self._session_key(session_id), "last_activity", json.dumps(last_activity))
+        pipe.expire(self._session_key(session_id), self.ttl_seconds)
+        pipe.expire(self._history_key(session_id), self.ttl_seconds)
+        if call_sid:
+            pipe.expire(self._call_key(call_sid), self.ttl_seconds)
+        if owns_pipe:
+            async with pipe:
+                await pipe.execute()
+
+    async def get_session_id(self, call_sid: str) -> Optional[str]:
+        return await self.client.get(self._call_key(call_sid))
+
+    async def _stored_call_sid(self, session_id: str) -> Optional[str]:
+        """The session's call_sid (its hash doubles as the existence check), or None."""
+        raw_call_sid = await self.client.hget(self._session_key(session_id), "call_sid")
+        return json.loads(raw_call_sid) if raw_call_sid is not None else None
+
+    async def update_session(self, session_id: str, updates: Dict[str, Any]) -> bool:
+        session_key = self._session_key(session_id)
+        call_sid = await self._stored_call_sid(session_id)
+        if call_sid is None:
+            return False
+
+        fields = dict(updates)
+        history = fields.pop("conversation_history", None)
+        async with self.client.pipeline(transaction=True) as pipe:
+            if fields:
+                pipe.hset(session_key, mapping=self._encode(fields))
+            if history is not None:
+                history_key = self._history_key(session_id)
+                pipe.delete(history_key)
+                if history:
+                    pipe.rpush(history_key, *[json.dumps(turn, default=str) for turn in history])
+            await self._touch(session_id, call_sid, datetime.utcnow().isoformat(), pipe=pipe)
+            await pipe.execute()
+        return True
+
+    async def add_conversation_turn(self, session_id: str, turn: Dict[str, Any]) -> bool:
+        call_sid = await self._stored_call_sid(session_id)
+        if call_sid is None:
+            return False
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._history_key(session_id), json.dumps(turn, default=str))
+            await self._touch(session_id, call_sid, turn["timestamp"], pipe=pipe)
+            await pipe.execute()
+        return True
+
+    async def get_field(self, session_id: str, field: str, default=None):
+        value = await self.client.hget(self._session_key(session_id), field)
+        return json.loads(value) if value is not None else default
+
+    async def end_session(self, session_id: str) -> bool:
+        call_sid = await self._stored_call_sid(session_id)
+        if call_sid is None:
+            return False
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._session_key(session_id), self._history_key(session_id))
+            pipe.delete(self._call_key(call_sid))
+            await pipe.execute()
+        return True
+
+    async def list_session_ids(self, limit: int):
+        session_ids = []
+        async for key in self.client.scan_iter(match="session:*", count=100):
+            if key.endswith(":history"):
+                continue
+            session_ids.append(key.split(":", 1)[1])
+            if len(session_ids) >= limit:
+                break
+        return session_ids
+
+    async def cleanup_expired_sessions(self) -> int:
+        # Redis expires idle sessions natively via key TTLs
+        return 0
+
 
 class StateManager:
     """
-    FALLBACK VERSION - Uses in-memory storage instead of Redis
-    This will work immediately without Redis dependencies
+    Session state facade used by the voice pipeline and agents.
+    Defaults to IN-MEMORY MODE; call `StateManager.initialize()` with
+    STATE_BACKEND=redis (or `StateManager.use_redis(client)`) to share
+    state across replicas.
     """
 
-    # In-memory storage (fallback)
-    _sessions = {}
-    _call_to_session = {}
+    _backend = InMemoryStateBackend()
+    _cleanup_task: Optional[asyncio.Task] = None
+
+    SESSION_TTL = SESSION_TTL
+
+    def __init__(self, use_fake: bool = False):
+        # Test mode: route all state through an in-process fakeredis server
+        if use_fake:
+            from ..core.database import create_redis_client
+            StateManager.use_redis(create_redis_client("fakeredis://"))
+
+    @staticmethod
+    def use_redis(client):
+        """Switch to the Redis backend using an async redis client (or fakeredis)."""
+        StateManager._backend = RedisStateBackend(client)
 
-    SESSION_TTL = timedelta(hours=1)
+    @staticmethod
+    def use_memory():
+        """Switch to a fresh in-memory backend."""
+        StateManager._backend = InMemoryStateBackend()
 
     @staticmethod
     async def create_session(call_sid: str, phone_number: str) -> str:
-        """Create a new call session in memory"""
+        """Create a new call session"""
         try:
             session_id = str(uuid.uuid4())
+            await StateManager._backend.create_session(
+                session_id, _new_session_data(session_id, call_sid, phone_number)
+            )
 
-            now_iso = datetime.utcnow().isoformat()
-            session_data = {
-                "session_id": session_id,
-                "call_sid": call_sid,
-                "customer_phone": phone_number,
-                "current_agent": "customer_order_agent",
-                "call_type": "inbound_customer",
-                "start_time": now_iso,
-                "last_activity": now_iso,
-                "order_items": [],
-                "agent_transitions": [],
-                "interrupt_flag": False,
-                "conversation_history": []
-            }
-
-            # Store in memory
-            StateManager._sessions[session_id] = session_data
-            StateManager._call_to_session[call_sid] = session_id
-
-            logger.info(f"✅ CREATED SESSION (IN-MEMORY): {session_id} for call {call_sid}")
+            logger.info(f"✅ CREATED SESSION ({StateManager._backend.name}): {session_id} for call {call_sid}")
             return session_id
-            
+
         except Exception as e:
             logger.error(f"❌ Error creating session: {e}")
             # Return a simple session ID
@@ -56,14 +285,9 @@ class StateManager:
 
     @staticmethod
     async def get_session(session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session data from memory"""
+        """Get session data"""
         try:
-            session_data = StateManager._sessions.get(session_id)
-            if session_data:
-                # Update last activity
-                session_data["last_activity"] = datetime.utcnow().isoformat()
-                return session_data
-            return None
+            return await StateManager._backend.get_session(session_id)
         except Exception as e:
             logger.error(f"❌ Error getting session {session_id}: {e}")
             return None
@@ -72,7 +296,7 @@ class StateManager:
     async def get_session_by_call_sid(call_sid: str) -> Optional[Dict[str, Any]]:
         """Get session data by call_sid"""
         try:
-            session_id = StateManager._call_to_session.get(call_sid)
+            session_id = await StateManager._backend.get_session_id(call_sid)
             if session_id:
                 return await StateManager.get_session(session_id)
             return None
@@ -82,39 +306,24 @@ class StateManager:
 
     @staticmethod
     async def update_session(session_id: str, **updates):
-        """Update session data in memory - SIMPLE AND RELIABLE"""
+        """Update only the given session fields"""
         try:
-            session_data = StateManager._sessions.get(session_id)
-            if session_data:
-                # Apply updates
-                for key, value in updates.items():
-                    session_data[key] = value
-                
-                session_data["last_activity"] = datetime.utcnow().isoformat()
+            if await StateManager._backend.update_session(session_id, updates):
                 logger.info(f"✅ UPDATED SESSION: {session_id} with {list(updates.keys())}")
                 return True
             else:
                 logger.error(f"❌ Session {session_id} not found for update")
                 return False
-                
+
         except Exception as e:
             logger.error(f"❌ Error updating session {session_id}: {e}")
             return False
 
     @staticmethod
     async def end_session(session_id: str):
-        """End a session in memory"""
+        """End a session"""
         try:
-            session_data = StateManager._sessions.get(session_id)
-            if session_data:
-                call_sid = session_data.get("call_sid")
-                
-                # Remove from memory
-                if session_id in StateManager._sessions:
-                    del StateManager._sessions[session_id]
-                if call_sid and call_sid in StateManager._call_to_session:
-                    del StateManager._call_to_session[call_sid]
-
+            if await StateManager._backend.end_session(session_id):
                 logger.info(f"✅ ENDED SESSION: {session_id}")
             else:
                 logger.warning(f"Session {session_id} not found for ending")
@@ -125,7 +334,7 @@ class StateManager:
     async def end_session_by_call_sid(call_sid: str):
         """End session using Twilio CallSid mapping"""
         try:
-            session_id = StateManager._call_to_session.get(call_sid)
+            session_id = await StateManager._backend.get_session_id(call_sid)
             if session_id:
                 await StateManager.end_session(session_id)
             else:
@@ -137,21 +346,14 @@ class StateManager:
     async def add_conversation_turn(session_id: str, role: str, message: str):
         """Add a conversation turn to history"""
         try:
-            session_data = StateManager._sessions.get(session_id)
-            if session_data:
-                turn = {
-                    "role": role,
-                    "message": message,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-                
-                # Ensure conversation_history exists
-                if "conversation_history" not in session_data:
-                    session_data["conversation_history"] = []
-                
-                session_data["conversation_history"].append(turn)
+            turn = {
+                "role": role,
+                "message": message,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+            if await StateManager._backend.add_conversation_turn(session_id, turn):
                 logger.info(f"✅ ADDED CONVERSATION TURN: {role} - {message[:50]}...")
-                
+
         except Exception as e:
             logger.error(f"❌ Error adding conversation turn for session {session_id}: {e}")
 
@@ -159,63 +361,59 @@ class StateManager:
     async def debug_session(session_id: str) -> Dict[str, Any]:
         """Debug method to inspect session state"""
         try:
-            session_data = StateManager._sessions.get(session_id)
+            session_data = await StateManager._backend.get_session(session_id)
+            all_session_ids = await StateManager._backend.list_session_ids(5)  # First 5 sessions
             if session_data:
                 return {
                     "exists": True,
                     "session_id": session_id,
+                    "backend": StateManager._backend.name,
                     "current_agent": session_data.get("current_agent"),
                     "order_items": session_data.get("order_items", []),
                     "call_sid": session_data.get("call_sid"),
                     "conversation_history_length": len(session_data.get("conversation_history", [])),
-                    "all_session_ids": list(StateManager._sessions.keys())[:5]  # First 5 sessions
+                    "all_session_ids": all_session_ids
                 }
             else:
                 return {
-                    "exists": False, 
+                    "exists": False,
                     "session_id": session_id,
-                    "all_session_ids": list(StateManager._sessions.keys())[:5]
+                    "backend": StateManager._backend.name,
+                    "all_session_ids": all_session_ids
                 }
         except Exception as e:
             return {"error": str(e), "session_id": session_id}
 
-    # These methods are simplified for in-memory version
     @staticmethod
     async def set_interrupt_flag(session_id: str, flag: bool):
         await StateManager.update_session(session_id, interrupt_flag=flag)
 
     @staticmethod
     async def get_interrupt_flag(session_id: str) -> bool:
-        session_data = StateManager._sessions.get(session_id)
-        return session_data.get("interrupt_flag", False) if session_data else False
+        return bool(await StateManager._backend.get_field(session_id, "interrupt_flag", False))
 
     @staticmethod
     async def cleanup_expired_sessions():
-        """Simple cleanup - remove sessions older than 1 hour"""
+        """Remove sessions idle for longer than SESSION_TTL (no-op on Redis, keys expire natively)"""
         try:
-            now = datetime.utcnow()
-            expired_sessions = []
-            
-            for session_id, session_data in StateManager._sessions.items():
-                last_activity = datetime.fromisoformat(session_data.get("last_activity", now.isoformat()))
-                if now - last_activity > StateManager.SESSION_TTL:
-                    expired_sessions.append(session_id)
-            
-            for session_id in expired_sessions:
-                await StateManager.end_session(session_id)
-                
-            if expired_sessions:
-                logger.info(f"🧹 Cleaned up {len(expired_sessions)} expired sessions")
-                
+            expired_count = await StateManager._backend.cleanup_expired_sessions()
+            if expired_count:
+                logger.info(f"🧹 Cleaned up {expired_count} expired sessions")
+
         except Exception as e:
             logger.error(f"❌ Error cleaning up expired sessions: {e}")
 
     @staticmethod
     async def initialize():
         """Initialize the state manager"""
-        logger.info("✅ StateManager initialized (IN-MEMORY MODE)")
-        # Start background cleanup
-        asyncio.create_task(_periodic_cleanup())
+        if settings.STATE_BACKEND == "redis":
+            from ..core.database import redis_client
+            StateManager.use_redis(redis_client)
+
+        logger.info(f"✅ StateManager initialized ({StateManager._backend.name.upper()} MODE)")
+        # Only the in-memory backend needs a background sweep
+        if isinstance(StateManager._backend, InMemoryStateBackend):
+            StateManager._cleanup_task = asyncio.create_task(_periodic_cleanup())
 
 
 async def _periodic_cleanup():
@@ -226,4 +424,4 @@ async def _periodic_cleanup():
             await asyncio.sleep(3600)  # Run every hour
         except Exception as e:
             logger.error(f"❌ Periodic cleanup error: {e}")
-            await asyncio.sleep(300)
\ No newline at end of file
+            await asyncio.sleep(300)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 import logging
 from typing import Dict, Any
 
-from ..agents import CustomerOrderAgent
+from ..agents import AgentPool
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -17,6 +17,8 @@ async def process_customer_message(payload: Dict[str, Any]):
         "message": "I want pizza",
         "session_data": {...}
     }
+    When session_data carries a session_id, the conversation continues from
+    the state saved in that session.
     """
     try:
         message = payload.get("message")
@@ -25,8 +27,8 @@ async def process_customer_message(payload: Dict[str, Any]):
         if not message:
             raise HTTPException(status_code=400, detail="Missing 'message'")
 
-        agent = CustomerOrderAgent()
-        result = await agent.process_message(message, session_data)
+        async with AgentPool.session("customer_order_agent", session_data.get("session_id")) as agent:
+            result = await agent.process_message(message, session_data)
         return {"success": True, "response": result}
     except Exception as e:
         logger.error(f"Error in agents router: {e}")
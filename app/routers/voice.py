@@ -8,21 +8,28 @@ from app.services import stt_service
 from app.services import tts_service
 from ..services.language_service import LanguageService, Language
 from ..services.payment_service import PaymentService
-from ..services.maps_service import MapsService
+from ..services.maps_service import get_maps_service
 from ..services.twilio_service import TwilioService
+from ..services.webhook_queue import enqueue_call_status, enqueue_stripe_event, register_webhook_handler
 from ..core.config import settings
+from ..core.middleware import verify_twilio_request
 from typing import Dict, Any
 from app.services.stt_service import STTService
 from app.services.tts_service import TTSService
 from app.orchestration.state_manager import StateManager
+from app.orchestration.session_store import SessionStore
+from app.services.menu_catalog import get_menu_catalog
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 payment_service = PaymentService()
-maps_service = MapsService()
+maps_service = get_maps_service()
 
-sessions = {}
+sessions = SessionStore(
+    ttl_seconds=settings.SESSION_TTL_SECONDS,
+    max_entries=settings.SESSION_MAX_ENTRIES,
+)
 
 def clean_address_input(address: str) -> str:
     """Clean and normalize address input"""
@@ -114,13 +121,7 @@ async def handle_voice_call(request: Request):
         
         logger.info(f"Voice call - CallSid: {call_sid}, Speech: '{speech_result}'")
  
-        session_data = None
-        session_id = None
-        for sid, data in sessions.items():
-            if data.get("call_sid") == call_sid:
-                session_data = data
-                session_id = sid
-                break
+        session_id, session_data = sessions.get_by_call_sid(call_sid) or (None, None)
         
         response = VoiceResponse()
         
@@ -273,69 +274,17 @@ async def handle_customer_order_agent(session_id: str, speech: str, response: Vo
     
     session_data = sessions[session_id]
     
-    menu_categories = {
-        "pizza": {
-            "name": "Pizza",
-            "items": {
-                "margherita": {"name": "Margherita Pizza", "price": 1599, "description": "Fresh tomatoes, mozzarella, basil"},
-                "pepperoni": {"name": "Pepperoni Pizza", "price": 1799, "description": "Pepperoni, mozzarella, tomato sauce"},
-                "veggie": {"name": "Veggie Supreme", "price": 1699, "description": "Bell peppers, mushrooms, onions, olives"},
-                "bbq": {"name": "BBQ Chicken Pizza", "price": 1899, "description": "Grilled chicken, BBQ sauce, red onions"},
-                "hawaiian": {"name": "Hawaiian Pizza", "price": 1749, "description": "Ham, pineapple, mozzarella"},
-                "meat": {"name": "Meat Lovers", "price": 1999, "description": "Pepperoni, sausage, ham, bacon"}
-            }
-        },
-        "burger": {
-            "name": "Burgers", 
-            "items": {
-                "classic": {"name": "Classic Burger", "price": 1299, "description": "Beef patty, lettuce, tomato, onion"},
-                "cheese": {"name": "Cheese Burger", "price": 1399, "description": "Beef patty with melted cheese"},
-                "bacon": {"name": "Bacon Burger", "price": 1499, "description": "Beef patty with crispy bacon"},
-                "chicken": {"name": "Chicken Burger", "price": 1399, "description": "Grilled chicken breast with mayo"},
-                "veggie": {"name": "Veggie Burger", "price": 1199, "description": "Plant-based patty with fresh veggies"},
-                "double": {"name": "Double Cheese Burger", "price": 1699, "description": "Two beef patties with double cheese"}
-            }
-        },
-        "pasta": {
-            "name": "Pasta",
-            "items": {
-                "spaghetti": {"name": "Spaghetti Carbonara", "price": 1499, "description": "Spaghetti with bacon, eggs, parmesan"},
-                "fettuccine": {"name": "Fettuccine Alfredo", "price": 1599, "description": "Fettuccine with creamy alfredo sauce"},
-                "lasagna": {"name": "Beef Lasagna", "price": 1699, "description": "Layered pasta with beef and cheese"},
-                "penne": {"name": "Penne Arrabbiata", "price": 1399, "description": "Penne with spicy tomato sauce"},
-                "ravioli": {"name": "Cheese Ravioli", "price": 1599, "description": "Cheese-filled ravioli with marinara"},
-                "mac": {"name": "Mac & Cheese", "price": 1299, "description": "Creamy macaroni and cheese"}
-            }
-        },
-        "sushi": {
-            "name": "Sushi",
-            "items": {
-                "california": {"name": "California Roll", "price": 1899, "description": "Crab, avocado, cucumber"},
-                "philadelphia": {"name": "Philadelphia Roll", "price": 1999, "description": "Smoked salmon, cream cheese"},
-                "dragon": {"name": "Dragon Roll", "price": 2199, "description": "Eel, avocado, cucumber"},
-                "rainbow": {"name": "Rainbow Roll", "price": 2299, "description": "Assorted fish with avocado"},
-                "spicy": {"name": "Spicy Tuna Roll", "price": 1799, "description": "Spicy tuna with cucumber"},
-                "salmon": {"name": "Salmon Nigiri", "price": 1699, "description": "Fresh salmon over rice"}
-            }
-        }
-    }
+    catalog = get_menu_catalog()
 
     if "pending_category" in session_data:
         category_key = session_data["pending_category"]
-        category = menu_categories[category_key]
+        category = catalog.get_category(category_key)
         
         logger.info(f"🔄 Processing item selection for category: {category_key}")
         logger.info(f"🔄 User said: '{speech}'")
         
-        selected_item = None
-        selected_item_key = None
-        
-        for item_key, item_data in category["items"].items():
-            if (item_key in speech.lower() or 
-                item_data["name"].lower().replace(" pizza", "").replace(" burger", "").replace(" roll", "").replace(" pasta", "") in speech.lower()):
-                selected_item = item_data
-                selected_item_key = item_key
-                break
+        match = catalog.match_item(speech, category_key)
+        selected_item = dict(match[2]) if match else None
         
         if selected_item:
             session_data["order_items"].append(selected_item)
@@ -358,13 +307,7 @@ async def handle_customer_order_agent(session_id: str, speech: str, response: Vo
             logger.info(f"✅ Selected: {selected_item['name']}")
             
         else:
-            options_text = f"I didn't catch which {category['name'].lower()} you want. We have: "
-            options_list = []
-            for item_key, item_data in category["items"].items():
-                simple_name = item_data["name"].replace(" Pizza", "").replace(" Burger", "").replace(" Roll", "").replace(" Pasta", "")
-                options_list.append(f"{simple_name}")
-            
-            options_text += ", ".join(options_list) + "."
+            options_text = f"I didn't catch which {category['name'].lower()} you want. We have: {catalog.options(category_key)}."
             
             response.say(options_text)
             
@@ -381,25 +324,13 @@ async def handle_customer_order_agent(session_id: str, speech: str, response: Vo
             
         return
 
-    mentioned_category = None
-    for category_key, category_data in menu_categories.items():
-        if category_key in speech.lower():
-            mentioned_category = category_key
-            break
+    mentioned_category = catalog.match_category(speech)
     
     if mentioned_category:
-        category = menu_categories[mentioned_category]
-        
-        # Build options speech with simpler names for better voice recognition
-        options_text = f"We have several {category['name']} options: "
-        options_list = []
-        for item_key, item_data in category["items"].items():
-            # Use simpler names for voice recognition
-            simple_name = item_data["name"].replace(" Pizza", "").replace(" Burger", "").replace(" Roll", "").replace(" Pasta", "")
-            price = f"${item_data['price']/100:.2f}"
-            options_list.append(f"{simple_name} for {price}")
+        category = catalog.get_category(mentioned_category)
         
-        options_text += ", ".join(options_list) + "."
+        # Options speech uses simpler names for better voice recognition
+        options_text = f"We have several {category['name']} options: {catalog.options(mentioned_category, with_prices=True)}."
         
         response.say(options_text)
         
@@ -418,20 +349,8 @@ async def handle_customer_order_agent(session_id: str, speech: str, response: Vo
         
     else:
         # Check if user mentioned a specific item directly
-        direct_item = None
-        direct_category = None
-        
-        for category_key, category_data in menu_categories.items():
-            for item_key, item_data in category_data["items"].items():
-                # Check for direct item mentions
-                item_name_lower = item_data["name"].lower()
-                if (item_key in speech.lower() or 
-                    any(word in speech.lower() for word in item_name_lower.split())):
-                    direct_item = item_data
-                    direct_category = category_key
-                    break
-            if direct_item:
-                break
+        match = catalog.match_item(speech)
+        direct_item = dict(match[2]) if match else None
         
         if direct_item:
             # User mentioned a specific item directly
@@ -509,9 +428,10 @@ async def handle_address_agent(session_id: str, speech: str, response: VoiceResp
         response.say(f"Thank you! Address accepted: {format_address_for_speech(cleaned_address)}. Now proceeding to secure payment.")
         
         # Create payment intent
-        payment_result = payment_service.create_payment_intent(
+        payment_result = await payment_service.create_payment_intent_async(
             amount_cents=session_data["total_amount"],
             currency="usd",
+            session_id=session_id,
             metadata={
                 "session_id": session_id,
                 "order_items": str([item["name"] for item in session_data["order_items"]]),
@@ -565,7 +485,7 @@ async def handle_payment_agent(session_id: str, speech: str, response: VoiceResp
         
         if payment_intent_id:
             # Confirm the payment
-            payment_result = payment_service.confirm_payment(payment_intent_id)
+            payment_result = await payment_service.confirm_payment_async(payment_intent_id)
             
             if payment_result["success"]:
                 session_data["current_agent"] = "restaurant_agent"
@@ -856,59 +776,71 @@ async def get_live_tracking(session_id: str):
 
 @router.post("/payment/webhook")
 async def handle_payment_webhook(request: Request):
-    """REAL Stripe webhook handler for payment events (using YOUR service)"""
+    """REAL Stripe webhook: verify the signature, queue the event, acknowledge at once"""
+    payload = await request.body()
+    sig_header = request.headers.get('stripe-signature')
+
+    webhook_result = payment_service.handle_webhook(
+        payload,
+        sig_header,
+        settings.STRIPE_WEBHOOK_SECRET
+    )
+    if not webhook_result["success"]:
+        return {"error": webhook_result["error"]}
+
     try:
-        payload = await request.body()
-        sig_header = request.headers.get('stripe-signature')
-        
-        webhook_result = payment_service.handle_webhook(
-            payload, 
-            sig_header, 
-            settings.STRIPE_WEBHOOK_SECRET
-        )
-        
-        if webhook_result["success"]:
-            event = webhook_result["event"]
-            
-            if event['type'] == 'payment_intent.succeeded':
-                payment_intent = event['data']['object']
-                logger.info(f"Payment succeeded: {payment_intent['id']}")
-                # Update order status in database
-                
-            elif event['type'] == 'payment_intent.payment_failed':
-                payment_intent = event['data']['object']
-                logger.error(f"Payment failed: {payment_intent['id']}")
-                # Handle failed payment
-            
-            return {"status": "webhook_processed"}
-        else:
-            return {"error": webhook_result["error"]}
-            
+        await enqueue_stripe_event(webhook_result["event"], payload)
     except Exception as e:
-        logger.exception(f"Webhook error: {e}")
-        return {"error": "webhook_processing_failed"}
+        # Not queued: a non-2xx makes Stripe retry
+        logger.exception(f"Webhook enqueue error: {e}")
+        raise HTTPException(status_code=503, detail="webhook_queue_unavailable")
+    return {"status": "webhook_queued"}
+
+
+async def apply_payment_event(event: Dict[str, Any]):
+    """Webhook queue handler: note the payment outcome on the live call session"""
+    payment_intent = event["payload"]["data"]["object"]
+    if event["type"] == "payment_intent.succeeded":
+        logger.info(f"Payment succeeded: {payment_intent['id']}")
+    elif event["type"] == "payment_intent.payment_failed":
+        logger.error(f"Payment failed: {payment_intent['id']}")
+    else:
+        return
+
+    session_id = (payment_intent.get("metadata") or {}).get("session_id")
+    session_data = sessions.get(session_id) if session_id else None
+    if session_data and session_data.get("payment_intent_id") == payment_intent["id"]:
+        session_data["payment_status"] = event["type"].split(".", 1)[1]
+
 
 @router.post("/call-status")
 async def handle_call_status(request: Request):
-    """Handle call status updates"""
+    """Handle call status updates: verify, queue, acknowledge at once"""
+    await verify_twilio_request(request)
+    form_data = await request.form()
     try:
-        form_data = await request.form()
-        call_sid = form_data.get("CallSid")
-        status = form_data.get("CallStatus")
-        logger.info(f"Call {call_sid} status: {status}")
-        
-        # Clean up session when call ends
-        if status in ["completed", "failed", "busy", "no-answer"]:
-            for session_id, session_data in list(sessions.items()):
-                if session_data.get("call_sid") == call_sid:
-                    del sessions[session_id]
-                    logger.info(f"Cleaned up session {session_id} for call {call_sid}")
-                    break
-            
-        return {"success": True}
+        await enqueue_call_status(dict(form_data))
     except Exception as e:
-        logger.error(f"Call status error: {e}")
-        return {"success": False}
+        logger.error(f"Call status enqueue error: {e}")
+        raise HTTPException(status_code=503, detail="webhook_queue_unavailable")
+    return {"success": True}
+
+
+async def apply_call_status(event: Dict[str, Any]):
+    """Webhook queue handler for Twilio call status callbacks"""
+    call_sid = event["object_id"]
+    status = event["payload"].get("CallStatus")
+    logger.info(f"Call {call_sid} status: {status}")
+
+    # Clean up session when call ends
+    if status in ["completed", "failed", "busy", "no-answer"]:
+        removed = sessions.pop_by_call_sid(call_sid)
+        if removed:
+            logger.info(f"Cleaned up session {removed[0]} for call {call_sid}")
+
+
+register_webhook_handler("stripe", apply_payment_event)
+register_webhook_handler("twilio", apply_call_status)
 
 # DEBUG AND TESTING ENDPOINTS
 @router.get("/debug-sessions")
@@ -935,10 +867,10 @@ async def test_integrations():
     """Test endpoint to verify all real integrations are working"""
     # Test address verification
     test_address = "350 5th Ave, New York, NY 10118"
-    address_result = maps_service.verify_address(test_address)
+    address_result = await maps_service.verify_address(test_address)
     
     # Test payment service
-    payment_result = payment_service.create_payment_intent(1000)  # $10.00
+    payment_result = await payment_service.create_payment_intent_async(1000)  # $10.00
     
     return {
         "status": "Real Integrations Test",
@@ -1103,27 +1035,15 @@ async def voice_root():
 
 # Background task to clean up old sessions
 import asyncio
-from datetime import datetime, timedelta
 
 async def cleanup_old_sessions():
-    """Background task to clean up sessions older than 1 hour"""
+    """Background task to evict sessions idle for longer than SESSION_TTL_SECONDS"""
     while True:
         try:
-            now = datetime.now()
-            expired_sessions = []
-            
-            for session_id, session_data in sessions.items():
-                # Simple cleanup based on order status
-                if session_data.get("order_status") in ["completed", "cancelled"]:
-                    expired_sessions.append(session_id)
-                # Or clean up sessions older than 1 hour (you'd need to store creation time)
-            
-            for session_id in expired_sessions:
-                if session_id in sessions:
-                    del sessions[session_id]
+            expired_count = sessions.evict_expired()
             
-            if expired_sessions:
-                logger.info(f"🧹 Cleaned up {len(expired_sessions)} expired sessions")
+            if expired_count:
+                logger.info(f"🧹 Cleaned up {expired_count} expired sessions")
             
             await asyncio.sleep(300)  # Run every 5 minutes
             
@@ -0,0 +1,257 @@
+"""
+app/services/driver_index.py
+
+In-memory spatial index of online drivers
+-----------------------------------------
+- Uniform lat/lng grid (DRIVER_INDEX_CELL_DEGREES per cell, ~1.1 km at 0.01°)
+  holding every available driver with a known position
+- Loaded from the drivers table's latitude/longitude columns at startup and
+  reloaded every DRIVER_INDEX_REFRESH_SECONDS, so changes committed by other
+  replicas show up; update_driver_location() applies this replica's own
+  changes once they are committed
+- Older than DRIVER_INDEX_MAX_STALENESS_SECONDS (reloads failing), it is
+  not used and lookups go to the database
+- within(): all drivers inside a radius, nearest first
+- nearest(): k nearest, widening the radius until k drivers are found
+Queries only touch the cells overlapping the search circle, so cost
+follows local driver density rather than the total number online.
+Longitude does not wrap at ±180°.
+"""
+
+import logging
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+# Half the Earth's circumference: no two points are further apart
+MAX_DISTANCE_KM = EARTH_RADIUS_KM * math.pi
+
+
+class DriverMatch(NamedTuple):
+    driver_id: Any
+    distance_km: float
+    latitude: float
+    longitude: float
+    info: Dict[str, Any]
+
+
+class _Entry:
+    __slots__ = ("latitude", "longitude", "lat_rad", "lon_rad", "cos_lat", "cell", "info")
+
+    def __init__(self, latitude: float, longitude: float, cell: Tuple[int, int], info: Dict[str, Any]):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.lat_rad = math.radians(latitude)
+        self.lon_rad = math.radians(longitude)
+        self.cos_lat = math.cos(self.lat_rad)
+        self.cell = cell
+        self.info = info
+
+
+class DriverIndex:
+    """Grid index of available drivers for radius and k-nearest queries. Thread-safe."""
+
+    def __init__(self, cell_degrees: Optional[float] = None):
+        self.cell_degrees = cell_degrees or settings.DRIVER_INDEX_CELL_DEGREES
+        self._drivers: Dict[Any, _Entry] = {}
+        self._cells: Dict[Tuple[int, int], Dict[Any, _Entry]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        # Set when populated from the database; until then (or once stale) callers query it instead
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._drivers)
+
+    def __contains__(self, driver_id) -> bool:
+        return driver_id in self._drivers
+
+    # ----------------------------------------------------------
+    # Updates
+    # ----------------------------------------------------------
+    def upsert(self, driver_id, latitude: float, longitude: float, **info):
+        """Add a driver or move it to a new position; `info` replaces the stored details if given."""
+        cell = self._cell(latitude, longitude)
+        with self._lock:
+            previous = self._drivers.get(driver_id)
+            if previous is not None:
+                info = info or previous.info
+                self._drop(driver_id, previous)
+            entry = _Entry(latitude, longitude, cell, info)
+            self._drivers[driver_id] = entry
+            self._cells[cell][driver_id] = entry
+
+    def remove(self, driver_id) -> bool:
+        """Take a driver out of the index (went offline / became busy)."""
+        with self._lock:
+            entry = self._drivers.pop(driver_id, None)
+            if entry is None:
+                return False
+            self._drop(driver_id, entry, forget=False)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._drivers.clear()
+            self._cells.clear()
+
+    def replace(self, drivers):
+        """Swap in a new set of (driver_id, latitude, longitude, info) at once; queries never see a partial index."""
+        entries: Dict[Any, _Entry] = {}
+        cells: Dict[Tuple[int, int], Dict[Any, _Entry]] = defaultdict(dict)
+        for driver_id, latitude, longitude, info in drivers:
+            entry = _Entry(latitude, longitude, self._cell(latitude, longitude), info)
+            entries[driver_id] = entry
+            cells[entry.cell][driver_id] = entry
+        with self._lock:
+            self._drivers = entries
+            self._cells = cells
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """Loaded, and reloaded within `max_age` seconds (DRIVER_INDEX_MAX_STALENESS_SECONDS)."""
+        max_age = max_age if max_age is not None else settings.DRIVER_INDEX_MAX_STALENESS_SECONDS
+        return self.loaded and time.monotonic() - self.loaded_at <= max_age
+
+    # ----------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------
+    def get(self, driver_id) -> Optional[DriverMatch]:
+        entry = self._drivers.get(driver_id)
+        if entry is None:
+            return None
+        return DriverMatch(driver_id, 0.0, entry.latitude, entry.longitude, entry.info)
+
+    def within(self, latitude: float, longitude: float, radius_km: float, limit: Optional[int] = None) -> List[DriverMatch]:
+        """Drivers within `radius_km` of the point, nearest first."""
+        lat_rad = math.radians(latitude)
+        lon_rad = math.radians(longitude)
+        cos_lat = math.cos(lat_rad)
+        matches = []
+        with self._lock:
+            for cells in self._cells_near(latitude, longitude, radius_km):
+                for driver_id, entry in cells.items():
+                    # Haversine, with the driver's trig precomputed
+                    a = (math.sin((entry.lat_rad - lat_rad) / 2) ** 2
+                         + cos_lat * entry.cos_lat * math.sin((entry.lon_rad - lon_rad) / 2) ** 2)
+                    distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+                    if distance <= radius_km:
+                        matches.append(DriverMatch(driver_id, distance, entry.latitude, entry.longitude, entry.info))
+        matches.sort(key=lambda match: match.distance_km)
+        return matches[:limit] if limit is not None else matches
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1, max_radius_km: Optional[float] = None) -> List[DriverMatch]:
+        """
+        The k nearest drivers (optionally no further than max_radius_km).
+        Starts at one cell's width and doubles the radius until k drivers are
+        inside it; everything outside the radius is further away, so the
+        result is exact.
+        """
+        limit = min(max_radius_km or MAX_DISTANCE_KM, MAX_DISTANCE_KM)
+        radius = min(self.cell_degrees * KM_PER_DEGREE, limit)
+        while True:
+            matches = self.within(latitude, longitude, radius, limit=k)
+            if len(matches) >= k or radius >= limit or not self._drivers:
+                return matches
+            radius = min(radius * 2, limit)
+
+    # ----------------------------------------------------------
+    # Internal helpers
+    # ----------------------------------------------------------
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _drop(self, driver_id, entry: _Entry, forget: bool = True):
+        cell = self._cells.get(entry.cell)
+        if cell is not None:
+            cell.pop(driver_id, None)
+            if not cell:
+                del self._cells[entry.cell]
+        if forget:
+            self._drivers.pop(driver_id, None)
+
+    def _cells_near(self, latitude: float, longitude: float, radius_km: float):
+        """Occupied cells overlapping the bounding box of the search circle."""
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; size the box for the widest latitude in it
+        widest = min(89.9, abs(latitude) + lat_span)
+        lon_span = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+
+        lat_lo, lon_lo = self._cell(latitude - lat_span, longitude - lon_span)
+        lat_hi, lon_hi = self._cell(latitude + lat_span, longitude + lon_span)
+        if (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1) > len(self._cells):
+            # Box covers more cells than are occupied: walk the occupied ones instead
+            return [
+                cells for (i, j), cells in self._cells.items()
+                if lat_lo <= i <= lat_hi and lon_lo <= j <= lon_hi
+            ]
+        return [
+            self._cells[(i, j)]
+            for i in range(lat_lo, lat_hi + 1)
+            for j in range(lon_lo, lon_hi + 1)
+            if (i, j) in self._cells
+        ]
+
+
+_index: Optional[DriverIndex] = None
+
+
+def get_driver_index() -> DriverIndex:
+    """Process-wide index shared by the driver tools."""
+    global _index
+    if _index is None:
+        _index = DriverIndex()
+    return _index
+
+
+async def load_driver_index(index: Optional[DriverIndex] = None, session_factory=None) -> int:
+    """
+    (Re)build the index from available drivers with a stored position.
+    Returns the number of drivers indexed; on failure the index is left as it
+    was and goes stale, so lookups move to the database.
+    """
+    from ..core.database import AsyncSessionLocal
+    from ..models.database import Driver
+
+    index = index if index is not None else get_driver_index()
+    session_factory = session_factory or AsyncSessionLocal
+    try:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Driver.id, Driver.name, Driver.latitude, Driver.longitude).where(
+                    Driver.is_available.is_(True),
+                    Driver.latitude.is_not(None),
+                    Driver.longitude.is_not(None),
+                )
+            )
+            rows = result.all()
+    except Exception as e:
+        logger.warning(f"Driver index not loaded: {e}")
+        return 0
+
+    index.replace((driver_id, latitude, longitude, {"name": name}) for driver_id, name, latitude, longitude in rows)
+    logger.debug(f"Driver index loaded with {len(rows)} available drivers")
+    return len(rows)
+
+
+async def run_driver_index_refresh(index: Optional[DriverIndex] = None, interval: Optional[float] = None):
+    """Background loop: reload the index every DRIVER_INDEX_REFRESH_SECONDS."""
+    interval = interval or settings.DRIVER_INDEX_REFRESH_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_driver_index(index)
+        except Exception as e:
+            logger.error(f"Driver index reload failed: {e}")
@@ -0,0 +1,255 @@
+"""
+app/services/eta_model.py
+
+Offline ETA model for delivery tracking
+---------------------------------------
+- Speed table per (zone, hour of day), learned from the pickup → delivery
+  legs of completed orders' timelines; zones are ETA_MODEL_ZONE_DEGREES
+  cells around the trip midpoint
+- Falls back to the city-wide speed for that hour, then to
+  ETA_MODEL_DEFAULT_SPEED_KMPH, until a bucket has ETA_MODEL_MIN_SAMPLES trips
+- Road distance = Haversine distance x a per-zone road factor
+  (ETA_MODEL_ROAD_FACTOR until recalibrated)
+- estimate() is pure arithmetic and dict lookups: no I/O on tracking polls
+- recalibrate() sends a sample of recently estimated pairs to Google Maps
+  and folds the answers into the road factors and speed table; it runs
+  every ETA_MODEL_RECALIBRATE_SECONDS in the background
+
+Timeline format read by load():
+    {"picked_up": "<iso timestamp>", "delivered": "<iso timestamp>",
+     "pickup_location": {"latitude": .., "longitude": ..},     # optional
+     "dropoff_location": {"latitude": .., "longitude": ..}}    # optional
+Missing locations come from the restaurant address and the order's
+delivery_address.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..tools.driver_tools import calculate_distance
+
+logger = logging.getLogger(__name__)
+
+LatLng = Tuple[float, float]
+Trip = Tuple[LatLng, LatLng, datetime, datetime]
+
+# Plausible delivery legs; anything outside is a bad timestamp or a parked driver
+MIN_TRIP_MINUTES, MAX_TRIP_MINUTES = 1, 180
+MIN_SPEED_KMPH, MAX_SPEED_KMPH = 3, 120
+MIN_ROAD_FACTOR, MAX_ROAD_FACTOR = 1.0, 3.0
+# Weight of a new Maps observation in a zone's road factor
+ROAD_FACTOR_ALPHA = 0.2
+
+
+def _point(location: Optional[Dict[str, Any]]) -> Optional[LatLng]:
+    if not isinstance(location, dict):
+        return None
+    lat = location.get("latitude", location.get("lat"))
+    lon = location.get("longitude", location.get("lon", location.get("lng")))
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    """Naive datetime like the rest of the schema; aware values are converted to UTC."""
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def trip_from_timeline(
+    timeline: Optional[Dict[str, Any]],
+    delivery_address: Optional[Dict[str, Any]] = None,
+    restaurant_address: Optional[Dict[str, Any]] = None,
+) -> Optional[Trip]:
+    """The (pickup, dropoff, picked_up, delivered) leg of an order, or None if incomplete."""
+    if not timeline:
+        return None
+    origin = _point(timeline.get("pickup_location")) or _point(restaurant_address)
+    destination = _point(timeline.get("dropoff_location")) or _point(delivery_address)
+    start = _timestamp(timeline.get("picked_up"))
+    end = _timestamp(timeline.get("delivered"))
+    if None in (origin, destination, start, end):
+        return None
+    return origin, destination, start, end
+
+
+class EtaModel:
+    """Speed table + road factors; see module docstring. Use from the event loop."""
+
+    def __init__(
+        self,
+        zone_degrees: Optional[float] = None,
+        default_speed_kmph: Optional[float] = None,
+        road_factor: Optional[float] = None,
+        min_samples: Optional[int] = None,
+    ):
+        self.zone_degrees = zone_degrees or settings.ETA_MODEL_ZONE_DEGREES
+        self.default_speed_kmph = default_speed_kmph or settings.ETA_MODEL_DEFAULT_SPEED_KMPH
+        self.default_road_factor = road_factor or settings.ETA_MODEL_ROAD_FACTOR
+        self.min_samples = settings.ETA_MODEL_MIN_SAMPLES if min_samples is None else min_samples
+        # (zone, hour) / hour -> [road km, hours, trips]
+        self._zone_speeds: Dict[Tuple[Tuple[int, int], int], List[float]] = {}
+        self._hour_speeds: Dict[int, List[float]] = {}
+        self._road_factors: Dict[Tuple[int, int], float] = {}
+        # Recently estimated pairs: what recalibration asks Maps about
+        self._recent: deque = deque(maxlen=settings.ETA_MODEL_RECALIBRATION_PAIRS * 4)
+
+    @property
+    def trips(self) -> int:
+        return int(sum(bucket[2] for bucket in self._hour_speeds.values()))
+
+    def zone(self, lat: float, lon: float) -> Tuple[int, int]:
+        return round(lat / self.zone_degrees), round(lon / self.zone_degrees)
+
+    def _trip_zone(self, origin: LatLng, destination: LatLng) -> Tuple[int, int]:
+        return self.zone((origin[0] + destination[0]) / 2, (origin[1] + destination[1]) / 2)
+
+    def road_factor(self, zone: Tuple[int, int]) -> float:
+        return self._road_factors.get(zone, self.default_road_factor)
+
+    def speed_kmph(self, zone: Tuple[int, int], hour: int) -> float:
+        """Learned road speed for a zone and hour, falling back to the hour city-wide, then the default."""
+        for bucket in (self._zone_speeds.get((zone, hour)), self._hour_speeds.get(hour)):
+            if bucket and bucket[2] >= self.min_samples:
+                return bucket[0] / bucket[1]
+        return self.default_speed_kmph
+
+    def estimate(self, lat1: float, lon1: float, lat2: float, lon2: float, at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Distance and ETA for one leg, same shape as TrackingService.eta_from_coords.
+        Hours are UTC, like the training timestamps; `at` defaults to now.
+        """
+        origin, destination = (lat1, lon1), (lat2, lon2)
+        zone = self._trip_zone(origin, destination)
+        road_km = calculate_distance(lat1, lon1, lat2, lon2) * self.road_factor(zone)
+        speed = self.speed_kmph(zone, (_timestamp(at) if at else datetime.utcnow()).hour)
+        self._recent.append((origin, destination))
+        return {
+            "distance_km": round(road_km, 2),
+            "eta_min": max(1, int(road_km / speed * 60)),
+            "source": "eta_model",
+        }
+
+    # ----------------------------------------------------------
+    # Learning
+    # ----------------------------------------------------------
+    def observe(self, origin: LatLng, destination: LatLng, duration_min: float, at: datetime) -> bool:
+        """Add one completed leg to the speed table. Returns False if it was discarded as implausible."""
+        if not MIN_TRIP_MINUTES <= duration_min <= MAX_TRIP_MINUTES:
+            return False
+        zone = self._trip_zone(origin, destination)
+        road_km = calculate_distance(*origin, *destination) * self.road_factor(zone)
+        hours = duration_min / 60
+        if not MIN_SPEED_KMPH <= road_km / hours <= MAX_SPEED_KMPH:
+            return False
+
+        for table, key in ((self._zone_speeds, (zone, at.hour)), (self._hour_speeds, at.hour)):
+            bucket = table.setdefault(key, [0.0, 0.0, 0])
+            bucket[0] += road_km
+            bucket[1] += hours
+            bucket[2] += 1
+        return True
+
+    def fit(self, trips: Iterable[Trip]) -> int:
+        """Rebuild the speed table from (origin, destination, picked_up, delivered) legs."""
+        self._zone_speeds, self._hour_speeds = {}, {}
+        return sum(
+            self.observe(origin, destination, (end - start).total_seconds() / 60, start)
+            for origin, destination, start, end in trips
+        )
+
+    async def load(self, session_factory=None, limit: Optional[int] = None) -> int:
+        """
+        Fit on the most recent delivered orders. Returns the number of legs used;
+        on failure the current table (defaults, if never loaded) stays in place.
+        """
+        from ..core.database import AsyncSessionLocal
+        from ..models.database import Order, OrderStatus, Restaurant
+
+        session_factory = session_factory or AsyncSessionLocal
+        try:
+            async with session_factory() as db:
+                result = await db.execute(
+                    select(Order.timeline, Order.delivery_address, Restaurant.address)
+                    .join(Restaurant, Order.restaurant_id == Restaurant.id)
+                    .where(
+                        Order.status.in_([OrderStatus.DELIVERED, OrderStatus.COMPLETED]),
+                        Order.timeline.is_not(None),
+                    )
+                    .order_by(Order.id.desc())
+                    .limit(limit or settings.ETA_MODEL_TRAINING_ORDERS)
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.warning(f"[EtaModel] Not trained, using default speeds: {e}")
+            return 0
+
+        trips = [trip for trip in (trip_from_timeline(*row) for row in rows) if trip]
+        used = self.fit(trips)
+        logger.info(f"[EtaModel] Trained on {used} of {len(rows)} delivered orders")
+        return used
+
+    async def recalibrate(self, maps=None, limit: Optional[int] = None) -> int:
+        """
+        Ask Google Maps about recently estimated pairs (one batched request) and
+        fold the answers into the zone road factors and the speed table.
+        Returns the number of pairs that came back.
+        """
+        pairs = list(dict.fromkeys(self._recent))[-(limit or settings.ETA_MODEL_RECALIBRATION_PAIRS):]
+        if not pairs:
+            return 0
+        if maps is None:
+            from .maps_service import get_maps_service
+            maps = get_maps_service()
+
+        results = await maps.calculate_etas(pairs)
+        now = datetime.utcnow()
+        updated = 0
+        for (origin, destination), result in zip(pairs, results):
+            straight_km = calculate_distance(*origin, *destination)
+            if not result or straight_km < 0.1:
+                continue
+            zone = self._trip_zone(origin, destination)
+            ratio = min(MAX_ROAD_FACTOR, max(MIN_ROAD_FACTOR, result["distance_km"] / straight_km))
+            self._road_factors[zone] = (1 - ROAD_FACTOR_ALPHA) * self.road_factor(zone) + ROAD_FACTOR_ALPHA * ratio
+            self.observe(origin, destination, result["duration_min"], now)
+            updated += 1
+        self._recent.clear()
+        logger.info(f"[EtaModel] Recalibrated against Google Maps with {updated}/{len(pairs)} pairs")
+        return updated
+
+
+_eta_model: Optional[EtaModel] = None
+
+
+def get_eta_model() -> EtaModel:
+    """Process-wide model shared by TrackingService."""
+    global _eta_model
+    if _eta_model is None:
+        _eta_model = EtaModel()
+    return _eta_model
+
+
+async def run_recalibration(model: Optional[EtaModel] = None, interval: Optional[float] = None):
+    """Background loop: recalibrate against Google Maps every ETA_MODEL_RECALIBRATE_SECONDS."""
+    model = model or get_eta_model()
+    interval = interval or settings.ETA_MODEL_RECALIBRATE_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await model.recalibrate()
+        except Exception as e:
+            logger.error(f"[EtaModel] Recalibration failed: {e}")
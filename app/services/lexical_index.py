@@ -0,0 +1,211 @@
+"""
+app/services/lexical_index.py
+
+In-process lexical index over menu items
+----------------------------------------
+- BM25 over name and description tokens; name tokens count NAME_BOOST times
+- Query words missing from the vocabulary are matched to the closest
+  vocabulary word by trigram similarity ("peperoni" -> "pepperoni"),
+  so transcription slips still hit
+- search() also returns a confidence in [0, 1]: the share of the query's
+  IDF weight that the best item covers, discounted by fuzzy similarity.
+  VectorService answers from here when confidence is high and falls back
+  to Qdrant otherwise
+- Each term's BM25 weights are compiled into NumPy arrays on first query
+  and reused until the index changes, so a query costs a few vector adds
+"""
+
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .menu_catalog import tokenize
+
+# Filler words in spoken orders that say nothing about the dish
+STOP_WORDS = frozenset({
+    "a", "an", "and", "the", "with", "of", "i", "id", "me", "my", "some", "want", "would", "like",
+    "please", "can", "get", "have", "order", "to", "for", "one", "give", "need",
+})
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LexicalIndex:
+    """BM25 + trigram fuzzy matching over item name/description. Thread-safe."""
+
+    K1 = 1.2
+    B = 0.75
+    NAME_BOOST = 2
+    MIN_FUZZY_SIMILARITY = 0.5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[Hashable, Dict[str, Any]] = {}
+        # doc_id <-> dense slot in the score vector; freed slots are reused
+        self._slots: Dict[Hashable, int] = {}
+        self._slot_ids: List[Optional[Hashable]] = []
+        self._free_slots: List[int] = []
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_len: Dict[Hashable, int] = {}
+        self._total_len = 0
+        # term -> {doc_id: weighted term frequency}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        # trigram -> vocabulary terms containing it; term -> its trigram count
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        # term -> (slots, BM25 weights); cleared on every change (avg length moves)
+        self._compiled: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: Hashable, item: Dict[str, Any]):
+        """Index (or re-index) an item by its name and description."""
+        terms = Counter()
+        for token in tokenize(item.get("name") or ""):
+            terms[token] += self.NAME_BOOST
+        for token in tokenize(item.get("description") or ""):
+            terms[token] += 1
+        for token in STOP_WORDS & terms.keys():
+            del terms[token]
+
+        with self._lock:
+            self._remove(doc_id)
+            self._compiled.clear()
+            self._docs[doc_id] = item
+            slot = self._free_slots.pop() if self._free_slots else len(self._slot_ids)
+            if slot == len(self._slot_ids):
+                self._slot_ids.append(doc_id)
+            else:
+                self._slot_ids[slot] = doc_id
+            self._slots[doc_id] = slot
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = length = sum(terms.values())
+            self._total_len += length
+            for term, tf in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    grams = trigrams(term)
+                    self._gram_counts[term] = len(grams)
+                    for gram in grams:
+                        self._trigrams.setdefault(gram, set()).add(term)
+                postings[doc_id] = tf
+
+    def remove(self, doc_id: Hashable):
+        with self._lock:
+            self._remove(doc_id)
+            self._compiled.clear()
+
+    def clear(self):
+        with self._lock:
+            for table in (self._docs, self._slots, self._slot_ids, self._free_slots, self._doc_terms,
+                          self._doc_len, self._postings, self._trigrams, self._gram_counts, self._compiled):
+                table.clear()
+            self._total_len = 0
+
+    # ----------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------
+    def search(self, query: str, top_k: int = 5) -> Tuple[List[Tuple[Hashable, float, Dict[str, Any]]], float]:
+        """
+        Returns ([(doc_id, bm25_score, item)], confidence), best first.
+        Confidence is 0 when nothing matched.
+        """
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return [], 0.0
+
+            # Each query word -> (vocabulary term, similarity), or None if nothing close
+            matched: List[Tuple[Optional[str], float]] = []
+            for token in dict.fromkeys(tokenize(query)):
+                if token not in STOP_WORDS:
+                    matched.append(self._resolve(token))
+            if not matched:
+                return [], 0.0
+
+            scores = None
+            for term, similarity in matched:
+                if term is None:
+                    continue
+                if scores is None:
+                    scores = np.zeros(len(self._slot_ids))
+                slots, weights = self._weights(term, n)
+                scores[slots] += weights if similarity == 1.0 else similarity * weights
+            if scores is None:
+                return [], 0.0
+
+            k = min(top_k, int(np.count_nonzero(scores)))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            best = sorted(((self._slot_ids[slot], float(scores[slot])) for slot in top if scores[slot] > 0),
+                          key=lambda entry: -entry[1])
+            top_terms = self._doc_terms[best[0][0]]
+            # Words that matched nothing weigh as much as the rarest term
+            max_idf = self._idf(1, n)
+            total = covered = 0.0
+            for term, similarity in matched:
+                idf = self._idf(len(self._postings[term]), n) if term else max_idf
+                total += idf
+                if term in top_terms:
+                    covered += idf * similarity
+            return [(doc_id, score, self._docs[doc_id]) for doc_id, score in best], covered / total
+
+    @staticmethod
+    def _idf(df: int, n: int) -> float:
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _weights(self, term: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        compiled = self._compiled.get(term)
+        if compiled is None:
+            postings = self._postings[term]
+            slots = np.fromiter((self._slots[doc_id] for doc_id in postings), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            lengths = np.fromiter((self._doc_len[doc_id] for doc_id in postings), dtype=np.float64, count=len(postings))
+            norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * lengths * n / self._total_len))
+            compiled = self._compiled[term] = (slots, self._idf(len(postings), n) * norm)
+        return compiled
+
+    def _resolve(self, token: str) -> Tuple[Optional[str], float]:
+        if token in self._postings:
+            return token, 1.0
+        if token.endswith("s") and token[:-1] in self._postings:
+            return token[:-1], 1.0
+
+        grams = trigrams(token)
+        shared: Counter = Counter()
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] += 1
+        best, best_similarity = None, 0.0
+        for term, count in shared.items():
+            similarity = count / (len(grams) + self._gram_counts[term] - count)  # Jaccard over trigram sets
+            if similarity > best_similarity:
+                best, best_similarity = term, similarity
+        if best_similarity < self.MIN_FUZZY_SIMILARITY:
+            return None, 0.0
+        return best, best_similarity
+
+    def _remove(self, doc_id: Hashable):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        del self._docs[doc_id]
+        slot = self._slots.pop(doc_id)
+        self._slot_ids[slot] = None
+        self._free_slots.append(slot)
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._gram_counts[term]
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
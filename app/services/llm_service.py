@@ -191,38 +191,351 @@
 
 
 # app/services/llm_service.py
+import json
+import random
+import asyncio
 import logging
-import openai
-from typing import Optional
+from typing import Dict, List, Optional, Any, AsyncGenerator
+
+import httpx
+
+from ..core.config import settings
+from ..core.http_client import get_http_client, get_limiter
 
 logger = logging.getLogger(__name__)
 
+# Worth another attempt: timeouts, rate limiting, provider overload
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+class LLMProviderError(Exception):
+    """Raised when every configured provider failed."""
+
+
 class LLMService:
     """
-    Simple wrapper for conversational reply generation.
-    Uses OpenAI chat completion (gpt-4o-mini/gpt-4) — swap as needed.
+    Async LLM wrapper with a primary (Anthropic Claude) and fallback (OpenAI) provider.
+    - One shared keep-alive pool per provider; at most LLM_MAX_CONCURRENCY calls in flight
+    - Connect/read timeouts, retries with full-jitter exponential backoff per provider
+    - Providers without an API key are skipped
     """
-    def __init__(self, api_key: Optional[str] = None):
-        from ..core.config import settings
-        self.api_key = api_key or settings.OPENAI_API_KEY
-        openai.api_key = self.api_key
 
-        # model selection can be a setting
-        self.model = "gpt-4o-mini" if self.api_key else "gpt-3.5-turbo"
+    def __init__(self, api_key: str = None, provider: Optional[str] = None):
+        self.api_keys = {
+            "anthropic": settings.ANTHROPIC_API_KEY,
+            "openai": api_key or settings.OPENAI_API_KEY,
+        }
+        primary = provider or settings.LLM_PRIMARY_PROVIDER
+        fallback = settings.LLM_FALLBACK_PROVIDER
+        self.providers = [p for p in dict.fromkeys([primary, fallback]) if p in self.api_keys and self.api_keys[p]]
 
     async def generate_reply(self, prompt: str) -> str:
+        """Short conversational reply for the voice pipeline."""
         try:
-            # Use synchronous call inside async wrapper for simplicity
-            resp = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{"role":"system","content":"You are a helpful food-delivery voice assistant."},
-                          {"role":"user","content": prompt}],
+            response = await self.generate_response(
+                messages=[{"role": "system", "content": "You are a helpful food-delivery voice assistant."},
+                          {"role": "user", "content": prompt}],
                 max_tokens=200,
                 temperature=0.2,
             )
-            text = resp["choices"][0]["message"]["content"].strip()
+            text = response["content"].strip()
             logger.debug(f"LLM reply: {text[:120]}")
             return text
         except Exception as e:
             logger.exception(f"LLM generation error: {e}")
             return "Sorry — I'm having trouble responding right now."
+
+    async def stream_reply(self, prompt: str) -> AsyncGenerator[str, None]:
+        """Streaming counterpart of generate_reply: yields text deltas as the model produces them."""
+        started = False
+        try:
+            async for delta in self.stream_response(
+                messages=[{"role": "system", "content": "You are a helpful food-delivery voice assistant."},
+                          {"role": "user", "content": prompt}],
+                max_tokens=200,
+                temperature=0.2,
+            ):
+                started = True
+                yield delta
+        except Exception as e:
+            logger.exception(f"LLM streaming error: {e}")
+            if not started:
+                yield "Sorry — I'm having trouble responding right now."
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1000
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream text deltas, primary provider first. Falls back only if the primary fails
+        before producing any text; a stream that breaks midway raises instead.
+        """
+        if not self.providers:
+            raise LLMProviderError("No LLM provider configured")
+
+        for provider in self.providers:
+            started = False
+            try:
+                if provider == "anthropic":
+                    deltas = self._stream_anthropic(messages, model, temperature, max_tokens)
+                else:
+                    deltas = self._stream_openai(messages, model, temperature, max_tokens)
+                async for delta in deltas:
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning(f"LLM provider {provider} failed to stream: {e}")
+
+        raise LLMProviderError("All LLM providers failed")
+
+    async def generate_response(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict] = None,
+        tool_choice: Any = None,
+        model: str = None,
+        temperature: float = 0.3,
+        max_tokens: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Try the primary provider, then the fallback.
+        Returns a dict with keys: 'content' (str) and 'tool_calls' (list of {id, name, arguments}).
+        """
+        if not self.providers:
+            raise LLMProviderError("No LLM provider configured")
+
+        for provider in self.providers:
+            try:
+                if provider == "anthropic":
+                    return await self._call_anthropic(messages, tools, tool_choice, model, temperature, max_tokens)
+                return await self._call_openai(messages, tools, tool_choice, model, temperature, max_tokens)
+            except Exception as e:
+                logger.warning(f"LLM provider {provider} failed: {e}")
+
+        raise LLMProviderError("All LLM providers failed")
+
+    # ----------------------------------------------------------
+    # Transport
+    # ----------------------------------------------------------
+    def _client(self, provider: str) -> httpx.AsyncClient:
+        base_url = settings.ANTHROPIC_API_URL if provider == "anthropic" else settings.OPENAI_API_URL
+        return get_http_client(
+            f"llm-{provider}",
+            base_url=base_url,
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+            max_connections=settings.LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+        )
+
+    async def _post(self, provider: str, path: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        client = self._client(provider)
+        limiter = get_limiter("llm", settings.LLM_MAX_CONCURRENCY)
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            last_attempt = attempt == settings.LLM_MAX_RETRIES
+            try:
+                async with limiter:
+                    resp = await client.post(path, json=payload, headers=headers)
+                if resp.status_code in RETRYABLE_STATUS and not last_attempt:
+                    logger.info(f"{provider} returned {resp.status_code}; retrying")
+                else:
+                    resp.raise_for_status()
+                    return resp.json()
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last_attempt:
+                    raise
+                logger.info(f"{provider} request failed ({e!r}); retrying")
+
+            # Back off outside the limiter so waiting retries don't hold a slot
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def _stream_events(self, provider: str, path: str, payload: Dict[str, Any], headers: Dict[str, str]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        POST with stream=true and yield parsed server-sent `data:` events.
+        Retries like _post, but only until the first event has been yielded.
+        The concurrency slot is held for the whole stream.
+        """
+        client = self._client(provider)
+        limiter = get_limiter("llm", settings.LLM_MAX_CONCURRENCY)
+        yielded = False
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            last_attempt = attempt == settings.LLM_MAX_RETRIES
+            try:
+                async with limiter:
+                    async with client.stream("POST", path, json={**payload, "stream": True}, headers=headers) as resp:
+                        if resp.status_code not in RETRYABLE_STATUS or last_attempt:
+                            resp.raise_for_status()
+                            async for line in resp.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    return
+                                yielded = True
+                                yield json.loads(data)
+                            return
+                logger.info(f"{provider} returned {resp.status_code}; retrying stream")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last_attempt or yielded:
+                    raise
+                logger.info(f"{provider} stream failed ({e!r}); retrying")
+
+            await asyncio.sleep(self._backoff(attempt))
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]."""
+        return random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+    # ----------------------------------------------------------
+    # Providers
+    # ----------------------------------------------------------
+    def _anthropic_headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_keys["anthropic"], "anthropic-version": ANTHROPIC_VERSION}
+
+    @staticmethod
+    def _anthropic_payload(messages, model, temperature, max_tokens) -> Dict[str, Any]:
+        """Anthropic takes the system prompt separately and has no 'tool' role."""
+        system_message = None
+        conversation_messages = []
+        for msg in messages:
+            if msg.get("role") == "system":
+                system_message = msg.get("content")
+            elif msg.get("role") == "tool":
+                conversation_messages.append({"role": "user", "content": f"Result of {msg.get('name')}: {msg.get('content')}"})
+            else:
+                conversation_messages.append({"role": msg["role"], "content": msg.get("content", "")})
+
+        payload: Dict[str, Any] = {
+            "model": model or settings.ANTHROPIC_MODEL,
+            "messages": conversation_messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if system_message:
+            payload["system"] = system_message
+        return payload
+
+    @staticmethod
+    def _openai_messages(messages) -> List[Dict[str, Any]]:
+        """
+        OpenAI only accepts a 'tool' message that answers a tool_call_id from a
+        preceding assistant 'tool_calls' message. Agent histories keep tool results
+        without that assistant turn, so orphaned results become plain context,
+        as in _anthropic_payload.
+        """
+        converted = []
+        open_calls = set()
+        for msg in messages:
+            if msg.get("role") == "assistant" and msg.get("tool_calls"):
+                open_calls.update(call.get("id") for call in msg["tool_calls"])
+                converted.append(msg)
+            elif msg.get("role") == "tool":
+                if msg.get("tool_call_id") in open_calls:
+                    converted.append({"role": "tool", "tool_call_id": msg["tool_call_id"], "content": str(msg.get("content", ""))})
+                else:
+                    converted.append({"role": "user", "content": f"Result of {msg.get('name')}: {msg.get('content')}"})
+            else:
+                converted.append(msg)
+        return converted
+
+    async def _stream_anthropic(self, messages, model, temperature, max_tokens) -> AsyncGenerator[str, None]:
+        payload = self._anthropic_payload(messages, model, temperature, max_tokens)
+        async for event in self._stream_events("anthropic", "/v1/messages", payload, self._anthropic_headers()):
+            if event.get("type") == "content_block_delta" and event.get("delta", {}).get("type") == "text_delta":
+                yield event["delta"]["text"]
+            elif event.get("type") == "error":
+                raise LLMProviderError(f"Anthropic stream error: {event.get('error')}")
+
+    async def _stream_openai(self, messages, model, temperature, max_tokens) -> AsyncGenerator[str, None]:
+        payload = {
+            "model": model or settings.OPENAI_MODEL,
+            "messages": self._openai_messages(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        headers = {"Authorization": f"Bearer {self.api_keys['openai']}"}
+        async for event in self._stream_events("openai", "/v1/chat/completions", payload, headers):
+            choices = event.get("choices") or []
+            if choices and choices[0].get("delta", {}).get("content"):
+                yield choices[0]["delta"]["content"]
+
+    async def _call_anthropic(self, messages, tools, tool_choice, model, temperature, max_tokens) -> Dict[str, Any]:
+        """Call Anthropic Messages API."""
+        payload = self._anthropic_payload(messages, model, temperature, max_tokens)
+        if tools:
+            payload["tools"] = [
+                {
+                    "name": tool["name"],
+                    "description": tool.get("description", ""),
+                    "input_schema": tool.get("parameters") or {"type": "object", "properties": {}},
+                }
+                for tool in tools
+            ]
+            if tool_choice:
+                payload["tool_choice"] = {"type": tool_choice} if isinstance(tool_choice, str) else tool_choice
+
+        response = await self._post("anthropic", "/v1/messages", payload, self._anthropic_headers())
+
+        result = {"content": "", "tool_calls": []}
+        for block in response.get("content", []):
+            if block.get("type") == "text":
+                result["content"] += block.get("text", "")
+            elif block.get("type") == "tool_use":
+                result["tool_calls"].append({
+                    "id": block.get("id"),
+                    "name": block.get("name"),
+                    "arguments": block.get("input") or {},
+                })
+        return result
+
+    async def _call_openai(self, messages, tools, tool_choice, model, temperature, max_tokens) -> Dict[str, Any]:
+        """Call OpenAI Chat Completions API."""
+        payload: Dict[str, Any] = {
+            "model": model or settings.OPENAI_MODEL,
+            "messages": self._openai_messages(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if tools:
+            payload["tools"] = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": tool["name"],
+                        "description": tool.get("description", ""),
+                        "parameters": tool.get("parameters") or {"type": "object", "properties": {}},
+                    },
+                }
+                for tool in tools
+            ]
+            if tool_choice:
+                payload["tool_choice"] = tool_choice
+
+        response = await self._post("openai", "/v1/chat/completions", payload, {
+            "Authorization": f"Bearer {self.api_keys['openai']}",
+        })
+
+        message = response["choices"][0]["message"]
+        result = {"content": message.get("content") or "", "tool_calls": []}
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function", {})
+            try:
+                arguments = json.loads(function.get("arguments") or "{}")
+            except json.JSONDecodeError:
+                # Keep the raw string; the tool call will report the bad arguments
+                arguments = function.get("arguments")
+            result["tool_calls"].append({
+                "id": tool_call.get("id"),
+                "name": function.get("name"),
+                "arguments": arguments,
+            })
+        return result
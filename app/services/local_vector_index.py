@@ -0,0 +1,153 @@
+"""
+app/services/local_vector_index.py
+
+In-process vector index for menu search
+---------------------------------------
+- Flat (exact) cosine search over int8-quantized vectors: each unit vector
+  is stored as round(v * 127) plus its inverse norm, 4x smaller than float32
+- Built from the same points VectorService upserts into Qdrant, so results
+  carry the same ids and payloads
+- Snapshotted to a directory (codes.npy, inv_norms.npy, points.json); a
+  loaded snapshot is memory-mapped read-only and copied on first write
+- Scores come from one einsum over the int8 codes, which casts in small
+  buffers instead of materializing a float32 copy of the matrix
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CODES_FILE = "codes.npy"
+INV_NORMS_FILE = "inv_norms.npy"
+POINTS_FILE = "points.json"
+
+
+class LocalVectorIndex:
+    """int8 flat index with Qdrant-shaped results. Thread-safe."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._codes = np.empty((0, dim), dtype=np.int8)
+        self._inv_norms = np.empty(0, dtype=np.float32)
+        self._ids: List[Hashable] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[Hashable, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def payload(self, point_id: Hashable) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(point_id)
+        return None if row is None else self._payloads[row]
+
+    def payloads(self):
+        """(id, payload) for every point."""
+        return list(zip(self._ids, self._payloads))
+
+    def upsert(self, ids: Sequence[Hashable], vectors, payloads: Sequence[Dict[str, Any]]):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        units = vectors / np.where(norms == 0, 1, norms)
+        codes = np.clip(np.rint(units * 127), -127, 127).astype(np.int8)
+        code_norms = np.linalg.norm(codes.astype(np.float32), axis=1)
+        inv_norms = np.where(code_norms == 0, 0, 1 / np.where(code_norms == 0, 1, code_norms)).astype(np.float32)
+
+        with self._lock:
+            new = sum(1 for pid in dict.fromkeys(ids) if pid not in self._rows)
+            self._reserve(self._size + new)
+            for pid, code, inv_norm, payload in zip(ids, codes, inv_norms, payloads):
+                row = self._rows.get(pid)
+                if row is None:
+                    row = self._rows[pid] = self._size
+                    self._size += 1
+                    self._ids.append(pid)
+                    self._payloads.append(payload)
+                else:
+                    self._payloads[row] = payload
+                self._codes[row] = code
+                self._inv_norms[row] = inv_norm
+
+    def search(self, vector, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k by cosine similarity: [{"id", "score", "payload"}], best first."""
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        query_norm = np.linalg.norm(query)
+        if query_norm:
+            query = query / query_norm
+
+        with self._lock:
+            n = self._size
+            if not n or top_k <= 0:
+                return []
+            scores = np.einsum("ij,j->i", self._codes[:n], query, dtype=np.float32, casting="unsafe")
+            scores *= self._inv_norms[:n]
+
+            k = min(top_k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                {"id": self._ids[row], "score": float(scores[row]), "payload": self._payloads[row]}
+                for row in top
+            ]
+
+    # ----------------------------------------------------------
+    # Snapshots
+    # ----------------------------------------------------------
+    def save(self, directory: str):
+        """Write a snapshot; each file is replaced atomically, points.json last."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            n = self._size
+            arrays = {CODES_FILE: self._codes[:n], INV_NORMS_FILE: self._inv_norms[:n]}
+            points = {"dim": self.dim, "ids": self._ids[:n], "payloads": self._payloads[:n]}
+            for name, array in arrays.items():
+                tmp = os.path.join(directory, f".{name}.tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp, os.path.join(directory, name))
+            tmp = os.path.join(directory, f".{POINTS_FILE}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(points, f)
+            os.replace(tmp, os.path.join(directory, POINTS_FILE))
+        logger.info(f"[LocalVectorIndex] Snapshot of {n} points written to {directory}")
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["LocalVectorIndex"]:
+        """Memory-map a snapshot; None if there is none (or it doesn't match its arrays)."""
+        try:
+            with open(os.path.join(directory, POINTS_FILE), encoding="utf-8") as f:
+                points = json.load(f)
+            codes = np.load(os.path.join(directory, CODES_FILE), mmap_mode="r")
+            inv_norms = np.load(os.path.join(directory, INV_NORMS_FILE), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        n = len(points["ids"])
+        if codes.shape != (n, points["dim"]) or inv_norms.shape != (n,):
+            logger.warning(f"[LocalVectorIndex] Ignoring inconsistent snapshot in {directory}")
+            return None
+
+        index = cls(points["dim"])
+        index._codes, index._inv_norms = codes, inv_norms
+        index._ids, index._payloads = points["ids"], points["payloads"]
+        index._rows = {pid: row for row, pid in enumerate(index._ids)}
+        index._size = n
+        return index
+
+    def _reserve(self, rows: int):
+        """Room for `rows` rows in writable arrays (copies a memory-mapped snapshot once)."""
+        writable = isinstance(self._codes, np.ndarray) and not isinstance(self._codes, np.memmap)
+        if writable and rows <= len(self._codes):
+            return
+        capacity = max(rows, 2 * len(self._codes), 64) if rows > len(self._codes) else len(self._codes)
+        codes = np.zeros((capacity, self.dim), dtype=np.int8)
+        inv_norms = np.zeros(capacity, dtype=np.float32)
+        codes[:self._size] = self._codes[:self._size]
+        inv_norms[:self._size] = self._inv_norms[:self._size]
+        self._codes, self._inv_norms = codes, inv_norms
@@ -9,74 +9,124 @@ Handles:
 ✅ ETA & distance calculations using live data
 ✅ Route optimization for drivers
 
+- Async REST calls over the shared "google_maps" connection pool, bounded
+  by MAPS_MAX_CONCURRENCY
+- Geocodes cached by normalized address for MAPS_GEOCODE_TTL_SECONDS
+- ETAs cached per (origin cell, destination cell) for MAPS_ETA_TTL_SECONDS;
+  cells are MAPS_ETA_CELL_DEGREES wide (~200 m)
+- calculate_etas() batches uncached pairs into distance_matrix requests
+- Identical concurrent lookups share one request
+
 Requires:
 - GOOGLE_MAPS_API_KEY in .env
 """
 
-import googlemaps
-from typing import Tuple, Dict, List, Optional
-from datetime import datetime
+import asyncio
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.http_client import get_http_client, get_limiter
+
+logger = logging.getLogger(__name__)
+
+LatLng = Tuple[float, float]
+
+
+class MapsError(Exception):
+    """Google Maps returned an error status."""
+
+
+def normalize_address(address: str) -> str:
+    """Cache key for an address: case, punctuation spacing and repeated whitespace don't matter."""
+    return " ".join(re.sub(r"[,.;]", " ", address.lower()).split())
+
+
+def _latlng(point: LatLng) -> str:
+    return f"{point[0]:.6f},{point[1]:.6f}"
+
+
+def _element(element: Dict[str, Any]) -> Optional[Dict]:
+    if element.get("status") != "OK":
+        return None
+    return {
+        "distance_km": round(element["distance"]["value"] / 1000, 2),
+        "duration_min": round(element["duration"]["value"] / 60, 1),
+        "text_summary": element["duration"]["text"],
+    }
 
 
 class MapsService:
     """
     Service for interacting with Google Maps APIs.
+    Caches and in-flight requests are shared by every instance in the process.
     """
 
-    def __init__(self):
-        try:
-            self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-        except Exception as e:
-            raise RuntimeError(f"[MapsService] Failed to initialize: {e}")
+    # distance_matrix limits per request
+    MAX_MATRIX_SIDE = 25
+    MAX_MATRIX_ELEMENTS = 100
+
+    geocode_cache = TTLCache(settings.MAPS_GEOCODE_CACHE_SIZE, settings.MAPS_GEOCODE_TTL_SECONDS)
+    eta_cache = TTLCache(settings.MAPS_ETA_CACHE_SIZE, settings.MAPS_ETA_TTL_SECONDS)
+    _inflight: Dict[Hashable, asyncio.Future] = {}
+    _fetches: Set[asyncio.Task] = set()
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
 
     # ----------------------------------------------------------
     # Address Verification (Geocoding)
     # ----------------------------------------------------------
-    def verify_address(self, address: str) -> Optional[Dict]:
+    async def verify_address(self, address: str) -> Optional[Dict]:
         """
         Verify and normalize a customer-provided address string.
 
         Returns:
             dict with formatted_address, latitude, longitude
         """
-        try:
-            results = self.client.geocode(address)
-            if not results:
-                return None
+        key = normalize_address(address)
+        if not key:
+            return None
 
-            loc = results[0]["geometry"]["location"]
+        async def fetch():
+            data = await self._get("/maps/api/geocode/json", {"address": address})
+            if not data or not data.get("results"):
+                return None
+            result = data["results"][0]
+            loc = result["geometry"]["location"]
             return {
-                "formatted_address": results[0]["formatted_address"],
+                "formatted_address": result["formatted_address"],
                 "latitude": loc["lat"],
                 "longitude": loc["lng"],
             }
-        except Exception as e:
-            print(f"[MapsService] Address verification failed: {e}")
-            return None
+
+        return await self._cached(self.geocode_cache, ("geocode", key), fetch)
 
     # ----------------------------------------------------------
     # Reverse Geocoding
     # ----------------------------------------------------------
-    def reverse_geocode(self, lat: float, lng: float) -> Optional[str]:
+    async def reverse_geocode(self, lat: float, lng: float) -> Optional[str]:
         """
         Convert coordinates into a human-readable address.
         """
-        try:
-            results = self.client.reverse_geocode((lat, lng))
-            if results:
-                return results[0]["formatted_address"]
-        except Exception as e:
-            print(f"[MapsService] Reverse geocode failed: {e}")
-        return None
+        async def fetch():
+            data = await self._get("/maps/api/geocode/json", {"latlng": _latlng((lat, lng))})
+            if data and data.get("results"):
+                return data["results"][0]["formatted_address"]
+            return None
+
+        # ~1 m resolution: the same spot always resolves to the same address
+        return await self._cached(self.geocode_cache, ("reverse", round(lat, 5), round(lng, 5)), fetch)
 
     # ----------------------------------------------------------
     # Distance & ETA Calculation
     # ----------------------------------------------------------
-    def calculate_eta(
+    async def calculate_eta(
         self,
-        origin: Tuple[float, float],
-        destination: Tuple[float, float],
+        origin: LatLng,
+        destination: LatLng,
         mode: str = "driving",
     ) -> Optional[Dict]:
         """
@@ -90,66 +140,194 @@ class MapsService:
         Returns:
             dict with distance_km, duration_min, text_summary
         """
-        try:
-            matrix = self.client.distance_matrix(
-                origins=[origin],
-                destinations=[destination],
-                mode=mode,
-                departure_time=datetime.now(),
-            )
-
-            element = matrix["rows"][0]["elements"][0]
-            if element["status"] != "OK":
-                return None
+        return (await self.calculate_etas([(origin, destination)], mode))[0]
 
-            distance_m = element["distance"]["value"]
-            duration_s = element["duration"]["value"]
+    async def calculate_etas(
+        self,
+        pairs: Sequence[Tuple[LatLng, LatLng]],
+        mode: str = "driving",
+    ) -> List[Optional[Dict]]:
+        """
+        ETAs for many (origin, destination) pairs, in order.
+        Pairs whose cells are cached are answered locally; the rest are sent
+        as distance_matrix requests over their unique origins x destinations.
+        """
+        keys = [self._eta_key(origin, destination, mode) for origin, destination in pairs]
+        found = {key: self.eta_cache.get(key) for key in keys}
+        missing = {}
+        for key, pair in zip(keys, pairs):
+            if found[key] is None and key not in missing:
+                missing[key] = pair
 
-            return {
-                "distance_km": round(distance_m / 1000, 2),
-                "duration_min": round(duration_s / 60, 1),
-                "text_summary": element["duration"]["text"],
-            }
+        if missing:
+            pending = self._pending(self.eta_cache, list(missing), lambda: self._distance_matrix(list(missing.values()), mode))
+            for key, eta in zip(missing, await pending):
+                found[key] = eta
 
-        except Exception as e:
-            print(f"[MapsService] ETA calculation failed: {e}")
-            return None
+        return [dict(found[key]) if found[key] else None for key in keys]
 
     # ----------------------------------------------------------
     # Route Optimization
     # ----------------------------------------------------------
-    def get_optimal_route(
+    async def get_optimal_route(
         self,
-        origin: Tuple[float, float],
-        destination: Tuple[float, float],
-        waypoints: Optional[List[Tuple[float, float]]] = None,
+        origin: LatLng,
+        destination: LatLng,
+        waypoints: Optional[List[LatLng]] = None,
     ) -> Optional[Dict]:
         """
         Returns the optimal route and summary info.
         """
-        try:
-            directions = self.client.directions(
-                origin=origin,
-                destination=destination,
-                waypoints=waypoints,
-                mode="driving",
-                optimize_waypoints=True,
-                departure_time=datetime.now(),
-            )
-
-            if not directions:
-                return None
+        params = {
+            "origin": _latlng(origin),
+            "destination": _latlng(destination),
+            "mode": "driving",
+            "departure_time": "now",
+        }
+        if waypoints:
+            params["waypoints"] = "optimize:true|" + "|".join(_latlng(point) for point in waypoints)
 
-            leg = directions[0]["legs"][0]
-            distance_m = leg["distance"]["value"]
-            duration_s = leg["duration"]["value"]
+        try:
+            directions = await self._get("/maps/api/directions/json", params)
+        except Exception as e:
+            logger.error(f"[MapsService] Route optimization failed: {e}")
+            return None
+        if not directions or not directions.get("routes"):
+            return None
 
-            return {
-                "distance_km": round(distance_m / 1000, 2),
-                "duration_min": round(duration_s / 60, 1),
-                "polyline": directions[0]["overview_polyline"]["points"],
-            }
+        route = directions["routes"][0]
+        leg = route["legs"][0]
+        return {
+            "distance_km": round(leg["distance"]["value"] / 1000, 2),
+            "duration_min": round(leg["duration"]["value"] / 60, 1),
+            "polyline": route["overview_polyline"]["points"],
+        }
 
-        except Exception as e:
-            print(f"[MapsService] Route optimization failed: {e}")
+    # ----------------------------------------------------------
+    # Internal helpers
+    # ----------------------------------------------------------
+    async def _get(self, path: str, params: Dict[str, Any]) -> Optional[Dict]:
+        if not self.api_key:
+            logger.warning("[MapsService] GOOGLE_MAPS_API_KEY not configured")
             return None
+
+        client = get_http_client(
+            "google_maps",
+            base_url=settings.GOOGLE_MAPS_API_URL,
+            timeout=settings.MAPS_TIMEOUT_SECONDS,
+        )
+        async with get_limiter("google_maps", settings.MAPS_MAX_CONCURRENCY):
+            response = await client.get(path, params={**params, "key": self.api_key})
+        response.raise_for_status()
+
+        data = response.json()
+        if data.get("status") not in ("OK", "ZERO_RESULTS"):
+            raise MapsError(f"{path}: {data.get('status')} {data.get('error_message', '')}".strip())
+        return data
+
+    async def _cached(self, cache: TTLCache, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        value = cache.get(key)
+        if value is None:
+            value = (await self._pending(cache, [key], fetch))[0]
+        return dict(value) if isinstance(value, dict) else value
+
+    def _pending(self, cache: TTLCache, keys: List[Hashable], fetch: Callable[[], Awaitable[Any]]):
+        """
+        Share in-flight lookups: one request per key, however many callers await it.
+        `fetch` returns one value per key as a list (or a single value for a single key);
+        values are cached as they arrive. Failures resolve to None and are not cached.
+        Returns an awaitable of the values, in key order. The request runs as its own
+        task, so a caller that is cancelled (e.g. the call hung up) only stops waiting;
+        the others still get the result.
+        """
+        loop = asyncio.get_running_loop()
+        waiting = [MapsService._inflight.get(key) for key in keys]
+        if all(future is not None and future.get_loop() is loop for future in waiting):
+            return asyncio.gather(*[asyncio.shield(future) for future in waiting])
+
+        futures = [loop.create_future() for _ in keys]
+        for key, future in zip(keys, futures):
+            MapsService._inflight[key] = future
+
+        async def run():
+            try:
+                result = await fetch()
+            except Exception as e:
+                logger.error(f"[MapsService] Request failed: {e}")
+                result = None
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                for key, future in zip(keys, futures):
+                    if MapsService._inflight.get(key) is future:
+                        del MapsService._inflight[key]
+
+            values = result if isinstance(result, list) else [result] * len(keys)
+            for key, future, value in zip(keys, futures, values):
+                if value is not None:
+                    cache.set(key, value)
+                future.set_result(value)
+            return values
+
+        task = loop.create_task(run())
+        MapsService._fetches.add(task)
+        task.add_done_callback(MapsService._fetches.discard)
+        return asyncio.shield(task)
+
+    @staticmethod
+    def _eta_key(origin: LatLng, destination: LatLng, mode: str) -> Tuple:
+        cell = settings.MAPS_ETA_CELL_DEGREES
+        return (
+            mode,
+            round(origin[0] / cell), round(origin[1] / cell),
+            round(destination[0] / cell), round(destination[1] / cell),
+        )
+
+    async def _distance_matrix(self, pairs: List[Tuple[LatLng, LatLng]], mode: str) -> List[Optional[Dict]]:
+        """One element per pair, fetched in as few distance_matrix requests as Google's limits allow."""
+        origins = list(dict.fromkeys(origin for origin, _ in pairs))
+        destinations = list(dict.fromkeys(destination for _, destination in pairs))
+        wanted = set(pairs)
+
+        dest_chunk = min(len(destinations), self.MAX_MATRIX_SIDE,
+                         max(1, self.MAX_MATRIX_ELEMENTS // min(len(origins), self.MAX_MATRIX_SIDE)))
+        origin_chunk = min(len(origins), self.MAX_MATRIX_SIDE, self.MAX_MATRIX_ELEMENTS // dest_chunk)
+        blocks = []
+        for i in range(0, len(origins), origin_chunk):
+            for j in range(0, len(destinations), dest_chunk):
+                block_origins = origins[i:i + origin_chunk]
+                block_destinations = destinations[j:j + dest_chunk]
+                # Skip blocks that contain none of the requested pairs
+                if any((o, d) in wanted for o in block_origins for d in block_destinations):
+                    blocks.append((block_origins, block_destinations))
+
+        elements: Dict[Tuple[LatLng, LatLng], Optional[Dict]] = {}
+
+        async def fetch(block_origins, block_destinations):
+            data = await self._get("/maps/api/distancematrix/json", {
+                "origins": "|".join(_latlng(o) for o in block_origins),
+                "destinations": "|".join(_latlng(d) for d in block_destinations),
+                "mode": mode,
+                "departure_time": "now",
+            })
+            if not data:
+                return
+            for origin, row in zip(block_origins, data["rows"]):
+                for destination, element in zip(block_destinations, row["elements"]):
+                    elements[(origin, destination)] = _element(element)
+
+        await asyncio.gather(*[fetch(o, d) for o, d in blocks])
+        return [elements.get(pair) for pair in pairs]
+
+
+_maps_service: Optional[MapsService] = None
+
+
+def get_maps_service() -> MapsService:
+    """Process-wide MapsService (it holds no per-request state)."""
+    global _maps_service
+    if _maps_service is None:
+        _maps_service = MapsService()
+    return _maps_service
@@ -0,0 +1,247 @@
+"""
+app/services/menu_catalog.py
+
+Precompiled menu catalog for the voice ordering flow
+----------------------------------------------------
+- Built once per menu version (static default or the `menu_items` table)
+- Read-only: categories and items are MappingProxyType views
+- Inverted index from spoken tokens/aliases to (category_key, item_key),
+  so resolving an item from speech is a handful of dict lookups
+"""
+
+import re
+import logging
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple, List
+
+from sqlalchemy import event
+
+from ..core.config import settings
+from ..models.database import MenuItem
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_IGNORED_TOKENS = frozenset({"and", "the", "with", "a", "of"})
+# Generic dish words that say nothing about which item in a category was meant
+_GENERIC_NAME_WORDS = frozenset({"pizza", "burger", "roll", "pasta"})
+
+DEFAULT_MENU: Dict[str, Dict[str, Any]] = {
+    "pizza": {
+        "name": "Pizza",
+        "items": {
+            "margherita": {"name": "Margherita Pizza", "price": 1599, "description": "Fresh tomatoes, mozzarella, basil"},
+            "pepperoni": {"name": "Pepperoni Pizza", "price": 1799, "description": "Pepperoni, mozzarella, tomato sauce"},
+            "veggie": {"name": "Veggie Supreme", "price": 1699, "description": "Bell peppers, mushrooms, onions, olives"},
+            "bbq": {"name": "BBQ Chicken Pizza", "price": 1899, "description": "Grilled chicken, BBQ sauce, red onions"},
+            "hawaiian": {"name": "Hawaiian Pizza", "price": 1749, "description": "Ham, pineapple, mozzarella"},
+            "meat": {"name": "Meat Lovers", "price": 1999, "description": "Pepperoni, sausage, ham, bacon"}
+        }
+    },
+    "burger": {
+        "name": "Burgers",
+        "items": {
+            "classic": {"name": "Classic Burger", "price": 1299, "description": "Beef patty, lettuce, tomato, onion"},
+            "cheese": {"name": "Cheese Burger", "price": 1399, "description": "Beef patty with melted cheese"},
+            "bacon": {"name": "Bacon Burger", "price": 1499, "description": "Beef patty with crispy bacon"},
+            "chicken": {"name": "Chicken Burger", "price": 1399, "description": "Grilled chicken breast with mayo"},
+            "veggie": {"name": "Veggie Burger", "price": 1199, "description": "Plant-based patty with fresh veggies"},
+            "double": {"name": "Double Cheese Burger", "price": 1699, "description": "Two beef patties with double cheese"}
+        }
+    },
+    "pasta": {
+        "name": "Pasta",
+        "items": {
+            "spaghetti": {"name": "Spaghetti Carbonara", "price": 1499, "description": "Spaghetti with bacon, eggs, parmesan"},
+            "fettuccine": {"name": "Fettuccine Alfredo", "price": 1599, "description": "Fettuccine with creamy alfredo sauce"},
+            "lasagna": {"name": "Beef Lasagna", "price": 1699, "description": "Layered pasta with beef and cheese"},
+            "penne": {"name": "Penne Arrabbiata", "price": 1399, "description": "Penne with spicy tomato sauce"},
+            "ravioli": {"name": "Cheese Ravioli", "price": 1599, "description": "Cheese-filled ravioli with marinara"},
+            "mac": {"name": "Mac & Cheese", "price": 1299, "description": "Creamy macaroni and cheese"}
+        }
+    },
+    "sushi": {
+        "name": "Sushi",
+        "items": {
+            "california": {"name": "California Roll", "price": 1899, "description": "Crab, avocado, cucumber"},
+            "philadelphia": {"name": "Philadelphia Roll", "price": 1999, "description": "Smoked salmon, cream cheese"},
+            "dragon": {"name": "Dragon Roll", "price": 2199, "description": "Eel, avocado, cucumber"},
+            "rainbow": {"name": "Rainbow Roll", "price": 2299, "description": "Assorted fish with avocado"},
+            "spicy": {"name": "Spicy Tuna Roll", "price": 1799, "description": "Spicy tuna with cucumber"},
+            "salmon": {"name": "Salmon Nigiri", "price": 1699, "description": "Fresh salmon over rice"}
+        }
+    }
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens from a speech transcript."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def short_name(item_name: str) -> str:
+    """Item name without the generic dish word, e.g. 'Margherita Pizza' -> 'Margherita'."""
+    return item_name.replace(" Pizza", "").replace(" Burger", "").replace(" Roll", "").replace(" Pasta", "")
+
+
+class MenuCatalog:
+    """Immutable, pre-indexed view of the menu."""
+
+    # Score for a token that names the item (its key or short name) vs. one that only appears in its full name
+    KEY_TOKEN_WEIGHT = 2
+    NAME_TOKEN_WEIGHT = 1
+
+    def __init__(self, categories: Dict[str, Dict[str, Any]]):
+        frozen_categories = {}
+        self._category_aliases: Dict[str, str] = {}
+        # token -> {(category_key, item_key): weight}
+        self._item_index: Dict[str, Dict[Tuple[str, str], int]] = {}
+        self._item_order: Dict[Tuple[str, str], int] = {}
+        self._options: Dict[str, str] = {}
+        self._options_with_prices: Dict[str, str] = {}
+
+        for category_key, category in categories.items():
+            items = {
+                item_key: MappingProxyType(dict(item_data))
+                for item_key, item_data in category["items"].items()
+            }
+            frozen_categories[category_key] = MappingProxyType({
+                "name": category["name"],
+                "items": MappingProxyType(items),
+            })
+
+            for alias in {category_key, f"{category_key}s", *tokenize(category["name"])}:
+                self._category_aliases.setdefault(alias, category_key)
+
+            for item_key, item_data in items.items():
+                ref = (category_key, item_key)
+                self._item_order[ref] = len(self._item_order)
+                key_tokens = set(tokenize(item_key)) | set(tokenize(short_name(item_data["name"])))
+                name_tokens = set(tokenize(item_data["name"]))
+                for token in name_tokens | key_tokens:
+                    if token in _IGNORED_TOKENS:
+                        continue
+                    weight = self.KEY_TOKEN_WEIGHT if token in key_tokens and token not in _GENERIC_NAME_WORDS else self.NAME_TOKEN_WEIGHT
+                    self._item_index.setdefault(token, {})[ref] = weight
+
+            self._options[category_key] = ", ".join(short_name(item["name"]) for item in items.values())
+            self._options_with_prices[category_key] = ", ".join(
+                f"{short_name(item['name'])} for ${item['price']/100:.2f}" for item in items.values()
+            )
+
+        self.categories = MappingProxyType(frozen_categories)
+
+    # ----------------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------------
+    def get_category(self, category_key: str):
+        return self.categories[category_key]
+
+    def options(self, category_key: str, with_prices: bool = False) -> str:
+        """Pre-rendered, speech-friendly list of a category's items."""
+        if with_prices:
+            return self._options_with_prices[category_key]
+        return self._options[category_key]
+
+    def match_category(self, speech: str) -> Optional[str]:
+        """Return the first category named in the speech, if any."""
+        for token in tokenize(speech):
+            category_key = self._category_aliases.get(token)
+            if category_key:
+                return category_key
+        return None
+
+    def match_item(self, speech: str, category_key: Optional[str] = None) -> Optional[Tuple[str, str, Any]]:
+        """
+        Resolve spoken words to a menu item.
+        Returns (category_key, item_key, item) for the best-scoring item, restricted
+        to `category_key` when given. Ties go to the item listed first in the menu.
+        """
+        scores: Dict[Tuple[str, str], int] = {}
+        for token in set(tokenize(speech)):
+            postings = self._item_index.get(token)
+            if postings is None and token.endswith("s"):
+                postings = self._item_index.get(token[:-1])
+            if not postings:
+                continue
+            for ref, weight in postings.items():
+                if category_key is None or ref[0] == category_key:
+                    scores[ref] = scores.get(ref, 0) + weight
+
+        if not scores:
+            return None
+
+        best = min(scores, key=lambda ref: (-scores[ref], self._item_order[ref]))
+        return best[0], best[1], self.categories[best[0]]["items"][best[1]]
+
+    # ----------------------------------------------------------
+    # Construction from the database
+    # ----------------------------------------------------------
+    @classmethod
+    def from_menu_items(cls, menu_items) -> "MenuCatalog":
+        """Build a catalog from MenuItem rows (price stored in currency units)."""
+        categories: Dict[str, Dict[str, Any]] = {}
+        for row in menu_items:
+            if not row.is_available:
+                continue
+            category_key = (row.category or "other").lower()
+            category = categories.setdefault(
+                category_key, {"name": (row.category or "Other").title(), "items": {}}
+            )
+            tokens = [t for t in tokenize(row.name) if t not in _GENERIC_NAME_WORDS] or tokenize(row.name) or [str(row.id)]
+            item_key = tokens[0]
+            if item_key in category["items"]:
+                item_key = "_".join(tokens) if "_".join(tokens) not in category["items"] else f"{item_key}_{row.id}"
+            category["items"][item_key] = {
+                "id": row.id,
+                "name": row.name,
+                "price": int(round((row.price or 0) * 100)),
+                "description": row.description or "",
+            }
+        return cls(categories)
+
+
+# --------------------------------------------------------------
+# Module-level catalog
+# --------------------------------------------------------------
+_catalog = MenuCatalog(DEFAULT_MENU)
+_stale = settings.MENU_SOURCE == "database"
+
+
+def get_menu_catalog() -> MenuCatalog:
+    """Return the current catalog, reloading from the database if the menu changed."""
+    if _stale:
+        refresh_menu_catalog()
+    return _catalog
+
+
+def refresh_menu_catalog(db=None) -> MenuCatalog:
+    """Rebuild the catalog from the menu_items table and swap it in atomically."""
+    global _catalog, _stale
+    from ..core.database import SessionLocal
+
+    session = db or SessionLocal()
+    try:
+        catalog = MenuCatalog.from_menu_items(session.query(MenuItem).all())
+        if catalog.categories:
+            _catalog = catalog
+        else:
+            logger.warning("menu_items table is empty; keeping the current menu catalog")
+    except Exception as e:
+        logger.error(f"Failed to refresh menu catalog: {e}")
+    finally:
+        # Don't retry on every speech turn after a failure; the next menu change re-arms the reload
+        _stale = False
+        if db is None:
+            session.close()
+    return _catalog
+
+
+def _mark_stale(*_args):
+    global _stale
+    if settings.MENU_SOURCE == "database":
+        _stale = True
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(MenuItem, _event_name, _mark_stale)
@@ -94,10 +94,20 @@
 
 # app/services/payment_service.py
 import os
+import asyncio
+import hashlib
 import logging
 from typing import Dict, Any, Optional
+import httpx
 import stripe
+from sqlalchemy import select
+from ..core.cache import TTLCache
 from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.http_client import get_http_client, get_limiter
+from ..models.database import Order, OrderStatus
+from .llm_service import RETRYABLE_STATUS, LLMService
+from .webhook_queue import register_webhook_handler
 
 logger = logging.getLogger(__name__)
 
@@ -109,7 +119,50 @@ else:
     logger.warning("❌ Stripe API key not configured - using simulation mode")
     stripe.api_key = "sk_test_mock_key_for_development"  # Mock key to avoid errors
 
+
+def _intent_params(amount_cents: int, currency: str, customer_id: Optional[str], metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "amount": int(amount_cents),
+        "currency": currency.lower(),
+        "payment_method_types": ["card"],
+        "customer": customer_id,
+        "metadata": metadata,
+    }
+
+
+def session_idempotency_key(session_id: str, amount_cents: int, currency: str = "usd", customer_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Idempotency key for a session's PaymentIntent, over every request parameter.
+    A retried turn sends the same parameters and gets the same key (so Stripe returns
+    the same intent); a changed cart or delivery address gets a new intent rather than
+    a stale one (or Stripe's 400 for a reused key).
+    """
+    encoded = sorted(_form_encode(_intent_params(amount_cents, currency, customer_id, metadata)).items())
+    digest = hashlib.sha256(f"{session_id}:{encoded}".encode()).hexdigest()[:24]
+    return f"pi_{digest}"
+
+
+def _form_encode(params: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+    """Flatten params into Stripe's form encoding: metadata[k]=v, payment_method_types[0]=card."""
+    encoded: Dict[str, str] = {}
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, dict):
+            encoded.update(_form_encode(value, name))
+        elif isinstance(value, (list, tuple)):
+            encoded.update(_form_encode(dict(enumerate(value)), name))
+        elif isinstance(value, bool):
+            encoded[name] = "true" if value else "false"
+        elif value is not None:
+            encoded[name] = str(value)
+    return encoded
+
+
 class PaymentService:
+    # Intents created (or replayed) per idempotency key, and creations in flight
+    intent_cache = TTLCache(settings.STRIPE_INTENT_CACHE_SIZE, settings.STRIPE_IDEMPOTENCY_TTL_SECONDS)
+    _inflight: Dict[str, asyncio.Future] = {}
+
     @staticmethod
     def create_payment_intent(amount_cents: int, currency: str = "usd", customer_id: Optional[str]=None, metadata: Dict[str, Any]=None, idempotency_key: Optional[str]=None) -> Dict[str, Any]:
         """
@@ -257,4 +310,141 @@ class PaymentService:
             return {"success": False, "error": "invalid_signature"}
         except Exception as e:
             logger.exception("Error handling stripe webhook")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+
+    # PaymentIntent event -> payment status recorded on the order
+    WEBHOOK_PAYMENT_STATUS = {
+        "payment_intent.succeeded": "succeeded",
+        "payment_intent.payment_failed": "failed",
+        "payment_intent.canceled": "canceled",
+    }
+
+    @staticmethod
+    async def apply_webhook_event(event: Dict[str, Any]):
+        """
+        Webhook queue handler: record a PaymentIntent's outcome on the orders whose
+        payment_info["payment_intent_id"] is that intent (the payment_info that
+        customer_tools.place_order builds); a paid order is confirmed.
+        """
+        status = PaymentService.WEBHOOK_PAYMENT_STATUS.get(event["type"])
+        if status is None:
+            return
+        intent_id = event["object_id"]
+        async with AsyncSessionLocal() as db:
+            orders = (await db.execute(
+                select(Order).where(Order.payment_info["payment_intent_id"].as_string() == intent_id)
+            )).scalars().all()
+            for order in orders:
+                order.payment_info = {**order.payment_info, "status": status}
+                if status == "succeeded" and order.status in (OrderStatus.CART, OrderStatus.PLACED):
+                    order.status = OrderStatus.CONFIRMED
+            await db.commit()
+        logger.info(f"PaymentIntent {intent_id} {status}: {len(orders)} order(s) updated")
+
+    # ----------------------------------------------------------
+    # Async API (shared "stripe" connection pool)
+    # ----------------------------------------------------------
+    @staticmethod
+    def _simulation_mode() -> bool:
+        return not settings.STRIPE_API_KEY or settings.STRIPE_API_KEY.startswith("sk_test_mock")
+
+    @staticmethod
+    async def create_payment_intent_async(amount_cents: int, currency: str = "usd", customer_id: Optional[str] = None, metadata: Dict[str, Any] = None, idempotency_key: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a PaymentIntent without blocking the event loop.
+        With a session_id (and no explicit key) the idempotency key is derived from it,
+        so a retried turn gets the intent already created for that session.
+        """
+        if not idempotency_key and session_id:
+            idempotency_key = session_idempotency_key(session_id, amount_cents, currency, customer_id, metadata)
+        if PaymentService._simulation_mode():
+            return PaymentService.create_payment_intent(amount_cents, currency, customer_id, metadata, idempotency_key)
+        if not idempotency_key:
+            return await PaymentService._post_payment_intent(amount_cents, currency, customer_id, metadata, None)
+
+        cached = PaymentService.intent_cache.get(idempotency_key)
+        if cached is not None:
+            return {"success": True, "payment_intent": cached}
+        task = PaymentService._inflight.get(idempotency_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                PaymentService._post_payment_intent(amount_cents, currency, customer_id, metadata, idempotency_key)
+            )
+            PaymentService._inflight[idempotency_key] = task
+            task.add_done_callback(lambda _: PaymentService._inflight.pop(idempotency_key, None))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _post_payment_intent(amount_cents: int, currency: str, customer_id: Optional[str], metadata: Optional[Dict[str, Any]], idempotency_key: Optional[str]) -> Dict[str, Any]:
+        params = _intent_params(amount_cents, currency, customer_id, metadata)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+        try:
+            resp = await PaymentService._stripe_request("POST", "/v1/payment_intents", data=_form_encode(params), headers=headers)
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            logger.error(f"Stripe unreachable creating payment intent: {e!r}")
+            return {"success": False, "error": str(e)}
+
+        if resp.status_code == 401:
+            logger.error("❌ Stripe authentication failed")
+            # Fallback to simulation
+            return PaymentService._create_mock_payment_intent(amount_cents, currency, metadata)
+        body = resp.json()
+        if resp.is_error:
+            error = body.get("error", {}).get("message") or f"Stripe returned {resp.status_code}"
+            logger.error(f"Error creating payment intent: {error}")
+            return {"success": False, "error": error}
+
+        if idempotency_key:
+            PaymentService.intent_cache.set(idempotency_key, body)
+        replayed = resp.headers.get("Idempotent-Replayed") == "true"
+        logger.info(f"✅ {'Reused' if replayed else 'Created'} PaymentIntent {body['id']} for amount {amount_cents} {currency}")
+        return {"success": True, "payment_intent": body}
+
+    @staticmethod
+    async def confirm_payment_async(payment_intent_id: str) -> Dict[str, Any]:
+        """confirm_payment without blocking the event loop."""
+        if payment_intent_id.startswith("pi_mock"):
+            return PaymentService.confirm_payment(payment_intent_id)
+        try:
+            resp = await PaymentService._stripe_request("GET", f"/v1/payment_intents/{payment_intent_id}")
+            body = resp.json()
+            if resp.is_error:
+                return {"success": False, "error": body.get("error", {}).get("message") or f"Stripe returned {resp.status_code}"}
+            return {"success": True, "status": body["status"], "amount": body["amount"], "currency": body["currency"]}
+        except Exception as e:
+            logger.error(f"Error confirming payment: {e}")
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    async def _stripe_request(method: str, path: str, data: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        Stripe REST call over the shared pool. 409/429/5xx and transport errors are retried
+        with the same Idempotency-Key, which Stripe replays instead of creating a duplicate.
+        Returns the last response; raises the transport error if every attempt failed.
+        """
+        client = get_http_client(
+            "stripe",
+            base_url=settings.STRIPE_API_URL,
+            timeout=settings.STRIPE_TIMEOUT_SECONDS,
+            max_connections=settings.STRIPE_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.STRIPE_MAX_CONCURRENCY,
+        )
+        limiter = get_limiter("stripe", settings.STRIPE_MAX_CONCURRENCY)
+        headers = {"Authorization": f"Bearer {settings.STRIPE_API_KEY}", **(headers or {})}
+
+        for attempt in range(settings.STRIPE_MAX_RETRIES + 1):
+            last_attempt = attempt == settings.STRIPE_MAX_RETRIES
+            try:
+                async with limiter:
+                    resp = await client.request(method, path, data=data, headers=headers)
+                if resp.status_code not in RETRYABLE_STATUS or last_attempt:
+                    return resp
+                logger.info(f"Stripe returned {resp.status_code}; retrying")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last_attempt:
+                    raise
+                logger.info(f"Stripe request failed ({e!r}); retrying")
+            await asyncio.sleep(LLMService._backoff(attempt))
+
+
+register_webhook_handler("stripe", PaymentService.apply_webhook_event)
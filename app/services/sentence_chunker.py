@@ -0,0 +1,67 @@
+"""
+app/services/sentence_chunker.py
+
+Clause chunking for streamed LLM text
+-------------------------------------
+- Accumulates token deltas and emits each completed sentence/clause so TTS
+  can start speaking while the model is still generating
+- A boundary is terminal punctuation (. ! ? । …) followed by whitespace, so
+  prices like "$15.99" and known abbreviations don't split
+- Softer breaks (, ; :) only split once the clause is long enough to be
+  worth a separate synthesis request
+"""
+
+import re
+from typing import AsyncIterator, List, Optional
+
+_HARD_BREAK = re.compile(r"[.!?।…]+[\"')\]]*\s")
+_SOFT_BREAK = re.compile(r"[,;:]\s")
+_ABBREVIATIONS = frozenset({"mr", "mrs", "ms", "dr", "st", "no", "vs", "etc", "approx", "e.g", "i.e"})
+
+
+class SentenceChunker:
+    def __init__(self, min_clause_chars: int = 40):
+        # Shortest text emitted at a soft break; hard breaks always emit
+        self.min_clause_chars = min_clause_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a text delta; return the clauses it completed (possibly none)."""
+        self._buffer += delta
+        clauses = []
+        while True:
+            end = self._next_boundary()
+            if end is None:
+                return clauses
+            clause = self._buffer[:end].strip()
+            self._buffer = self._buffer[end:]
+            if clause:
+                clauses.append(clause)
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the stream ends."""
+        clause, self._buffer = self._buffer.strip(), ""
+        return clause or None
+
+    def _next_boundary(self) -> Optional[int]:
+        for match in _HARD_BREAK.finditer(self._buffer):
+            words = self._buffer[:match.start()].split()
+            if words and words[-1].lower().rstrip(".") in _ABBREVIATIONS:
+                continue
+            return match.end()
+
+        for match in _SOFT_BREAK.finditer(self._buffer):
+            if match.start() >= self.min_clause_chars:
+                return match.end()
+        return None
+
+
+async def chunk_sentences(deltas: AsyncIterator[str], min_clause_chars: int = 40) -> AsyncIterator[str]:
+    """Turn a stream of token deltas into a stream of speakable clauses."""
+    chunker = SentenceChunker(min_clause_chars)
+    async for delta in deltas:
+        for clause in chunker.feed(delta):
+            yield clause
+    tail = chunker.flush()
+    if tail:
+        yield tail
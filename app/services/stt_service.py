@@ -221,28 +221,46 @@ import logging
 import asyncio
 import websockets
 import json
-from typing import Optional, Callable, AsyncGenerator
+from typing import Optional, Callable, AsyncGenerator, Dict, Any
 import base64
 
+from ..core.config import settings
+from ..core.http_client import get_http_client, get_limiter
+
 logger = logging.getLogger(__name__)
 
+PRERECORDED_PARAMS = {
+    "model": "nova-2",
+    "punctuate": "true",
+    "numerals": "true",
+    "endpointing": "500"
+}
+
 class STTService:
     """Real-time streaming STT using Deepgram's WebSocket API"""
     
-    def __init__(self, api_key: str = None):
-        from ..core.config import settings
+    def __init__(self, api_key: str = None, prerecorded_url: str = None):
         self.api_key = api_key or settings.DEEPGRAM_API_KEY
         self.websocket_url = "wss://api.deepgram.com/v1/listen"
+        self.prerecorded_url = prerecorded_url or settings.DEEPGRAM_API_URL
+        self.timeout = settings.DEEPGRAM_TIMEOUT_SECONDS
         
-    async def transcribe_stream(self, audio_generator: AsyncGenerator[bytes, None]) -> AsyncGenerator[str, None]:
-        """Real-time streaming transcription"""
-        
+    async def stream_results(self, audio_generator: AsyncGenerator[bytes, None]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        One Deepgram streaming session for the lifetime of `audio_generator`.
+        Yields every transcript result as {"text", "is_final", "speech_final", "confidence"}
+        (interim hypotheses included) until the generator is exhausted and Deepgram closes.
+        """
+
         headers = {
             "Authorization": f"Token {self.api_key}",
         }
-        
+
         params = {
             "model": "nova-2",
+            "encoding": settings.DEEPGRAM_STREAM_ENCODING,
+            "sample_rate": str(settings.DEEPGRAM_STREAM_SAMPLE_RATE),
+            "channels": "1",
             "interim_results": "true",
             "endpointing": "500",  # End utterance after 500ms silence
             "vad_events": "true",  # Voice activity detection
@@ -250,83 +268,124 @@ class STTService:
             "numerals": "true",
             "utterance_end_ms": "1000"  # End utterance after 1s silence
         }
-        
+
         query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         url = f"{self.websocket_url}?{query_string}"
-        
+
         try:
             async with websockets.connect(url, extra_headers=headers) as websocket:
                 logger.info("Deepgram WebSocket connected")
-                
+
                 # Start audio sending task
                 async def send_audio():
                     async for audio_chunk in audio_generator:
                         if audio_chunk:
                             await websocket.send(audio_chunk)
                     await websocket.send(json.dumps({"type": "CloseStream"}))
-                
+
                 send_task = asyncio.create_task(send_audio())
-                
-                # Receive transcriptions
-                async for message in websocket:
-                    data = json.loads(message)
-                    
-                    # Handle transcription results
-                    if data.get("type") == "Results":
-                        channel = data.get("channel", {})
-                        alternatives = channel.get("alternatives", [])
-                        
-                        if alternatives:
+
+                try:
+                    # Receive transcriptions
+                    async for message in websocket:
+                        data = json.loads(message)
+
+                        # Handle transcription results
+                        if data.get("type") == "Results":
+                            alternatives = data.get("channel", {}).get("alternatives", [])
+                            if not alternatives:
+                                continue
                             transcript = alternatives[0].get("transcript", "").strip()
-                            is_final = alternatives[0].get("confidence", 0) > 0.8
-                            
-                            if transcript and is_final:
-                                logger.debug(f"Final transcript: {transcript}")
-                                yield transcript
-                
-                await send_task
-                
+                            if transcript:
+                                yield {
+                                    "text": transcript,
+                                    "is_final": bool(data.get("is_final")),
+                                    "speech_final": bool(data.get("speech_final")),
+                                    "confidence": alternatives[0].get("confidence", 0),
+                                }
+
+                    await send_task
+                finally:
+                    send_task.cancel()
+
         except Exception as e:
             logger.error(f"Deepgram WebSocket error: {e}")
             raise
 
-    def transcribe_bytes(self, audio_bytes: bytes, mimetype: str = "audio/wav") -> Optional[str]:
-        """Fallback for single audio chunks"""
-        import requests
-        
+    async def transcribe_stream(self, audio_generator: AsyncGenerator[bytes, None]) -> AsyncGenerator[str, None]:
+        """Real-time streaming transcription (final transcripts only)"""
+        async for result in self.stream_results(audio_generator):
+            if result["is_final"]:
+                logger.debug(f"Final transcript: {result['text']}")
+                yield result["text"]
+
+    def _prerecorded_request(self, mimetype: str):
         headers = {
             "Authorization": f"Token {self.api_key}",
             "Content-Type": mimetype,
         }
-        
-        params = {
-            "model": "nova-2",
-            "punctuate": "true",
-            "numerals": "true",
-            "endpointing": "500"
-        }
-        
+        return headers, PRERECORDED_PARAMS
+
+    @staticmethod
+    def _extract_transcript(payload: dict) -> Optional[str]:
+        results = payload.get("results", {})
+        channels = results.get("channels", [])
+        if channels:
+            alternatives = channels[0].get("alternatives", [])
+            if alternatives:
+                transcript = alternatives[0].get("transcript", "").strip()
+                logger.debug(f"Deepgram transcript: {transcript}")
+                return transcript
+        return None
+
+    def transcribe_bytes(self, audio_bytes: bytes, mimetype: str = "audio/wav") -> Optional[str]:
+        """Fallback for single audio chunks (blocking; prefer transcribe_bytes_async inside the event loop)"""
+        import requests
+
+        headers, params = self._prerecorded_request(mimetype)
+
         try:
             resp = requests.post(
-                "https://api.deepgram.com/v1/listen", 
-                params=params, 
-                headers=headers, 
-                data=audio_bytes, 
-                timeout=10
+                self.prerecorded_url,
+                params=params,
+                headers=headers,
+                data=audio_bytes,
+                timeout=self.timeout
             )
             resp.raise_for_status()
-            payload = resp.json()
-            
-            results = payload.get("results", {})
-            channels = results.get("channels", [])
-            if channels:
-                alternatives = channels[0].get("alternatives", [])
-                if alternatives:
-                    transcript = alternatives[0].get("transcript", "").strip()
-                    logger.debug(f"Deepgram transcript: {transcript}")
-                    return transcript
+            return self._extract_transcript(resp.json())
+
+        except Exception as e:
+            logger.error(f"Deepgram transcription error: {e}")
+            return None
+
+    async def transcribe_bytes_async(self, audio_bytes: bytes, mimetype: str = "audio/wav") -> Optional[str]:
+        """
+        Non-blocking prerecorded transcription over the shared Deepgram connection pool.
+        At most DEEPGRAM_MAX_CONCURRENCY requests are in flight per process; the
+        deadline covers both the wait for a slot and the request itself.
+        """
+        headers, params = self._prerecorded_request(mimetype)
+        client = get_http_client(
+            "deepgram",
+            timeout=self.timeout,
+            max_connections=settings.DEEPGRAM_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.DEEPGRAM_MAX_CONCURRENCY,
+        )
+        limiter = get_limiter("deepgram", settings.DEEPGRAM_MAX_CONCURRENCY)
+
+        async def _post():
+            async with limiter:
+                return await client.post(self.prerecorded_url, params=params, headers=headers, content=audio_bytes)
+
+        try:
+            resp = await asyncio.wait_for(_post(), timeout=self.timeout)
+            resp.raise_for_status()
+            return self._extract_transcript(resp.json())
+
+        except asyncio.TimeoutError:
+            logger.error(f"Deepgram transcription timed out after {self.timeout}s")
             return None
-            
         except Exception as e:
             logger.error(f"Deepgram transcription error: {e}")
             return None
@@ -1,7 +1,10 @@
 import logging
-from typing import Dict, Any
-from ..tools.driver_tools import calculate_distance
-from .maps_service import MapsService
+from datetime import datetime
+from typing import Dict, Any, Optional
+import numpy as np
+from ..tools.driver_tools import Coordinates, calculate_distance_matrix
+from .eta_model import get_eta_model
+from .maps_service import get_maps_service
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +12,8 @@ logger = logging.getLogger(__name__)
 class TrackingService:
     """
     Tracking helpers to compute ETA and process location updates.
-    Uses Google Maps API when available, falls back to local math.
+    Tracking polls are answered by the offline ETA model; Google Maps is
+    only called when a live answer is explicitly requested.
     """
 
     @staticmethod
@@ -21,31 +25,51 @@ class TrackingService:
         return max(1, minutes)
 
     @staticmethod
-    def eta_from_coords(lat1, lon1, lat2, lon2) -> Dict[str, Any]:
+    def eta_matrix(origins: Coordinates, destinations: Coordinates, avg_speed_kmph: float = 30.0) -> Dict[str, Any]:
         """
-        Compute distance and ETA between two coordinates.
-        Fallback: offline calculation
+        Offline distance and ETA for every origin/destination pair in one
+        vectorized pass (e.g. all nearby drivers to a restaurant).
+        Same rounding as compute_eta; values are (origins x destinations) nested lists.
         """
-        try:
-            maps = MapsService()
-            result = maps.calculate_eta(
-                origin=(lat1, lon1),
-                destination=(lat2, lon2)
-            )
-            if result:
-                return {
-                    "distance_km": result["distance_km"],
-                    "eta_min": result["duration_min"],
-                    "source": "google_maps"
-                }
-        except Exception as e:
-            logger.warning(f"[TrackingService] Google Maps ETA failed: {e}")
-
-        # fallback to offline Haversine
-        distance = calculate_distance(lat1, lon1, lat2, lon2)
-        eta = TrackingService.compute_eta(distance)
+        distances = calculate_distance_matrix(origins, destinations)
+        if avg_speed_kmph <= 0:
+            eta = np.full(distances.shape, 999)
+        else:
+            eta = np.maximum(1, (distances / avg_speed_kmph * 60).astype(np.int64))
         return {
-            "distance_km": round(distance, 2),
-            "eta_min": eta,
+            "distance_km": np.round(distances, 2).tolist(),
+            "eta_min": eta.tolist(),
             "source": "local_fallback"
         }
+
+    @staticmethod
+    def estimate_eta(lat1, lon1, lat2, lon2, at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Distance and ETA from the offline model (learned zone/hour speeds and
+        road factors). No external calls.
+        """
+        return get_eta_model().estimate(lat1, lon1, lat2, lon2, at)
+
+    @staticmethod
+    async def eta_from_coords(lat1, lon1, lat2, lon2, live: bool = False) -> Dict[str, Any]:
+        """
+        Compute distance and ETA between two coordinates.
+        Offline model by default; live=True asks the shared MapsService
+        (and its ETA cache) first, falling back to the model.
+        """
+        if live:
+            try:
+                result = await get_maps_service().calculate_eta(
+                    origin=(lat1, lon1),
+                    destination=(lat2, lon2)
+                )
+                if result:
+                    return {
+                        "distance_km": result["distance_km"],
+                        "eta_min": result["duration_min"],
+                        "source": "google_maps"
+                    }
+            except Exception as e:
+                logger.warning(f"[TrackingService] Google Maps ETA failed: {e}")
+
+        return TrackingService.estimate_eta(lat1, lon1, lat2, lon2)
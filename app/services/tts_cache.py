@@ -0,0 +1,226 @@
+"""
+app/services/tts_cache.py
+
+Phrase-level TTS audio cache
+----------------------------
+- Content-addressed: key = sha256(voice_id, output format, normalized text)
+- Values are final μ-law bytes, ready to stream to Twilio
+- Memory tier: byte-bounded LRU, plus pinned phrases (the pre-rendered
+  prompt bundle) that are never evicted
+- Disk tier: one file per phrase, survives restarts, byte-bounded LRU
+  (file mtime records last use, so the order survives restarts too)
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..monitoring.prometheus_metrics import (
+    TTS_CACHE_HITS,
+    TTS_CACHE_MISSES,
+    TTS_CACHE_EVICTIONS,
+    TTS_CACHE_MEMORY_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def phrase_key(text: str, voice_id: str, output_format: str) -> str:
+    """Stable cache key; whitespace differences don't produce different audio."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{voice_id}\x00{output_format}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk LRU) cache of synthesized phrases, plus pinned phrases. Thread-safe."""
+
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[str] = None, max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir or None
+        self.max_disk_bytes = max_disk_bytes  # 0 = unbounded
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # Outside the LRU and its byte budget
+        self._pinned: Dict[str, bytes] = {}
+        # key -> file size, least recently used first; built from the directory on first use
+        self._disk: "Optional[OrderedDict[str, int]]" = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+    # ----------------------------------------------------------
+    # Public API
+    # ----------------------------------------------------------
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._pinned.get(key)
+            if audio is None:
+                audio = self._memory.get(key)
+                if audio is not None:
+                    self._memory.move_to_end(key)
+            if audio is not None:
+                self._record_hit("memory")
+                return audio
+
+        audio = self._read_disk(key)
+        if audio is not None:
+            self._record_hit("disk")
+            with self._lock:
+                self._store_memory(key, audio)
+            return audio
+
+        with self._lock:
+            self.stats["misses"] += 1
+        TTS_CACHE_MISSES.inc()
+        return None
+
+    def put(self, key: str, audio: bytes):
+        if not audio or key in self._pinned:
+            return
+        with self._lock:
+            self._store_memory(key, audio)
+        self._write_disk(key, audio)
+
+    def pin(self, phrases: Dict[str, bytes]):
+        """Replace the pinned phrases: served from memory until replaced, whatever else is cached."""
+        pinned = {key: audio for key, audio in phrases.items() if audio}
+        with self._lock:
+            self._pinned = pinned
+            for key in pinned:
+                previous = self._memory.pop(key, None)
+                if previous is not None:
+                    self._memory_bytes -= len(previous)
+            TTS_CACHE_MEMORY_BYTES.set(self._memory_bytes)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            TTS_CACHE_MEMORY_BYTES.set(0)
+
+    def __len__(self):
+        return len(self._memory)
+
+    # ----------------------------------------------------------
+    # Memory tier (caller holds the lock)
+    # ----------------------------------------------------------
+    def _store_memory(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+            TTS_CACHE_EVICTIONS.inc()
+        TTS_CACHE_MEMORY_BYTES.set(self._memory_bytes)
+
+    def _record_hit(self, tier: str):
+        self.stats[f"{tier}_hits"] += 1
+        TTS_CACHE_HITS.labels(tier=tier).inc()
+
+    # ----------------------------------------------------------
+    # Disk tier
+    # ----------------------------------------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.ulaw")
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        """Caller holds the lock."""
+        if self._disk is None:
+            entries = []
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if not name.endswith(".ulaw"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-len(".ulaw")], stat.st_size))
+            entries.sort()
+            self._disk = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        # Plain reads: the bytes are promoted to the memory tier anyway, so an
+        # mmap would only be copied out again
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"TTS cache disk read failed for {key}: {e}")
+            return None
+        if not audio:
+            return None
+        with self._lock:
+            index = self._disk_index()
+            if key in index:
+                index.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes):
+        if not self.disk_dir:
+            return
+        if self.max_disk_bytes and len(audio) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache disk write failed for {key}: {e}")
+            return
+
+        with self._lock:
+            index = self._disk_index()
+            self._disk_bytes += len(audio) - index.pop(key, 0)
+            index[key] = len(audio)
+            evicted = []
+            while self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+                old_key, size = index.popitem(last=False)
+                self._disk_bytes -= size
+                self.stats["disk_evictions"] += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+
+_cache: Optional[TTSCache] = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide phrase cache shared by all TTSService instances."""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache(settings.TTS_CACHE_MEMORY_BYTES, settings.TTS_CACHE_DIR, settings.TTS_CACHE_DISK_BYTES)
+    return _cache
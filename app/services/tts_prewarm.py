@@ -0,0 +1,183 @@
+"""
+app/services/tts_prewarm.py
+
+Pre-rendered static voice prompts
+---------------------------------
+- Renders every static LanguageService prompt (no {placeholders}) for
+  English, Hindi and Tamil into μ-law audio with bounded parallelism
+- Writes a versioned bundle: <root>/<version>/audio.ulaw + manifest.json,
+  with <root>/CURRENT naming the active version
+- The version is a hash of (voice, format, text) for every prompt, so
+  editing a translation or switching voices produces a new bundle
+- At boot the active bundle is mmap'd and pinned in the phrase cache, so
+  normal traffic never evicts it
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import string
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+from .language_service import LanguageService, Language
+from .tts_cache import TTSCache, get_tts_cache, phrase_key
+from .tts_service import TTSService
+
+logger = logging.getLogger(__name__)
+
+AUDIO_FILE = "audio.ulaw"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+
+def voice_for(language: Language) -> str:
+    return {
+        Language.ENGLISH: settings.ELEVENLABS_VOICE_EN,
+        Language.HINDI: settings.ELEVENLABS_VOICE_HI,
+        Language.TAMIL: settings.ELEVENLABS_VOICE_TA,
+    }[language]
+
+
+def _is_static(text: str) -> bool:
+    return all(field is None for _, field, _, _ in string.Formatter().parse(text))
+
+
+def static_prompts() -> List[Dict[str, str]]:
+    """Every prompt that can be rendered ahead of time, with the voice it is spoken in."""
+    prompts = []
+    for language, translations in LanguageService.TRANSLATIONS.items():
+        voice_id = voice_for(language)
+        if not voice_id:
+            logger.warning(f"No ElevenLabs voice configured for {language.value}; skipping its prompts")
+            continue
+        for key, text in translations.items():
+            if _is_static(text):
+                prompts.append({"language": language.value, "key": key, "voice_id": voice_id, "text": text})
+    return prompts
+
+
+def bundle_version(prompts: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for prompt in sorted(prompts, key=lambda p: (p["language"], p["key"])):
+        digest.update(phrase_key(prompt["text"], prompt["voice_id"], TTSService.OUTPUT_FORMAT).encode())
+    return digest.hexdigest()[:16]
+
+
+async def build_bundle(
+    root: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    tts: Optional[TTSService] = None,
+) -> Optional[str]:
+    """
+    Render all static prompts and publish them as the CURRENT bundle.
+    Returns the bundle version, or None if nothing could be rendered.
+    An existing bundle for the same version is reused as-is.
+    """
+    root = root or settings.TTS_BUNDLE_DIR
+    tts = tts or TTSService()
+    prompts = static_prompts()
+    if not prompts:
+        logger.warning("No static prompts to pre-render")
+        return None
+
+    version = bundle_version(prompts)
+    bundle_dir = os.path.join(root, version)
+    if not os.path.exists(os.path.join(bundle_dir, MANIFEST_FILE)):
+        limiter = asyncio.Semaphore(concurrency or settings.TTS_PREWARM_CONCURRENCY)
+
+        async def render(prompt):
+            async with limiter:
+                return await asyncio.to_thread(tts.synthesize, prompt["text"], prompt["voice_id"])
+
+        rendered = await asyncio.gather(*[render(p) for p in prompts])
+        failed = [f"{p['language']}:{p['key']}" for p, audio in zip(prompts, rendered) if not audio]
+        if len(failed) == len(prompts):
+            logger.error("TTS pre-warm rendered no prompts; bundle not written")
+            return None
+        if failed:
+            logger.warning(f"TTS pre-warm skipped {len(failed)} prompts: {', '.join(failed)}")
+
+        _write_bundle(bundle_dir, version, prompts, rendered)
+
+    _write_atomic(os.path.join(root, CURRENT_FILE), version.encode())
+    logger.info(f"TTS bundle {version} is current")
+    return version
+
+
+def _write_bundle(bundle_dir: str, version: str, prompts, rendered):
+    os.makedirs(bundle_dir, exist_ok=True)
+    entries, offset = [], 0
+    with open(os.path.join(bundle_dir, AUDIO_FILE), "wb") as f:
+        for prompt, audio in zip(prompts, rendered):
+            if not audio:
+                continue
+            f.write(audio)
+            entries.append({
+                "language": prompt["language"],
+                "key": prompt["key"],
+                "cache_key": phrase_key(prompt["text"], prompt["voice_id"], TTSService.OUTPUT_FORMAT),
+                "offset": offset,
+                "length": len(audio),
+            })
+            offset += len(audio)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "output_format": TTSService.OUTPUT_FORMAT,
+        "entries": entries,
+    }
+    # Manifest last: its presence marks the bundle as complete
+    _write_atomic(os.path.join(bundle_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode())
+
+
+def _write_atomic(path: str, data: bytes):
+    # Unique temp name: replicas sharing the directory must not write into each other's file
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp", delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def load_bundle(root: Optional[str] = None, cache: Optional[TTSCache] = None) -> int:
+    """Pin the CURRENT bundle in the phrase cache. Returns the number of prompts loaded."""
+    root = root or settings.TTS_BUNDLE_DIR
+    cache = cache if cache is not None else get_tts_cache()
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            version = f.read().strip()
+        bundle_dir = os.path.join(root, version)
+        with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"No TTS bundle found in {root}")
+        return 0
+
+    if not manifest["entries"]:
+        return 0
+
+    with open(os.path.join(bundle_dir, AUDIO_FILE), "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            cache.pin({
+                entry["cache_key"]: mapped[entry["offset"]:entry["offset"] + entry["length"]]
+                for entry in manifest["entries"]
+            })
+
+    logger.info(f"Loaded {len(manifest['entries'])} pre-rendered prompts from TTS bundle {version}")
+    return len(manifest["entries"])
+
+
+async def prewarm_on_startup():
+    """Boot hook: load the bundle; optionally render it first when missing or stale."""
+    try:
+        if settings.TTS_PREWARM_ON_STARTUP:
+            await build_bundle()
+        await asyncio.to_thread(load_bundle)
+    except Exception as e:
+        # Never block boot on this; prompts fall back to live synthesis
+        logger.error(f"TTS pre-warm failed: {e}")
@@ -269,29 +269,100 @@
 # app/services/tts_service.py
 import logging
 import requests
-from typing import Optional
+from typing import Optional, AsyncGenerator, List
 from pydub import AudioSegment
 import io
 import audioop  # builtin
+from ..core.config import settings
+from ..core.http_client import get_http_client
+from .tts_cache import get_tts_cache, phrase_key
 logger = logging.getLogger(__name__)
 
+# One Twilio media message: 20 ms of 8 kHz μ-law
+FRAME_BYTES = 160
+ULAW_SILENCE = b"\xff"
+
+
+class UlawFrameEncoder:
+    """
+    Incremental converter from streamed provider audio to fixed 20 ms μ-law frames.
+    source_format: "ulaw_8000" (pass-through) or "pcm_<rate>" (16-bit mono, resampled to 8 kHz).
+    Resampler state is carried across chunks, so arbitrary chunk boundaries are fine.
+    """
+
+    def __init__(self, source_format: str):
+        kind, _, rate = source_format.partition("_")
+        if kind not in ("pcm", "ulaw") or not rate.isdigit() or (kind == "ulaw" and rate != "8000"):
+            raise ValueError(f"Unsupported streaming format: {source_format}")
+        self.passthrough = kind == "ulaw"
+        self.source_rate = int(rate)
+        self._pending_pcm = b""
+        self._ratecv_state = None
+        self._buffer = bytearray()
+        self.audio = bytearray()  # every μ-law byte produced, for the phrase cache
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        if self.passthrough:
+            ulaw = chunk
+        else:
+            pcm = self._pending_pcm + chunk
+            usable = len(pcm) - (len(pcm) % 2)
+            pcm, self._pending_pcm = pcm[:usable], pcm[usable:]
+            if not pcm:
+                return []
+            if self.source_rate != 8000:
+                pcm, self._ratecv_state = audioop.ratecv(pcm, 2, 1, self.source_rate, 8000, self._ratecv_state)
+            ulaw = audioop.lin2ulaw(pcm, 2)
+
+        self.audio += ulaw
+        self._buffer += ulaw
+        frames = []
+        while len(self._buffer) >= FRAME_BYTES:
+            frames.append(bytes(self._buffer[:FRAME_BYTES]))
+            del self._buffer[:FRAME_BYTES]
+        return frames
+
+    def flush(self) -> List[bytes]:
+        """Last partial frame, padded with μ-law silence."""
+        if not self._buffer:
+            return []
+        frame = bytes(self._buffer) + ULAW_SILENCE * (FRAME_BYTES - len(self._buffer))
+        self._buffer.clear()
+        return [frame]
+
+
+def ulaw_frames(audio: bytes) -> List[bytes]:
+    """Split complete μ-law audio into 20 ms frames (last one silence-padded)."""
+    encoder = UlawFrameEncoder("ulaw_8000")
+    return encoder.feed(audio) + encoder.flush()
+
+
 class TTSService:
+    # Everything synthesize() returns: 8 kHz mono μ-law (part of the cache key)
+    OUTPUT_FORMAT = "ulaw_8000"
+
     def __init__(self, api_key: str = None):
-        from ..core.config import settings
         self.api_key = api_key or settings.ELEVENLABS_API_KEY
         self.default_voice = getattr(__import__("os"), "environ").get("ELEVENLABS_VOICE_EN", None)
+        self.cache = get_tts_cache()
 
     def synthesize(self, text: str, voice: Optional[str] = None) -> Optional[bytes]:
-        if not self.api_key:
-            logger.warning("ElevenLabs API key not set; TTS disabled.")
-            return None
-
         voice_id = voice or self.default_voice
         if not voice_id:
             logger.warning("No ElevenLabs voice specified.")
             return None
 
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+        # Repeated prompts: no network call, no MP3 decode
+        cache_key = phrase_key(text, voice_id, self.OUTPUT_FORMAT)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if not self.api_key:
+            logger.warning("ElevenLabs API key not set; TTS disabled.")
+            return None
+
+        url = f"{settings.ELEVENLABS_API_URL}/v1/text-to-speech/{voice_id}"
         headers = {"xi-api-key": self.api_key, "Content-Type": "application/json"}
         payload = {"text": text}
 
@@ -312,8 +383,53 @@ class TTSService:
 
             # ulaw_bytes is what Twilio expects as raw payload (8000Hz, μ-law)
             logger.info(f"TTS produced μ-law bytes: {len(ulaw_bytes)}")
+            self.cache.put(cache_key, ulaw_bytes)
             return ulaw_bytes
 
         except Exception as e:
             logger.exception(f"ElevenLabs TTS error: {e}")
             return None
+
+    async def synthesize_stream(self, text: str, voice: Optional[str] = None) -> AsyncGenerator[bytes, None]:
+        """
+        Stream 20 ms μ-law frames (160 bytes) as ElevenLabs produces audio, so playback can
+        start after the first chunk instead of after the whole utterance is rendered and decoded.
+        Cached phrases are replayed from the cache; completed streams are added to it.
+        """
+        voice_id = voice or self.default_voice
+        if not voice_id:
+            logger.warning("No ElevenLabs voice specified.")
+            return
+
+        cache_key = phrase_key(text, voice_id, self.OUTPUT_FORMAT)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            for frame in ulaw_frames(cached):
+                yield frame
+            return
+
+        if not self.api_key:
+            logger.warning("ElevenLabs API key not set; TTS disabled.")
+            return
+
+        encoder = UlawFrameEncoder(settings.ELEVENLABS_STREAM_FORMAT)
+        client = get_http_client("elevenlabs", timeout=settings.ELEVENLABS_TIMEOUT_SECONDS)
+        url = f"{settings.ELEVENLABS_API_URL}/v1/text-to-speech/{voice_id}/stream"
+        headers = {"xi-api-key": self.api_key, "Content-Type": "application/json"}
+
+        try:
+            async with client.stream(
+                "POST", url, params={"output_format": settings.ELEVENLABS_STREAM_FORMAT},
+                json={"text": text}, headers=headers,
+            ) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.aiter_bytes():
+                    for frame in encoder.feed(chunk):
+                        yield frame
+        except Exception as e:
+            logger.exception(f"ElevenLabs streaming TTS error: {e}")
+            return
+
+        for frame in encoder.flush():
+            yield frame
+        self.cache.put(cache_key, bytes(encoder.audio))
@@ -2,60 +2,401 @@
 VectorService using Qdrant and OpenAI embeddings.
 - upsert_menu_items: upserts menu item documents with embeddings
 - semantic_search: search by text query (OpenAI embedding -> Qdrant search)
+- hybrid mode: confident in-process lexical matches skip the embedding
+  call and Qdrant; query embeddings are cached by normalized query
+- every upserted point is mirrored into a LocalVectorIndex (int8, snapshotted
+  to disk): it serves vector search for catalogs up to VECTOR_LOCAL_MAX_ITEMS
+  and stands in for Qdrant when Qdrant is unreachable. A snapshot is only
+  used while its point ids and content hashes match the collection; this is
+  rechecked every VECTOR_LOCAL_REFRESH_SECONDS, so re-indexing done through
+  another replica reaches this one
+
+Indexing pipeline (upsert_menu_items):
+- items are consumed in windows, so any iterable (e.g. a DB cursor) can
+  be indexed with bounded memory
+- items whose text hash matches the point already stored are skipped;
+  identical texts within a window are embedded once
+- embeddings are requested EMBEDDING_BATCH_SIZE inputs per call, at most
+  EMBEDDING_MAX_CONCURRENCY calls in flight, over a shared keep-alive pool
+- points are upserted in VECTOR_UPSERT_CHUNK_SIZE chunks while the next
+  window is being embedded
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
+import uuid
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import httpx
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qdrant_models
-import os
-import time
-import backoff
-import openai
+
+from ..core.cache import TTLCache
 from ..core.config import settings
+from ..core.http_client import get_http_client, get_limiter
+from .lexical_index import LexicalIndex
+from .llm_service import RETRYABLE_STATUS, LLMService
+from .local_vector_index import LocalVectorIndex
+from .menu_catalog import tokenize
 
 logger = logging.getLogger(__name__)
 
-openai.api_key = settings.OPENAI_API_KEY
+
+def item_text(item: Dict[str, Any]) -> str:
+    """The text embedded for a menu item."""
+    return f"{item.get('name')} - {item.get('description', '')}"
+
+
+def content_hash(text: str) -> str:
+    """Changes whenever the embedded text or the embedding model does."""
+    return hashlib.sha256(f"{settings.EMBEDDING_MODEL}\n{text}".encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a search query: case and punctuation don't matter."""
+    return " ".join(tokenize(query))
+
+
+def points_fingerprint(points: Iterable[tuple]) -> str:
+    """Identifies a set of (point id, payload) by ids and content hashes, in any order."""
+    entries = sorted(f"{pid}:{(payload or {}).get('content_hash')}" for pid, payload in points)
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+def point_id(item_id: Any) -> Union[int, str]:
+    """Qdrant accepts unsigned ints and UUIDs; other ids map to a stable UUID."""
+    if isinstance(item_id, int) and item_id >= 0:
+        return item_id
+    text = str(item_id)
+    if text.isdigit():
+        return int(text)
+    try:
+        return str(uuid.UUID(text))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"menu_item:{text}"))
+
 
 class VectorService:
-    def __init__(self):
+    # Shared by every instance: spoken queries repeat across calls
+    query_cache = TTLCache(settings.VECTOR_QUERY_CACHE_SIZE, settings.VECTOR_QUERY_CACHE_TTL_SECONDS)
+
+    def __init__(
+        self,
+        client: Optional[AsyncQdrantClient] = None,
+        dim: Optional[int] = None,
+        local_index_dir: Optional[str] = None,
+    ):
         # Qdrant connection (supports URL + API key)
-        self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+        self.client = client or AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY or None)
         self.collection = "menu_items"
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.lexical = LexicalIndex()
+        self.local = LocalVectorIndex(self.dim)
+        self.local_index_dir = settings.VECTOR_LOCAL_INDEX_DIR if local_index_dir is None else local_index_dir
+        self._collection_ready = False
 
-    def ensure_collection(self, dim=1536):
-        try:
-            if not self.client.get_collection(self.collection):
-                self.client.recreate_collection(self.collection, vectors_config=qdrant_models.VectorParams(size=dim, distance=qdrant_models.Distance.COSINE))
-        except Exception:
-            # If not found, create it
-            self.client.recreate_collection(self.collection, vectors_config=qdrant_models.VectorParams(size=dim, distance=qdrant_models.Distance.COSINE))
-
-    def _get_embedding(self, text: str) -> List[float]:
-        # Using OpenAI embeddings (text-embedding-3-small or text-embedding-3-large)
-        resp = openai.Embedding.create(model="text-embedding-3-small", input=text)
-        return resp["data"][0]["embedding"]
-
-    def upsert_menu_items(self, items: List[Dict[str, Any]]):
+    async def ensure_collection(self):
+        if self._collection_ready:
+            return
+        # Create only when missing: recreating would drop every indexed item
+        if not await self.client.collection_exists(self.collection):
+            await self.client.create_collection(
+                self.collection,
+                vectors_config=qdrant_models.VectorParams(size=self.dim, distance=qdrant_models.Distance.COSINE),
+            )
+        self._collection_ready = True
+
+    # ----------------------------------------------------------
+    # Embeddings
+    # ----------------------------------------------------------
+    async def _get_embedding(self, text: str) -> List[float]:
+        return (await self._get_embeddings([text]))[0]
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Query embedding, cached by normalized query (and embedding model)."""
+        key = (settings.EMBEDDING_MODEL, normalize_query(query))
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = await self._get_embedding(key[1] or query)
+            self.query_cache.set(key, embedding)
+        return embedding
+
+    async def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts: EMBEDDING_BATCH_SIZE per request, requests run concurrently (bounded)."""
+        size = settings.EMBEDDING_BATCH_SIZE
+        batches = await asyncio.gather(*[self._embed_batch(texts[i:i + size]) for i in range(0, len(texts), size)])
+        return [embedding for batch in batches for embedding in batch]
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        client = get_http_client(
+            "openai-embeddings",
+            base_url=settings.OPENAI_API_URL,
+            timeout=settings.EMBEDDING_TIMEOUT_SECONDS,
+            max_connections=settings.EMBEDDING_MAX_CONCURRENCY,
+            max_keepalive_connections=settings.EMBEDDING_MAX_CONCURRENCY,
+        )
+        limiter = get_limiter("openai-embeddings", settings.EMBEDDING_MAX_CONCURRENCY)
+        payload = {"model": settings.EMBEDDING_MODEL, "input": texts}
+        headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            last_attempt = attempt == settings.LLM_MAX_RETRIES
+            try:
+                async with limiter:
+                    resp = await client.post("/v1/embeddings", json=payload, headers=headers)
+                if resp.status_code not in RETRYABLE_STATUS or last_attempt:
+                    resp.raise_for_status()
+                    data = sorted(resp.json()["data"], key=lambda row: row["index"])
+                    return [row["embedding"] for row in data]
+                logger.info(f"Embeddings returned {resp.status_code}; retrying")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if last_attempt:
+                    raise
+                logger.info(f"Embeddings request failed ({e!r}); retrying")
+            await asyncio.sleep(LLMService._backoff(attempt))
+
+    # ----------------------------------------------------------
+    # Indexing
+    # ----------------------------------------------------------
+    async def upsert_menu_items(self, items: Iterable[Dict[str, Any]]):
         """
-        items: list of dicts containing 'id', 'name', 'description', 'price', 'restaurant_id'
+        items: iterable of dicts containing 'id', 'name', 'description', 'price', 'restaurant_id'
+        Returns counts of upserted (new or changed) and unchanged items.
         """
-        self.ensure_collection()
-        points = []
+        await self.ensure_collection()
+        window = settings.EMBEDDING_BATCH_SIZE * settings.EMBEDDING_MAX_CONCURRENCY
+        iterator = iter(items)
+        upserted = unchanged = 0
+        writing: Optional[asyncio.Task] = None
+
+        try:
+            while True:
+                chunk = list(islice(iterator, window))
+                if not chunk:
+                    break
+                points = await self._changed_points(chunk)
+                unchanged += len(chunk) - len(points)
+                upserted += len(points)
+                # Write this window while the next one is embedded
+                if writing:
+                    await writing
+                writing = asyncio.create_task(self._write_points(points)) if points else None
+            if writing:
+                await writing
+        finally:
+            if writing and not writing.done():
+                writing.cancel()
+
+        if self.local_index_dir:
+            await asyncio.to_thread(self.local.save, self.local_index_dir)
+        logger.info(f"[VectorService] Indexed menu items: {upserted} upserted, {unchanged} unchanged")
+        return {"success": True, "upserted": upserted, "unchanged": unchanged}
+
+    async def _changed_points(self, items: List[Dict[str, Any]]) -> List[qdrant_models.PointStruct]:
+        """Points for items that are new or whose text changed since they were indexed."""
+        by_id: Dict[Union[int, str], Dict[str, Any]] = {}
         for item in items:
-            text = f"{item.get('name')} - {item.get('description', '')}"
-            emb = self._get_embedding(text)
-            point = qdrant_models.PointStruct(id=str(item["id"]), vector=emb, payload=item)
-            points.append(point)
-        # batch upsert
-        self.client.upsert(collection_name=self.collection, points=points)
-        return {"success": True, "upserted": len(points)}
-
-    def semantic_search(self, query: str, top_k: int = 5):
-        emb = self._get_embedding(query)
-        hits = self.client.search(collection_name=self.collection, query_vector=emb, limit=top_k)
+            text = item_text(item)
+            pid = point_id(item["id"])
+            payload = {**item, "content_hash": content_hash(text)}
+            self.lexical.add(pid, payload)
+            by_id[pid] = {**payload, "_text": text}
+
+        stored = await self.client.retrieve(
+            self.collection, ids=list(by_id), with_payload=["content_hash"], with_vectors=False
+        )
+        missing_locally = []
+        for point in stored:
+            payload = by_id[point.id]
+            if point.payload and payload["content_hash"] == point.payload.get("content_hash"):
+                del by_id[point.id]
+                local = self.local.payload(point.id)
+                if not local or local.get("content_hash") != payload["content_hash"]:
+                    payload.pop("_text")
+                    missing_locally.append((point.id, payload))
+        if missing_locally:
+            await self._mirror_locally(missing_locally)
+        if not by_id:
+            return []
+
+        texts = list(dict.fromkeys(payload["_text"] for payload in by_id.values()))
+        vectors = dict(zip(texts, await self._get_embeddings(texts)))
+        return [
+            qdrant_models.PointStruct(id=pid, vector=vectors[payload.pop("_text")], payload=payload)
+            for pid, payload in by_id.items()
+        ]
+
+    async def _mirror_locally(self, payloads: List[tuple]):
+        """Copy vectors already in Qdrant (unchanged items) into the local index without re-embedding."""
+        payload_by_id = dict(payloads)
+        points = await self.client.retrieve(self.collection, ids=list(payload_by_id), with_payload=False, with_vectors=True)
+        if points:
+            self.local.upsert([p.id for p in points], [p.vector for p in points], [payload_by_id[p.id] for p in points])
+
+    async def _write_points(self, points: List[qdrant_models.PointStruct]):
+        self.local.upsert([p.id for p in points], [p.vector for p in points], [p.payload for p in points])
+        size = settings.VECTOR_UPSERT_CHUNK_SIZE
+        for i in range(0, len(points), size):
+            await self.client.upsert(collection_name=self.collection, points=points[i:i + size], wait=True)
+
+    # ----------------------------------------------------------
+    # Search
+    # ----------------------------------------------------------
+    async def load_lexical_index(self) -> int:
+        """Rebuild the lexical index from the payloads stored in Qdrant (e.g. after a restart)."""
+        self.lexical.clear()
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                self.collection, limit=settings.VECTOR_UPSERT_CHUNK_SIZE, offset=offset,
+                with_payload=True, with_vectors=False,
+            )
+            for point in points:
+                self.lexical.add(point.id, point.payload or {})
+            if offset is None:
+                break
+        logger.info(f"[VectorService] Lexical index loaded with {len(self.lexical)} menu items")
+        return len(self.lexical)
+
+    async def load_local_index(self) -> int:
+        """
+        Load the local vector index from its snapshot, or from Qdrant when there is none
+        or it no longer matches the collection, and rebuild the lexical index from the
+        same payloads. Returns the number of points.
+        """
+        snapshot = None
+        if self.local_index_dir:
+            snapshot = await asyncio.to_thread(LocalVectorIndex.load, self.local_index_dir)
+        if snapshot is not None and snapshot.dim != self.dim:
+            snapshot = None
+        if snapshot is not None:
+            try:
+                current = await self._collection_fingerprint() == points_fingerprint(snapshot.payloads())
+            except Exception as e:
+                # Exactly when the snapshot is needed: serve it unchecked
+                logger.warning(f"[VectorService] Qdrant unreachable, using the local snapshot unchecked: {e}")
+                current = True
+            if not current:
+                logger.info("[VectorService] Local snapshot is out of date, rebuilding from Qdrant")
+                snapshot = None
+        if snapshot is not None:
+            self._use_local(snapshot)
+        else:
+            await self._rebuild_local_index()
+        logger.info(f"[VectorService] Local indexes loaded with {len(self.local)} menu items")
+        return len(self.local)
+
+    async def refresh_local_index(self) -> bool:
+        """Rebuild the local indexes if the collection changed (e.g. re-indexed by another replica)."""
+        if await self._collection_fingerprint() == points_fingerprint(self.local.payloads()):
+            return False
+        await self._rebuild_local_index()
+        logger.info(f"[VectorService] Local indexes refreshed with {len(self.local)} menu items")
+        return True
+
+    async def _collection_fingerprint(self) -> str:
+        """points_fingerprint of the collection; reads payload hashes only, no vectors."""
+        stored = []
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                self.collection, limit=settings.VECTOR_UPSERT_CHUNK_SIZE, offset=offset,
+                with_payload=["content_hash"], with_vectors=False,
+            )
+            stored.extend((p.id, p.payload) for p in points)
+            if offset is None:
+                break
+        return points_fingerprint(stored)
+
+    async def _rebuild_local_index(self):
+        """Pull every point from Qdrant into a new local index, snapshot it and switch to it."""
+        local = LocalVectorIndex(self.dim)
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                self.collection, limit=settings.VECTOR_UPSERT_CHUNK_SIZE, offset=offset,
+                with_payload=True, with_vectors=True,
+            )
+            if points:
+                local.upsert([p.id for p in points], [p.vector for p in points], [p.payload or {} for p in points])
+            if offset is None:
+                break
+        if self.local_index_dir and len(local):
+            await asyncio.to_thread(local.save, self.local_index_dir)
+        self._use_local(local)
+
+    def _use_local(self, local: LocalVectorIndex):
+        """Switch to `local` and a lexical index over its payloads; searches see one or the other."""
+        lexical = LexicalIndex()
+        for pid, payload in local.payloads():
+            lexical.add(pid, payload)
+        self.local, self.lexical = local, lexical
+
+    async def semantic_search(self, query: str, top_k: int = 5, mode: Optional[str] = None):
+        """
+        mode "hybrid" (default: VECTOR_SEARCH_MODE) returns in-process lexical hits
+        when their confidence reaches VECTOR_LEXICAL_MIN_CONFIDENCE; "vector", or a
+        low-confidence lexical match, runs a vector search. Scores are in [0, 1] either way.
+
+        Vector search uses the local index for catalogs up to VECTOR_LOCAL_MAX_ITEMS and
+        Qdrant above that, falling back to the local index if Qdrant fails. If the query
+        can't be embedded, any lexical hits are returned instead.
+        """
+        lexical_hits = []
+        if (mode or settings.VECTOR_SEARCH_MODE) == "hybrid":
+            hits, confidence = self.lexical.search(query, top_k)
+            if hits:
+                top_score = hits[0][1]
+                lexical_hits = [
+                    {"id": doc_id, "score": round(confidence * score / top_score, 4), "payload": item}
+                    for doc_id, score, item in hits
+                ]
+            if lexical_hits and confidence >= settings.VECTOR_LEXICAL_MIN_CONFIDENCE:
+                return lexical_hits
+
+        try:
+            emb = await self.embed_query(query)
+        except Exception as e:
+            if not lexical_hits:
+                raise
+            logger.warning(f"[VectorService] Query embedding failed, using lexical matches: {e}")
+            return lexical_hits
+
+        if 0 < len(self.local) <= settings.VECTOR_LOCAL_MAX_ITEMS:
+            return self.local.search(emb, top_k)
+        try:
+            hits = await self.client.search(collection_name=self.collection, query_vector=emb, limit=top_k)
+        except Exception as e:
+            if not len(self.local):
+                raise
+            logger.warning(f"[VectorService] Qdrant search failed, using the local index: {e}")
+            return self.local.search(emb, top_k)
         results = []
         for hit in hits:
             results.append({"id": hit.id, "score": hit.score, "payload": hit.payload})
         return results
+
+
+_vector_service: Optional[VectorService] = None
+
+
+def get_vector_service() -> VectorService:
+    """Process-wide VectorService, so its local indexes are built once."""
+    global _vector_service
+    if _vector_service is None:
+        _vector_service = VectorService()
+    return _vector_service
+
+
+async def run_local_index_refresh(service: Optional[VectorService] = None, interval: Optional[float] = None):
+    """Background loop: check the local indexes against Qdrant every VECTOR_LOCAL_REFRESH_SECONDS."""
+    service = service or get_vector_service()
+    interval = interval or settings.VECTOR_LOCAL_REFRESH_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await service.refresh_local_index()
+        except Exception as e:
+            logger.error(f"[VectorService] Local index refresh failed: {e}")
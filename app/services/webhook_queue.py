@@ -0,0 +1,502 @@
+"""
+app/services/webhook_queue.py
+
+Durable webhook ingestion
+-------------------------
+Provider callbacks (Stripe events, Twilio call status) are verified by the
+endpoint, appended here and acknowledged with 200 straight away; a worker
+pool applies them in the background, so webhook latency does not depend on
+what applying an event costs or how many retries a provider sends at once.
+
+- Backends: a local append-only log (WEBHOOK_QUEUE_BACKEND=log, single
+  replica) or a Redis stream read through a consumer group (=redis)
+- Appends are deduplicated by event id for WEBHOOK_DEDUPE_TTL_SECONDS: a
+  provider retry of an event already queued is acknowledged and dropped
+- Within a process, events for one object (PaymentIntent, CallSid) always go
+  to the same worker, so they are applied in arrival order; other objects run
+  in parallel. With the redis backend and several replicas, the consumer group
+  hands entries to whichever replica reads first, so two replicas can apply
+  events of one object concurrently and out of order: per-object ordering
+  only holds for a single consumer, and handlers must tolerate reordering
+- An event is acked only after its handlers succeed (at-least-once). Each
+  handler runs on its own: one that fails is retried without blocking or
+  re-running the others, and after WEBHOOK_MAX_ATTEMPTS failures the event
+  is dead-lettered
+- Log backend: concurrent appends share one write + fsync (group commit),
+  and the log is rewritten to pending events + recent ids once it has grown
+  by WEBHOOK_LOG_COMPACT_RECORDS and doubled since the last rewrite, so
+  rewrite cost stays proportional to appends, not to the dedupe history
+
+Handlers are registered per source with register_webhook_handler() and
+must be idempotent.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+Handler = Callable[[Event], Awaitable[None]]
+
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def register_webhook_handler(source: str, handler: Handler):
+    """Apply `handler` to every queued event from `source` ("stripe", "twilio")."""
+    _handlers.setdefault(source, []).append(handler)
+
+
+def make_event(source: str, event_id: str, event_type: str, object_id: str, payload: Dict[str, Any]) -> Event:
+    return {
+        "id": event_id,
+        "source": source,
+        "type": event_type,
+        "object_id": object_id,
+        "payload": payload,
+        "received_at": time.time(),
+    }
+
+
+# ----------------------------------------------------------
+# Backends
+# ----------------------------------------------------------
+class LogWebhookBackend:
+    """
+    Append-only JSON-lines log. Records:
+    - {"seq": n, "event": {...}}            an accepted event
+    - {"ack": n, "id": event_id, "at": t}   event n applied (or dead-lettered)
+    Dead-lettered events are also appended to `<path>.dead`.
+    """
+
+    name = "log"
+
+    def __init__(self, path: str, dedupe_ttl: float = None, fsync: bool = None, compact_records: int = None,
+                 max_done: int = None):
+        self.path = path
+        self.dedupe_ttl = dedupe_ttl if dedupe_ttl is not None else settings.WEBHOOK_DEDUPE_TTL_SECONDS
+        self.fsync = settings.WEBHOOK_LOG_FSYNC if fsync is None else fsync
+        self.compact_records = compact_records or settings.WEBHOOK_LOG_COMPACT_RECORDS
+        self.max_done = max_done or settings.WEBHOOK_DEDUPE_MAX_IDS
+        self._file = None
+        self._seq = 0
+        # records in the file, and how many the last compaction wrote
+        self._records = 0
+        self._compacted_records = 0
+        # event id -> seq for accepted, unacked events; event id -> ack time, oldest first
+        self._pending_ids: Dict[str, int] = {}
+        self._done: "OrderedDict[str, float]" = OrderedDict()
+        # seq -> event once its record is written; seqs not yet handed to a reader
+        self._events: "OrderedDict[int, Event]" = OrderedDict()
+        self._undelivered: Deque[int] = deque()
+        self._ready = asyncio.Event()
+        self._writes: List[Tuple[str, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Future] = None
+
+    def open(self):
+        """Replay the log (pending events come back undelivered) and compact it. Idempotent."""
+        if self._file is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn final write from a crash; everything before it is intact
+                        logger.warning(f"[WebhookQueue] Skipping unreadable record {number} in {self.path}")
+                        continue
+                    if "event" in record:
+                        seq, event = record["seq"], record["event"]
+                        self._events[seq] = event
+                        self._pending_ids[event["id"]] = seq
+                        self._seq = max(self._seq, seq + 1)
+                    else:
+                        self._events.pop(record["ack"], None)
+                        self._pending_ids.pop(record["id"], None)
+                        self._done[record["id"]] = record["at"]
+                        self._seq = max(self._seq, record["ack"] + 1)
+        self._prune_done()
+        self._undelivered.extend(self._events)
+        self._compact(list(self._events.items()), list(self._done.items()))
+        if self._undelivered:
+            logger.info(f"[WebhookQueue] {len(self._undelivered)} pending events recovered from {self.path}")
+            self._ready.set()
+
+    async def close(self):
+        if self._flusher and not self._flusher.done():
+            await self._flusher
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def append(self, event: Event) -> bool:
+        """Durably append `event`; False if its id was already accepted."""
+        self.open()
+        self._prune_done()
+        event_id = event["id"]
+        if event_id in self._pending_ids or event_id in self._done:
+            return False
+        seq = self._seq
+        self._seq += 1
+        # Tracked before the write so a compaction running meanwhile keeps it
+        self._pending_ids[event_id] = seq
+        self._events[seq] = event
+        try:
+            await self._write({"seq": seq, "event": event})
+        except Exception:
+            self._pending_ids.pop(event_id, None)
+            self._events.pop(seq, None)
+            raise
+        self._undelivered.append(seq)
+        self._ready.set()
+        return True
+
+    async def read(self, count: int, timeout: float) -> List[Tuple[int, Event]]:
+        """Up to `count` undelivered events, waiting at most `timeout` seconds for one."""
+        self.open()
+        if not self._undelivered:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        entries = []
+        while self._undelivered and len(entries) < count:
+            seq = self._undelivered.popleft()
+            entries.append((seq, self._events[seq]))
+        return entries
+
+    async def is_done(self, event_id: str) -> bool:
+        self.open()
+        return event_id in self._done
+
+    async def ack(self, seq: int, event_id: str):
+        now = time.time()
+        self._events.pop(seq, None)
+        self._pending_ids.pop(event_id, None)
+        self._done[event_id] = now
+        self._prune_done()
+        await self._write({"ack": seq, "id": event_id, "at": now})
+
+    async def dead_letter(self, seq: int, event: Event, error: str):
+        line = json.dumps({"event": event, "error": error, "at": time.time()})
+        await asyncio.to_thread(self._append_dead, line)
+        await self.ack(seq, event["id"])
+
+    def _append_dead(self, line: str):
+        with open(f"{self.path}.dead", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    # Group commit: records queued while a write is in flight go out together in the next one
+    async def _write(self, record: Dict[str, Any]):
+        future = asyncio.get_running_loop().create_future()
+        self._writes.append((json.dumps(record), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush())
+        await future
+
+    async def _flush(self):
+        while self._writes:
+            batch, self._writes = self._writes, []
+            try:
+                await asyncio.to_thread(self._write_lines, [line for line, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            self._records += len(batch)
+            appended = self._records - self._compacted_records
+            if appended >= max(self.compact_records, self._compacted_records):
+                self._prune_done()
+                await asyncio.to_thread(self._compact, list(self._events.items()), list(self._done.items()))
+
+    def _write_lines(self, lines: List[str]):
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _compact(self, events: List[Tuple[int, Event]], done: List[Tuple[str, float]]):
+        """Rewrite the log as pending events + acks still inside the dedupe window."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for seq, event in events:
+                f.write(json.dumps({"seq": seq, "event": event}) + "\n")
+            for event_id, at in done:
+                f.write(json.dumps({"ack": -1, "id": event_id, "at": at}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._records = self._compacted_records = len(events) + len(done)
+
+    def _prune_done(self):
+        cutoff = time.time() - self.dedupe_ttl
+        while self._done:
+            event_id, at = next(iter(self._done.items()))
+            if at >= cutoff and len(self._done) <= self.max_done:
+                break
+            del self._done[event_id]
+
+
+class RedisWebhookBackend:
+    """
+    Redis stream read through a consumer group. Keys:
+    - {stream}                   the events (XADD, trimmed to WEBHOOK_STREAM_MAXLEN)
+    - {stream}:dead              dead-lettered events
+    - {stream}:seen:{event_id}   set on append, expires after the dedupe TTL
+    - {stream}:done:{event_id}   set on ack, expires after the dedupe TTL
+    Entries delivered to some consumer but not acked within
+    WEBHOOK_CLAIM_IDLE_SECONDS (a crashed or restarted replica) are claimed
+    and applied again; the done key makes that safe.
+    Consumers share the stream entry by entry, so events are only applied in
+    per-object order while one replica consumes it.
+    """
+
+    name = "redis"
+
+    # Dedupe and append in one step, so a crash cannot mark an event seen without queueing it
+    APPEND_SCRIPT = """
+    if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+        return redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'event', ARGV[2])
+    end
+    return false
+    """
+
+    def __init__(self, client, stream: str = None, group: str = "webhook-workers", consumer: str = None,
+                 dedupe_ttl: float = None, claim_idle: float = None):
+        self.client = client
+        self.stream = stream or settings.WEBHOOK_STREAM
+        self.group = group
+        self.consumer = consumer or settings.WEBHOOK_CONSUMER
+        self.dedupe_ttl = int(dedupe_ttl if dedupe_ttl is not None else settings.WEBHOOK_DEDUPE_TTL_SECONDS)
+        self.claim_idle = claim_idle if claim_idle is not None else settings.WEBHOOK_CLAIM_IDLE_SECONDS
+        self._group_ready = False
+        self._next_claim = 0.0
+
+    def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            await self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def append(self, event: Event) -> bool:
+        result = await self.client.eval(
+            self.APPEND_SCRIPT, 2, f"{self.stream}:seen:{event['id']}", self.stream,
+            self.dedupe_ttl, json.dumps(event), settings.WEBHOOK_STREAM_MAXLEN,
+        )
+        return result is not None
+
+    async def read(self, count: int, timeout: float) -> List[Tuple[str, Event]]:
+        await self._ensure_group()
+        if time.monotonic() >= self._next_claim:
+            self._next_claim = time.monotonic() + self.claim_idle
+            claimed = await self.client.xautoclaim(
+                self.stream, self.group, self.consumer, int(self.claim_idle * 1000), "0-0", count=count
+            )
+            entries = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+            if entries:
+                logger.info(f"[WebhookQueue] Claimed {len(entries)} unacked events from {self.stream}")
+                return self._decode(entries)
+
+        # Take what is already there; block only when the stream is drained
+        response = await self.client.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=count)
+        if not response:
+            response = await self.client.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=count, block=int(timeout * 1000)
+            )
+        return self._decode(response[0][1]) if response else []
+
+    @staticmethod
+    def _decode(entries) -> List[Tuple[str, Event]]:
+        return [(entry_id, json.loads(fields["event"])) for entry_id, fields in entries]
+
+    async def is_done(self, event_id: str) -> bool:
+        return bool(await self.client.exists(f"{self.stream}:done:{event_id}"))
+
+    async def ack(self, entry_id: str, event_id: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(f"{self.stream}:done:{event_id}", "1", ex=self.dedupe_ttl)
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+            await pipe.execute()
+
+    async def dead_letter(self, entry_id: str, event: Event, error: str):
+        await self.client.xadd(f"{self.stream}:dead", {"event": json.dumps(event), "error": error})
+        await self.ack(entry_id, event["id"])
+
+
+# ----------------------------------------------------------
+# Queue + workers
+# ----------------------------------------------------------
+class WebhookQueue:
+    """Accepts verified webhook events and applies them with a pool of workers."""
+
+    READ_BATCH = 100
+    READ_TIMEOUT = 1.0
+
+    def __init__(self, backend, workers: int = None, max_attempts: int = None):
+        self.backend = backend
+        self.workers = workers or settings.WEBHOOK_WORKERS
+        self.max_attempts = max_attempts or settings.WEBHOOK_MAX_ATTEMPTS
+        self._inboxes: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._idle: Optional[asyncio.Event] = None
+        self.stats = {"accepted": 0, "duplicates": 0, "applied": 0, "skipped": 0, "dead": 0}
+
+    async def enqueue(self, source: str, event_id: str, event_type: str, object_id: str, payload: Dict[str, Any]) -> bool:
+        """Durably queue an event; False if it was a duplicate. Raises if the backend is down."""
+        accepted = await self.backend.append(make_event(source, event_id, event_type, object_id, payload))
+        self.stats["accepted" if accepted else "duplicates"] += 1
+        if accepted and self._idle is not None:
+            self._idle.clear()
+        return accepted
+
+    def start(self):
+        """Start the dispatcher and workers on the running loop (app startup)."""
+        if self._tasks:
+            return
+        self.backend.open()
+        self._idle = asyncio.Event()
+        self._inboxes = [asyncio.Queue() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._work(inbox)) for inbox in self._inboxes]
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        logger.info(f"✅ Webhook queue started ({self.backend.name.upper()} backend, {self.workers} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.backend.close()
+
+    async def join(self):
+        """Wait until every queued event has been applied (tests, graceful shutdown)."""
+        while True:
+            await self._idle.wait()
+            for inbox in self._inboxes:
+                await inbox.join()
+            if self._idle.is_set():
+                return
+
+    async def _dispatch(self):
+        while True:
+            try:
+                entries = await self.backend.read(self.READ_BATCH, self.READ_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[WebhookQueue] Read failed: {e}")
+                await asyncio.sleep(self.READ_TIMEOUT)
+                continue
+            if not entries:
+                self._idle.set()
+                continue
+            for key, event in entries:
+                # Orders events per object within this process only (see module docstring)
+                partition = zlib.crc32(str(event.get("object_id")).encode()) % self.workers
+                self._inboxes[partition].put_nowait((key, event))
+
+    async def _work(self, inbox: asyncio.Queue):
+        while True:
+            key, event = await inbox.get()
+            try:
+                await self._apply(key, event)
+            except Exception:
+                logger.exception(f"[WebhookQueue] Could not settle event {event.get('id')}")
+            finally:
+                inbox.task_done()
+
+    async def _apply(self, key, event: Event):
+        if await self.backend.is_done(event["id"]):
+            self.stats["skipped"] += 1
+            await self.backend.ack(key, event["id"])
+            return
+        # Handlers still to succeed; the ones that did are not run again
+        pending = list(_handlers.get(event["source"], []))
+        for attempt in range(self.max_attempts):
+            failed = []
+            for handler in pending:
+                try:
+                    await handler(event)
+                except Exception as e:
+                    failed.append(handler)
+                    error = e
+            if not failed:
+                self.stats["applied"] += 1
+                await self.backend.ack(key, event["id"])
+                return
+            pending = failed
+            if attempt == self.max_attempts - 1:
+                logger.error(f"[WebhookQueue] Dead-lettering {event['source']} event {event['id']}: {error}")
+                self.stats["dead"] += 1
+                await self.backend.dead_letter(key, event, str(error))
+                return
+            logger.warning(f"[WebhookQueue] {event['source']} event {event['id']}: {len(failed)} handler(s) failed ({error}); retrying")
+            await asyncio.sleep(min(2 ** attempt * 0.5, 30))
+
+
+# ----------------------------------------------------------
+# Provider helpers
+# ----------------------------------------------------------
+async def enqueue_stripe_event(event: Dict[str, Any], payload: bytes) -> bool:
+    """Queue a signature-verified Stripe event (payload is the raw request body)."""
+    obj = (event.get("data") or {}).get("object") or {}
+    event_id = event.get("id") or f"evt_{hashlib.sha256(payload).hexdigest()[:24]}"
+    return await get_webhook_queue().enqueue(
+        "stripe", event_id, event.get("type", ""), obj.get("id", ""), json.loads(json.dumps(event))
+    )
+
+
+async def enqueue_call_status(params: Dict[str, Any]) -> bool:
+    """Queue a Twilio call-status callback (form params, already verified)."""
+    call_sid = params.get("CallSid", "")
+    status = params.get("CallStatus", "")
+    # Twilio has no event ids; one callback per (call, sequence number) or per status
+    event_id = f"{call_sid}:{params.get('SequenceNumber') or status}"
+    return await get_webhook_queue().enqueue("twilio", event_id, f"call.{status}", call_sid, dict(params))
+
+
+_webhook_queue: Optional[WebhookQueue] = None
+
+
+def get_webhook_queue() -> WebhookQueue:
+    """Process-wide queue on the configured backend."""
+    global _webhook_queue
+    if _webhook_queue is None:
+        if settings.WEBHOOK_QUEUE_BACKEND == "redis":
+            from ..core.database import redis_client
+            backend = RedisWebhookBackend(redis_client)
+        else:
+            backend = LogWebhookBackend(settings.WEBHOOK_LOG_PATH)
+        _webhook_queue = WebhookQueue(backend)
+    return _webhook_queue
@@ -1,54 +1,67 @@
 from typing import Dict, List, Optional, Any
 import logging
-from ..core.database import SessionLocal
-# Models are referenced but not implemented here; imports left as-is.
-# from ..models.database import Customer, Restaurant, MenuItem, Order
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.database import Customer, Order
 import json
 import uuid
 
 logger = logging.getLogger(__name__)
 
 
-# NOTE: The following implementations assume SQLAlchemy models (Customer, MenuItem, Order).
-# If running locally without models, these functions will need to be adapted or mocked.
+# NOTE: Lookups use the async engine (AsyncSessionLocal). Database errors are
+# reported to the caller; only with TOOLS_DEMO_DATA (local development without a
+# database) do they fall back to mocked results.
 
 
-async def get_customer_profile(phone_number: str) -> Dict[str, Any]:
-    """Get customer profile by phone number or create a minimal profile if none exists."""
+async def _load_customer(phone_number: str) -> Optional[Dict[str, Any]]:
+    """Customer with their last five orders, or None if unknown (or no database with TOOLS_DEMO_DATA)."""
     try:
-        db = SessionLocal()
-        # Example: query Customer model (commented because models may be missing)
-        # customer = db.query(Customer).filter(Customer.phone_number == phone_number).first()
-        customer = None  # placeholder for runtime without models
-
-        if customer:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Customer).where(Customer.phone_number == phone_number))
+            customer = result.scalar_one_or_none()
+            if not customer:
+                return None
+
+            result = await db.execute(
+                select(Order)
+                .options(selectinload(Order.restaurant))
+                .where(Order.customer_id == customer.id)
+                .order_by(Order.created_at.desc())
+                .limit(5)
+            )
             return {
                 "id": customer.id,
                 "name": customer.name,
                 "email": customer.email,
                 "phone_number": customer.phone_number,
-                "addresses": [
-                    {
-                        "id": addr.id,
-                        "address_line1": addr.address_line1,
-                        "city": addr.city,
-                        "state": addr.state,
-                        "zip_code": addr.zip_code,
-                        "is_primary": addr.is_primary
-                    }
-                    for addr in customer.addresses
-                ],
+                "addresses": [customer.address] if customer.address else [],
                 "order_history": [
                     {
                         "id": order.id,
-                        "restaurant_name": order.restaurant.name,
+                        "restaurant_name": order.restaurant.name if order.restaurant else None,
                         "total_amount": order.total_amount,
                         "status": order.status,
-                        "created_at": order.created_at.isoformat()
+                        "created_at": order.created_at.isoformat() if order.created_at else None
                     }
-                    for order in customer.orders.order_by()[:5]
+                    for order in result.scalars()
                 ]
             }
+    except Exception as e:
+        if not settings.TOOLS_DEMO_DATA:
+            raise
+        logger.warning(f"Customer lookup unavailable, treating {phone_number} as a new customer: {e}")
+        return None
+
+
+async def get_customer_profile(phone_number: str) -> Dict[str, Any]:
+    """Get customer profile by phone number or create a minimal profile if none exists."""
+    try:
+        customer = await _load_customer(phone_number)
+        if customer:
+            return customer
         else:
             # Create new minimal profile
             new_customer = {
@@ -61,11 +74,6 @@ async def get_customer_profile(phone_number: str) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Error getting customer profile: {e}")
         return {"error": "Failed to retrieve customer profile"}
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
 
 
 async def search_menu(restaurant_id: str = None, query: str = "", filters: Dict = None) -> List[Dict]:
@@ -247,6 +255,8 @@ async def place_order(payment_method_id: str, session_data: Dict = None) -> Dict
         return {
             "success": True,
             "order_id": order_id,
+            # Orders.payment_info: Stripe webhooks find the order by this intent id
+            "payment_info": {"payment_intent_id": session_data.get("payment_intent_id")},
             "total_amount": total_result["total"],
             "estimated_delivery_time": "30-45 minutes",
             "confirmation_number": order_id[:8].upper()
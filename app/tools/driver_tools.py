@@ -1,17 +1,29 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence, Tuple, Union
 import logging
-from ..core.database import SessionLocal
-# from ..models.database import Driver, Order
+import numpy as np
+from sqlalchemy import select
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.database import Driver
+from ..services.driver_index import DriverMatch, get_driver_index
 import json
 import uuid
+from datetime import datetime
 from math import radians, sin, cos, sqrt, atan2
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371
+
+Coordinates = Union[np.ndarray, Sequence[Tuple[float, float]]]
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two coordinates in kilometers using the Haversine formula."""
-    R = 6371  # Earth radius in km
+    """
+    Calculate distance between two coordinates in kilometers using the Haversine formula.
+    For many pairs use calculate_distance_matrix(); plain math is faster for a single one.
+    """
+    R = EARTH_RADIUS_KM
 
     lat1_rad = radians(lat1)
     lon1_rad = radians(lon1)
@@ -27,17 +39,71 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
-async def find_available_drivers(restaurant_location: Dict, radius_km: float = 5.0) -> List[Dict]:
-    """Find available drivers near restaurant (mock or DB-backed)."""
+def calculate_distance_matrix(origins: Coordinates, destinations: Coordinates) -> np.ndarray:
+    """
+    Haversine distances in km from every origin to every destination, in one NumPy pass.
+    origins / destinations: (latitude, longitude) pairs, as lists or (n, 2) arrays.
+    Returns an (len(origins), len(destinations)) float64 array.
+    """
+    origins = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+    destinations = np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+
+    lat1 = origins[:, 0:1]
+    lat2 = destinations[:, 0]
+    # Broadcast (n, 1) against (m,) into (n, m); in-place ops keep it to two matrices
+    a = np.subtract(lat2, lat1)
+    a *= 0.5
+    np.sin(a, out=a)
+    np.square(a, out=a)
+
+    b = np.subtract(destinations[:, 1], origins[:, 1:2])
+    b *= 0.5
+    np.sin(b, out=b)
+    np.square(b, out=b)
+    b *= np.cos(lat1)
+    b *= np.cos(lat2)
+    a += b
+
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * EARTH_RADIUS_KM
+    return a
+
+
+async def _load_available_drivers(restaurant_location: Dict) -> List[Dict]:
+    """Available drivers from the database; demo drivers when it is unreachable and TOOLS_DEMO_DATA is set."""
     try:
-        db = SessionLocal()
-        # drivers = db.query(Driver).filter(Driver.is_available == True).all()
-        # Mock drivers list for demonstration:
-        mock_drivers = [
-            {"id": "drv-1", "name": "Alice", "current_location": {"latitude": restaurant_location["latitude"] + 0.01, "longitude": restaurant_location["longitude"] + 0.01}, "is_available": True},
-            {"id": "drv-2", "name": "Bob", "current_location": {"latitude": restaurant_location["latitude"] + 0.05, "longitude": restaurant_location["longitude"] + 0.02}, "is_available": True},
-        ]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Driver).where(Driver.is_available.is_(True)))
+            return [
+                {"id": driver.id, "name": driver.name, "current_location": driver.current_location, "is_available": True}
+                for driver in result.scalars()
+            ]
+    except Exception as e:
+        if not settings.TOOLS_DEMO_DATA:
+            raise
+        logger.warning(f"Driver lookup unavailable, using demo drivers: {e}")
+
+    # Mock drivers list for demonstration:
+    return [
+        {"id": "drv-1", "name": "Alice", "current_location": {"latitude": restaurant_location["latitude"] + 0.01, "longitude": restaurant_location["longitude"] + 0.01}, "is_available": True},
+        {"id": "drv-2", "name": "Bob", "current_location": {"latitude": restaurant_location["latitude"] + 0.05, "longitude": restaurant_location["longitude"] + 0.02}, "is_available": True},
+    ]
+
+
+def _driver_result(match: DriverMatch) -> Dict:
+    return {
+        "driver_id": match.driver_id,
+        "name": match.info.get("name"),
+        "distance_km": round(match.distance_km, 2),
+        "location": {"latitude": match.latitude, "longitude": match.longitude}
+    }
 
+
+async def find_available_drivers(restaurant_location: Dict, radius_km: float = 5.0) -> List[Dict]:
+    """Find available drivers near restaurant, nearest first (spatial index while fresh, else the database)."""
+    try:
         available_drivers = []
         restaurant_lat = restaurant_location.get("latitude")
         restaurant_lon = restaurant_location.get("longitude")
@@ -46,34 +112,96 @@ async def find_available_drivers(restaurant_location: Dict, radius_km: float = 5
             logger.error("Invalid restaurant location")
             return []
 
-        for driver in mock_drivers:
-            if driver.get("current_location"):
-                driver_lat = driver["current_location"].get("latitude")
-                driver_lon = driver["current_location"].get("longitude")
-
-                if driver_lat is not None and driver_lon is not None:
-                    distance = calculate_distance(
-                        restaurant_lat, restaurant_lon,
-                        driver_lat, driver_lon
-                    )
-
-                    if distance <= radius_km:
-                        available_drivers.append({
-                            "driver_id": driver["id"],
-                            "name": driver["name"],
-                            "distance_km": round(distance, 2),
-                            "location": driver["current_location"]
-                        })
+        index = get_driver_index()
+        if index.is_fresh():
+            return [_driver_result(match) for match in index.within(restaurant_lat, restaurant_lon, radius_km)]
 
+        located = [
+            driver for driver in await _load_available_drivers(restaurant_location)
+            if driver.get("current_location")
+            and driver["current_location"].get("latitude") is not None
+            and driver["current_location"].get("longitude") is not None
+        ]
+        if not located:
+            return []
+
+        distances = calculate_distance_matrix(
+            [(restaurant_lat, restaurant_lon)],
+            [(d["current_location"]["latitude"], d["current_location"]["longitude"]) for d in located]
+        )[0]
+        for driver, distance in zip(located, distances.tolist()):
+            if distance <= radius_km:
+                available_drivers.append({
+                    "driver_id": driver["id"],
+                    "name": driver["name"],
+                    "distance_km": round(distance, 2),
+                    "location": driver["current_location"]
+                })
+
+        available_drivers.sort(key=lambda d: d["distance_km"])
         return available_drivers
     except Exception as e:
         logger.error(f"Error finding available drivers: {e}")
         return []
-    finally:
+
+
+async def find_nearest_drivers(location: Dict, k: int = 3, max_radius_km: float = 10.0) -> List[Dict]:
+    """The k nearest available drivers to a location, within max_radius_km."""
+    try:
+        lat = location.get("latitude")
+        lon = location.get("longitude")
+        if lat is None or lon is None:
+            logger.error("Invalid location")
+            return []
+
+        index = get_driver_index()
+        if index.is_fresh():
+            return [_driver_result(match) for match in index.nearest(lat, lon, k, max_radius_km)]
+        return (await find_available_drivers(location, radius_km=max_radius_km))[:k]
+    except Exception as e:
+        logger.error(f"Error finding nearest drivers: {e}")
+        return []
+
+
+async def update_driver_location(driver_id: str, latitude: float, longitude: float, is_available: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Record a driver's position: the drivers row (latitude/longitude and
+    current_location) is committed first, then this replica's spatial index
+    follows. Other replicas see the change on their next index reload.
+    """
+    try:
+        persisted = False
         try:
-            db.close()
-        except Exception:
+            async with AsyncSessionLocal() as db:
+                driver = await db.get(Driver, int(driver_id))
+                if driver:
+                    driver.latitude = latitude
+                    driver.longitude = longitude
+                    driver.current_location = {"latitude": latitude, "longitude": longitude}
+                    driver.location_updated_at = datetime.utcnow()
+                    if is_available is not None:
+                        driver.is_available = is_available
+                    await db.commit()
+                    persisted = True
+                    index = get_driver_index()
+                    if driver.is_available:
+                        index.upsert(driver.id, latitude, longitude, name=driver.name)
+                    else:
+                        index.remove(driver.id)
+        except (TypeError, ValueError):
             pass
+        except Exception as e:
+            logger.warning(f"Could not persist location for driver {driver_id}: {e}")
+
+        return {
+            "success": True,
+            "driver_id": driver_id,
+            "location": {"latitude": latitude, "longitude": longitude},
+            "persisted": persisted
+        }
+    except Exception as e:
+        logger.error(f"Error updating driver location: {e}")
+        return {"error": "Failed to update driver location"}
 
 
 async def assign_driver(order_id: str, driver_id: str) -> Dict[str, Any]:
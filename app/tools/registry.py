@@ -1,5 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional
 import importlib
+import inspect
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,57 +27,94 @@ _TOOL_MAP = {
     # driver tools
     "find_available_drivers": ("app.tools.driver_tools", "find_available_drivers"),
     "calculate_distance": ("app.tools.driver_tools", "calculate_distance"),
+    "find_nearest_drivers": ("app.tools.driver_tools", "find_nearest_drivers"),
+    "update_driver_location": ("app.tools.driver_tools", "update_driver_location"),
     # ... add other tools as needed
 }
 
 
+class ResolvedTool:
+    """A tool's callable plus what dispatch needs to know about it, computed once."""
+
+    __slots__ = ("name", "func", "is_async", "parameters", "accepts_kwargs")
+
+    def __init__(self, name: str, func: Callable):
+        if not callable(func):
+            raise ValueError(f"Tool {name} is not callable")
+        signature = inspect.signature(func)
+        self.name = name
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+        self.parameters = frozenset(
+            param.name for param in signature.parameters.values()
+            if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+        )
+        self.accepts_kwargs = any(param.kind is param.VAR_KEYWORD for param in signature.parameters.values())
+
+
 class ToolRegistry:
     """Simple registry to locate and execute tools by name."""
 
+    # Shared by all registries (one per agent): each tool is imported and introspected once per process
+    _resolved: Dict[str, ResolvedTool] = {}
+    _descriptors: Optional[List[Dict[str, Any]]] = None
+
     def __init__(self):
         self.tool_map = _TOOL_MAP
 
+    def register(self, tool_name: str, func: Callable):
+        """Register (or replace) a tool implementation directly; it is introspected immediately."""
+        self._resolved[tool_name] = ResolvedTool(tool_name, func)
+        ToolRegistry._descriptors = None
+
+    def resolve(self, tool_name: str) -> ResolvedTool:
+        """Return the cached tool, importing and introspecting it on first use."""
+        tool = self._resolved.get(tool_name)
+        if tool is not None:
+            return tool
+        if tool_name not in self.tool_map:
+            raise ValueError(f"Tool {tool_name} not found in registry")
+
+        module_path, func_name = self.tool_map[tool_name]
+        tool = ResolvedTool(tool_name, getattr(importlib.import_module(module_path), func_name))
+        self._resolved[tool_name] = tool
+        return tool
+
     def get_tools_for_agent(self, agent_name: str) -> List[Dict[str, Any]]:
         """
         Return a list of tool descriptors available to the agent.
         For simplicity, return all tools; you can restrict per-agent as needed.
+        The list is built once and shared; treat it as read-only.
         """
-        tools = []
-        for name in self.tool_map:
-            tools.append({
-                "name": name,
-                "description": f"Tool: {name}"
-            })
-        return tools
+        if ToolRegistry._descriptors is None:
+            names = list(dict.fromkeys([*self.tool_map, *self._resolved]))
+            ToolRegistry._descriptors = [{"name": name, "description": f"Tool: {name}"} for name in names]
+        return ToolRegistry._descriptors
 
     def get_tool_parameters(self, tool_name: str) -> List[str]:
         """
-        Return parameter names expected by a tool, used to decide whether to inject session_data.
-        This is a lightweight heuristic: many tools accept 'session_data'.
+        Return parameter names accepted by a tool (from its signature), used to decide
+        whether to inject session_data. Unknown tools have none.
         """
-        # In a real registry, you'd introspect the function signature.
-        if tool_name in ["add_to_order", "remove_from_order", "place_order"]:
-            return ["session_data"]
-        return []
+        try:
+            return list(self.resolve(tool_name).parameters)
+        except ValueError:
+            return []
 
     async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]):
-        """Dynamically import and execute a tool function. Supports both sync and async callables."""
-        if tool_name not in self.tool_map:
-            raise ValueError(f"Tool {tool_name} not found in registry")
+        """Execute a tool by name. Supports both sync and async callables."""
+        tool = self._resolved.get(tool_name) or self.resolve(tool_name)
 
-        module_path, func_name = self.tool_map[tool_name]
-        module = importlib.import_module(module_path)
-        func = getattr(module, func_name)
-
-        # Call function; if coroutine, await it
-        if callable(func):
-            result = func(arguments) if not getattr(func, "__code__", None) or func.__code__.co_flags & 0x80 == 0 else None
-            # The above attempt to detect coroutines via flags can be unreliable; prefer:
-            import inspect
-            if inspect.iscoroutinefunction(func):
-                return await func(**arguments) if isinstance(arguments, dict) else await func(arguments)
-            else:
-                # call synchronous
-                return func(**arguments) if isinstance(arguments, dict) else func(arguments)
+        if not isinstance(arguments, dict):
+            result = tool.func(arguments)
+        elif tool.accepts_kwargs or arguments.keys() <= tool.parameters:
+            result = tool.func(**arguments)
         else:
-            raise ValueError(f"Tool {tool_name} is not callable")
+            # Drop arguments the tool doesn't take (e.g. invented by the model)
+            ignored = arguments.keys() - tool.parameters
+            logger.warning(f"Ignoring unexpected arguments for {tool_name}: {sorted(ignored)}")
+            result = tool.func(**{k: v for k, v in arguments.items() if k in tool.parameters})
+
+        if tool.is_async or inspect.isawaitable(result):
+            return await result
+        return result
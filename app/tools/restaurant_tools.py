@@ -1,22 +1,44 @@
 from typing import Dict, List, Optional, Any
 import logging
-from ..core.database import SessionLocal
-# from ..models.database import Restaurant, Order, MenuItem
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.database import Restaurant, Order
 import json
 import asyncio
 
 logger = logging.getLogger(__name__)
 
 
+# NOTE: Lookups use the async engine (AsyncSessionLocal). Unknown restaurants and
+# orders, and database errors, are reported to the caller; only with TOOLS_DEMO_DATA
+# (local development without a database) do they fall back to simulated results.
+
+
+async def _get_row(model, row_id):
+    """Primary-key lookup on the async engine; None if missing or non-numeric (or no database with TOOLS_DEMO_DATA)."""
+    try:
+        row_id = int(row_id)
+    except (TypeError, ValueError):
+        return None
+    try:
+        async with AsyncSessionLocal() as db:
+            return await db.get(model, row_id)
+    except Exception as e:
+        if not settings.TOOLS_DEMO_DATA:
+            raise
+        logger.warning(f"{model.__name__} lookup unavailable: {e}")
+        return None
+
+
 async def notify_restaurant(restaurant_id: str, order_details: Dict) -> Dict[str, Any]:
-    """Notify restaurant about a new order (mock implementation)."""
+    """Notify restaurant about a new order (mock notification, DB-backed restaurant lookup)."""
     try:
-        db = SessionLocal()
-        # restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
-        restaurant = None  # placeholder
+        restaurant = await _get_row(Restaurant, restaurant_id)
 
         if not restaurant:
-            # Fallback: return a simulated notification result
+            if not settings.TOOLS_DEMO_DATA:
+                return {"error": "Restaurant not found"}
+            # Demo: return a simulated notification result
             return {
                 "success": True,
                 "restaurant_name": f"Restaurant-{restaurant_id}",
@@ -36,22 +58,13 @@ async def notify_restaurant(restaurant_id: str, order_details: Dict) -> Dict[str
     except Exception as e:
         logger.error(f"Error notifying restaurant: {e}")
         return {"error": "Failed to notify restaurant"}
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
 
 
 async def confirm_preparation_time(order_id: str, estimated_minutes: int) -> Dict[str, Any]:
-    """Confirm preparation time (mock): update DB or return success."""
+    """Confirm preparation time, recorded on the order's timeline."""
     try:
-        db = SessionLocal()
-        # order = db.query(Order).filter(Order.id == order_id).first()
-        # if not order:
-        #     return {"error": "Order not found"}
-
-        # Update logic would go here
+        if not await _record_preparation_time(order_id, estimated_minutes) and not settings.TOOLS_DEMO_DATA:
+            return {"error": "Order not found"}
         return {
             "success": True,
             "order_id": order_id,
@@ -61,11 +74,28 @@ async def confirm_preparation_time(order_id: str, estimated_minutes: int) -> Dic
     except Exception as e:
         logger.error(f"Error confirming preparation time: {e}")
         return {"error": "Failed to confirm preparation time"}
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+
+
+async def _record_preparation_time(order_id: str, estimated_minutes: int) -> bool:
+    """False if the order is unknown (or no database with TOOLS_DEMO_DATA)."""
+    try:
+        order_id = int(order_id)
+    except (TypeError, ValueError):
+        return False
+    try:
+        async with AsyncSessionLocal() as db:
+            order = await db.get(Order, order_id)
+            if not order:
+                return False
+            # New dict so the JSON column change is detected
+            order.timeline = {**(order.timeline or {}), "preparation_time_minutes": estimated_minutes}
+            await db.commit()
+            return True
+    except Exception as e:
+        if not settings.TOOLS_DEMO_DATA:
+            raise
+        logger.warning(f"Could not record preparation time for order {order_id}: {e}")
+        return False
 
 
 async def handle_unavailable_item(order_id: str, unavailable_item_id: str, reason: str = "out of stock") -> Dict[str, Any]:
@@ -0,0 +1,28 @@
+"""
+Render all static voice prompts into a versioned TTS bundle.
+Usage: python scripts/build_tts_bundle.py [--out assets/tts_bundle] [--concurrency 4]
+Requires ELEVENLABS_API_KEY and ELEVENLABS_VOICE_EN/HI/TA.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.services.tts_prewarm import build_bundle
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default=settings.TTS_BUNDLE_DIR)
+    parser.add_argument("--concurrency", type=int, default=settings.TTS_PREWARM_CONCURRENCY)
+    args = parser.parse_args()
+
+    version = asyncio.run(build_bundle(args.out, args.concurrency))
+    if version is None:
+        raise SystemExit("No prompts rendered")
+    logger.info(f"Bundle {version} written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -71,6 +71,244 @@ def fake_state_manager():
     sm = StateManager(use_fake=True)
     return sm
 
+# ---------------------------------------------------------------------
+# HTTP STUBS
+# ---------------------------------------------------------------------
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """
+    route(module, handler): make `module`'s get_http_client() return an
+    AsyncClient on httpx.MockTransport(handler). Like the real pool, one client
+    per name; every client is closed on teardown.
+    """
+    import asyncio
+    import httpx
+
+    clients = []
+
+    def route(module, handler):
+        pool = {}
+
+        def fake_client(name, base_url="", **kwargs):
+            if name not in pool:
+                pool[name] = httpx.AsyncClient(base_url=base_url, transport=httpx.MockTransport(handler))
+                clients.append(pool[name])
+            return pool[name]
+
+        monkeypatch.setattr(f"{module}.get_http_client", fake_client)
+
+    yield route
+    for http_client in clients:
+        asyncio.run(http_client.aclose())
+
+# ---------------------------------------------------------------------
+# GOOGLE MAPS STUB
+# ---------------------------------------------------------------------
+
+class MapsStub:
+    """
+    Local stand-in for the Google Maps REST API (geocode, distancematrix,
+    directions). Distances are straight-line x ROAD_FACTOR at SPEED_KMPH.
+    Every request is recorded in `requests`.
+    """
+
+    ROAD_FACTOR = 1.3
+    SPEED_KMPH = 30.0
+
+    def __init__(self):
+        self.requests = []
+        self.addresses = {}
+        self.status = "OK"
+
+    def handle(self, request):
+        import httpx
+        from app.tools.driver_tools import calculate_distance
+
+        self.requests.append(request)
+        if self.status != "OK":
+            return httpx.Response(200, json={"status": self.status, "error_message": "stubbed failure"})
+        params = request.url.params
+        path = request.url.path
+
+        def point(text):
+            lat, lng = text.split(",")
+            return float(lat), float(lng)
+
+        def leg(origin, destination):
+            meters = calculate_distance(*origin, *destination) * self.ROAD_FACTOR * 1000
+            seconds = meters / (self.SPEED_KMPH * 1000 / 3600)
+            return {"distance": {"value": round(meters)},
+                    "duration": {"value": round(seconds), "text": f"{round(seconds / 60)} mins"}}
+
+        if path == "/maps/api/geocode/json" and "address" in params:
+            location = self.addresses.get(params["address"])
+            if location is None:
+                return httpx.Response(200, json={"status": "ZERO_RESULTS", "results": []})
+            return httpx.Response(200, json={"status": "OK", "results": [{
+                "formatted_address": params["address"].title(),
+                "geometry": {"location": {"lat": location[0], "lng": location[1]}},
+            }]})
+        if path == "/maps/api/geocode/json":
+            return httpx.Response(200, json={"status": "OK", "results": [{"formatted_address": f"Near {params['latlng']}"}]})
+        if path == "/maps/api/distancematrix/json":
+            origins = [point(p) for p in params["origins"].split("|")]
+            destinations = [point(p) for p in params["destinations"].split("|")]
+            rows = [{"elements": [{"status": "OK", **leg(o, d)} for d in destinations]} for o in origins]
+            return httpx.Response(200, json={"status": "OK", "rows": rows})
+        if path == "/maps/api/directions/json":
+            route_leg = leg(point(params["origin"]), point(params["destination"]))
+            return httpx.Response(200, json={"status": "OK", "routes": [
+                {"legs": [route_leg], "overview_polyline": {"points": "stub"}}
+            ]})
+        return httpx.Response(404, json={"status": "NOT_FOUND"})
+
+
+@pytest.fixture
+def maps_stub(monkeypatch, mock_http):
+    """Route MapsService to MapsStub, with empty caches."""
+    from app.services.maps_service import MapsService
+
+    stub = MapsStub()
+    mock_http("app.services.maps_service", stub.handle)
+    monkeypatch.setattr("app.services.maps_service.settings.GOOGLE_MAPS_API_KEY", "maps-test-key")
+    MapsService.geocode_cache.clear()
+    MapsService.eta_cache.clear()
+    MapsService._inflight.clear()
+    yield stub
+    MapsService.geocode_cache.clear()
+    MapsService.eta_cache.clear()
+
+
+class EmbeddingsStub:
+    """
+    Local stand-in for OpenAI /v1/embeddings: bag-of-words vectors hashed into
+    DIM buckets, so texts sharing words score higher. Optional per-request
+    `delay` simulates network latency; `batches` records each request's inputs.
+    """
+
+    DIM = 64
+
+    def __init__(self):
+        self.batches = []
+        self.delay = 0.0
+
+    @classmethod
+    def embed(cls, text):
+        import hashlib
+        import math
+        import re
+
+        vector = [0.0] * cls.DIM
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % cls.DIM] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    async def handle(self, request):
+        import asyncio
+        import json
+        import httpx
+
+        texts = json.loads(request.content)["input"]
+        self.batches.append(texts)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return httpx.Response(200, json={"data": [
+            {"index": i, "embedding": self.embed(text)} for i, text in enumerate(texts)
+        ]})
+
+
+@pytest.fixture
+def embeddings_stub(mock_http):
+    """Route VectorService embeddings to EmbeddingsStub."""
+    stub = EmbeddingsStub()
+    mock_http("app.services.vector_service", stub.handle)
+    yield stub
+
+
+@pytest.fixture
+def vector_service(embeddings_stub, tmp_path):
+    """VectorService on an in-memory Qdrant with stub embeddings; local snapshots go to tmp_path."""
+    from qdrant_client import AsyncQdrantClient
+    from app.services.vector_service import VectorService
+
+    VectorService.query_cache.clear()
+    yield VectorService(client=AsyncQdrantClient(location=":memory:"), dim=EmbeddingsStub.DIM,
+                        local_index_dir=str(tmp_path / "vector_index"))
+    VectorService.query_cache.clear()
+
+class StripeStub:
+    """
+    Local stand-in for the Stripe PaymentIntents API (create, retrieve) with
+    Stripe's idempotency semantics: a repeated Idempotency-Key replays the
+    first response (Idempotent-Replayed: true), and reusing a key with other
+    parameters is a 400. Optional per-request `delay` simulates latency;
+    `requests` records every request and `intents` every intent created.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.intents = {}
+        self.replies = {}
+        self.delay = 0.0
+        self.fail_next = 0
+
+    async def handle(self, request):
+        import asyncio
+        import uuid
+        from urllib.parse import parse_qsl
+        import httpx
+
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_next:
+            self.fail_next -= 1
+            return httpx.Response(503, json={"error": {"message": "stubbed outage"}})
+
+        path = request.url.path
+        if request.method == "GET" and path.startswith("/v1/payment_intents/"):
+            intent = self.intents.get(path.rsplit("/", 1)[1])
+            if intent is None:
+                return httpx.Response(404, json={"error": {"message": "No such payment_intent"}})
+            return httpx.Response(200, json=intent)
+        if request.method == "POST" and path == "/v1/payment_intents":
+            params = dict(parse_qsl(request.content.decode()))
+            key = request.headers.get("Idempotency-Key")
+            if key in self.replies:
+                first_params, intent = self.replies[key]
+                if first_params != params:
+                    return httpx.Response(400, json={"error": {"type": "idempotency_error",
+                                                               "message": "Keys for idempotent requests can only be used with the same parameters"}})
+                return httpx.Response(200, json=intent, headers={"Idempotent-Replayed": "true"})
+            intent_id = f"pi_stub_{uuid.uuid4().hex[:16]}"
+            intent = {
+                "id": intent_id, "object": "payment_intent", "client_secret": f"{intent_id}_secret",
+                "status": "requires_payment_method", "amount": int(params["amount"]), "currency": params["currency"],
+                "metadata": {k[len("metadata["):-1]: v for k, v in params.items() if k.startswith("metadata[")},
+            }
+            self.intents[intent_id] = intent
+            if key:
+                self.replies[key] = (params, intent)
+            return httpx.Response(200, json=intent)
+        return httpx.Response(404, json={"error": {"message": "Unrecognized request URL"}})
+
+
+@pytest.fixture
+def stripe_stub(monkeypatch, mock_http):
+    """Route PaymentService's async Stripe calls to StripeStub, with an empty intent cache."""
+    from app.services.payment_service import PaymentService
+
+    stub = StripeStub()
+    mock_http("app.services.payment_service", stub.handle)
+    monkeypatch.setattr("app.services.payment_service.settings.STRIPE_API_KEY", "sk_test_stub")
+    monkeypatch.setattr("app.services.payment_service.LLMService._backoff", staticmethod(lambda attempt: 0))
+    PaymentService.intent_cache.clear()
+    PaymentService._inflight.clear()
+    yield stub
+    PaymentService.intent_cache.clear()
+
 # ---------------------------------------------------------------------
 # FASTAPI CLIENT FIXTURE
 # ---------------------------------------------------------------------
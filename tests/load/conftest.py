@@ -0,0 +1,128 @@
+"""
+Local stub of the third-party HTTP APIs used by the load benchmarks.
+A threaded HTTP/1.1 keep-alive server; each route returns a canned
+response after an optional delay that stands in for provider latency.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open hundreds of connections at once; the default backlog of 5 drops them
+    request_queue_size = 512
+
+
+class StubServer:
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def route(self, method: str, path: str, body, status: int = 200, delay: float = 0.0,
+              content_type: str = "application/json", chunks=None, chunk_delay: float = 0.0):
+        """
+        Register a canned response; `body` may be a dict/list (JSON), bytes, or a callable(request_body).
+        With `chunks` (list of bytes) the response is sent chunked, `chunk_delay` apart.
+        """
+        self.routes[(method.upper(), path)] = (body, status, delay, content_type, chunks, chunk_delay)
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests.clear()
+            self.connections = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. a deadline test); nothing to answer
+                    pass
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request_body = self.rfile.read(length) if length else b""
+                path = urlparse(self.path).path
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, request_body))
+
+                route = stub.routes.get((self.command, path))
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body, status, delay, content_type, chunks, chunk_delay = route
+                if delay:
+                    time.sleep(delay)
+                if chunks is not None:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i, chunk in enumerate(chunks):
+                        if i and chunk_delay:
+                            time.sleep(chunk_delay)
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                if callable(body):
+                    body = body(request_body)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _respond
+            do_POST = _respond
+
+        return Handler
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer().start()
+    yield server
+    server.stop()
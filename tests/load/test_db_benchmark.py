@@ -0,0 +1,149 @@
+"""
+Concurrent tool-lookup benchmark: sync SessionLocal vs the async engine.
+Each simulated call runs the database reads the tools make around an order
+(customer profile with recent orders, restaurant, available drivers); both
+paths issue the same statements. Every statement gets DB_LATENCY of simulated
+server time (SQLite trace hook). Writes are not measured: place_order is
+still a mock.
+
+- before: the old tool pattern, a sync Session inside each coroutine, which
+  blocks the event loop for every query so calls are processed serially
+- after: the migrated tools on AsyncSessionLocal with a pooled async engine,
+  so queries from concurrent calls overlap
+
+Run with `pytest tests/load/test_db_benchmark.py -s` to see timings.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.database import create_async_db_engine
+from app.models.database import Base, Customer, Driver, Order, OrderStatus, Restaurant
+from app.tools import customer_tools, driver_tools, restaurant_tools
+
+CALLS = 40
+POOL_SIZE = 10
+DB_LATENCY = 0.01
+PHONE = "+15550003333"
+LOCATION = {"latitude": 12.97, "longitude": 77.59}
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _slow_statement(_sql):
+    time.sleep(DB_LATENCY)
+
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'orders.db'}"
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    tables = [Base.metadata.tables[name] for name in ("customers", "restaurants", "drivers", "orders")]
+    Base.metadata.create_all(sync_engine, tables=tables)
+
+    now = datetime.utcnow()  # updated_at is NOT NULL in the models
+    with sessionmaker(bind=sync_engine)() as db:
+        customer = Customer(name="Asha", phone_number=PHONE, address={"line1": "123 Main St"}, updated_at=now)
+        restaurant = Restaurant(name="Spice Route", address={}, operating_hours={}, updated_at=now)
+        db.add_all([customer, restaurant])
+        db.add_all([
+            Driver(
+                name=f"Driver {i}", phone_number=f"+1555000{i:04d}", vehicle_number=f"KA-{i}",
+                current_location={"latitude": LOCATION["latitude"] + i * 0.002, "longitude": LOCATION["longitude"]},
+                updated_at=now,
+            )
+            for i in range(20)
+        ])
+        db.flush()
+        db.add_all([
+            Order(customer_id=customer.id, restaurant_id=restaurant.id, status=OrderStatus.DELIVERED,
+                  total_amount=20.0 + i, delivery_address={}, updated_at=now)
+            for i in range(3)
+        ])
+        db.commit()
+        restaurant_id = restaurant.id
+
+    event.listen(sync_engine, "connect", lambda conn, _record: conn.set_trace_callback(_slow_statement))
+    sync_engine.dispose()
+
+    # SQLite defaults to NullPool; use a queue pool as a server database would
+    async_engine = create_async_db_engine(
+        url, poolclass=AsyncAdaptedQueuePool, pool_size=POOL_SIZE, max_overflow=0,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(
+        async_engine.sync_engine, "connect",
+        lambda conn, _record: conn.run_async(lambda driver: driver.set_trace_callback(_slow_statement)),
+    )
+    yield sync_engine, async_engine, restaurant_id
+    sync_engine.dispose()
+
+
+async def _legacy_lookups(SessionLocal, restaurant_id):
+    """The pre-migration tools: sync queries straight inside the coroutine."""
+    db = SessionLocal()
+    try:
+        customer = db.query(Customer).filter(Customer.phone_number == PHONE).first()
+        (db.query(Order).options(selectinload(Order.restaurant)).filter(Order.customer_id == customer.id)
+         .order_by(Order.created_at.desc()).limit(5).all())
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        db.get(Restaurant, restaurant_id)
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        drivers = db.query(Driver).filter(Driver.is_available == True).all()  # noqa: E712
+    finally:
+        db.close()
+    return customer.id, len(drivers)
+
+
+async def _lookups(restaurant_id):
+    profile = await customer_tools.get_customer_profile(PHONE)
+    await restaurant_tools.notify_restaurant(str(restaurant_id), {})
+    drivers = await driver_tools.find_available_drivers(LOCATION, radius_km=10)
+    return profile["id"], len(drivers)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookup_throughput(database, monkeypatch):
+    sync_engine, async_engine, restaurant_id = database
+
+    LegacySession = sessionmaker(bind=sync_engine)
+    start = time.perf_counter()
+    before = await asyncio.gather(*[_legacy_lookups(LegacySession, restaurant_id) for _ in range(CALLS)])
+    before_elapsed = time.perf_counter() - start
+
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    for module in (customer_tools, driver_tools, restaurant_tools):
+        monkeypatch.setattr(module, "AsyncSessionLocal", session_factory)
+    try:
+        start = time.perf_counter()
+        after = await asyncio.gather(*[_lookups(restaurant_id) for _ in range(CALLS)])
+        after_elapsed = time.perf_counter() - start
+    finally:
+        await async_engine.dispose()
+
+    print(
+        f"\n{CALLS} concurrent calls: sync session {CALLS / before_elapsed:.0f} calls/s "
+        f"({before_elapsed * 1000:.0f} ms), async pool of {POOL_SIZE} {CALLS / after_elapsed:.0f} calls/s "
+        f"({after_elapsed * 1000:.0f} ms)"
+    )
+    # Same data either way: the real customer and all 20 drivers within 10 km
+    assert before == after == [(before[0][0], 20)] * CALLS
+    assert after_elapsed < before_elapsed / 2
@@ -0,0 +1,41 @@
+"""
+Distance micro-benchmark: vectorized calculate_distance_matrix vs a loop of
+scalar calculate_distance calls.
+- 1 driver x 10k restaurants
+- 1k x 1k (driver/restaurant assignment)
+Run with `pytest tests/load/test_distance_benchmark.py -s` to see timings.
+"""
+
+import time
+
+import numpy as np
+
+from app.tools.driver_tools import calculate_distance, calculate_distance_matrix
+
+
+def _points(rng, n):
+    return np.column_stack([rng.uniform(12.6, 13.3, n), rng.uniform(77.2, 77.9, n)])
+
+
+def _compare(origins, destinations):
+    start = time.perf_counter()
+    matrix = calculate_distance_matrix(origins, destinations)
+    vector_ms = (time.perf_counter() - start) * 1000
+
+    origin_list, destination_list = origins.tolist(), destinations.tolist()
+    start = time.perf_counter()
+    loop = [[calculate_distance(lat1, lon1, lat2, lon2) for lat2, lon2 in destination_list] for lat1, lon1 in origin_list]
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    np.testing.assert_allclose(matrix, loop, rtol=1e-9)
+    return vector_ms, loop_ms
+
+
+def test_distance_matrix_vs_scalar_loop():
+    rng = np.random.default_rng(5)
+    one_vs_many = _compare(_points(rng, 1), _points(rng, 10_000))
+    many_vs_many = _compare(_points(rng, 1_000), _points(rng, 1_000))
+
+    for label, (vector_ms, loop_ms) in (("1 x 10k", one_vs_many), ("1k x 1k", many_vs_many)):
+        print(f"\n{label}: numpy {vector_ms:.2f} ms, scalar loop {loop_ms:.1f} ms ({loop_ms / vector_ms:.0f}x)")
+        assert vector_ms * 5 < loop_ms
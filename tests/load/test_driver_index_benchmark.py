@@ -0,0 +1,46 @@
+"""
+Nearest-driver lookup benchmark: grid index vs the per-driver Haversine loop.
+30k online drivers spread over a ~65 x 65 km metro area; queries from random
+restaurant locations inside it.
+Run with `pytest tests/load/test_driver_index_benchmark.py -s` to see timings.
+"""
+
+import random
+import time
+
+from app.services.driver_index import DriverIndex
+from app.tools.driver_tools import calculate_distance
+
+DRIVERS = 30_000
+QUERIES = 500
+CENTER = (12.97, 77.59)
+
+
+def test_nearest_driver_lookup_is_sub_millisecond():
+    rng = random.Random(11)
+    drivers = [(i, CENTER[0] + rng.uniform(-0.3, 0.3), CENTER[1] + rng.uniform(-0.3, 0.3)) for i in range(DRIVERS)]
+    index = DriverIndex(cell_degrees=0.01)
+    for driver_id, lat, lon in drivers:
+        index.upsert(driver_id, lat, lon)
+    queries = [(CENTER[0] + rng.uniform(-0.25, 0.25), CENTER[1] + rng.uniform(-0.25, 0.25)) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    nearest = [index.nearest(lat, lon, k=5) for lat, lon in queries]
+    nearest_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    start = time.perf_counter()
+    for lat, lon in queries:
+        index.within(lat, lon, 2.0)
+    within_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    start = time.perf_counter()
+    for lat, lon in queries[:10]:
+        sorted((calculate_distance(lat, lon, dlat, dlon), i) for i, dlat, dlon in drivers)[:5]
+    scan_ms = (time.perf_counter() - start) * 1000 / 10
+
+    print(
+        f"\n{DRIVERS} drivers: nearest-5 {nearest_ms:.3f} ms, within 2 km {within_ms:.3f} ms, "
+        f"linear scan {scan_ms:.1f} ms per query"
+    )
+    assert all(len(found) == 5 for found in nearest)
+    assert nearest_ms * 20 < scan_ms
@@ -0,0 +1,74 @@
+"""
+Event-loop lag benchmark for LLMService against a local OpenAI-compatible stub.
+A ticker coroutine measures how late its 10 ms sleeps wake up while generations run:
+- blocking: the old pattern, a synchronous HTTP call inside `async def`
+- async:    100 concurrent `generate_reply` calls over the shared pool
+Run with `pytest tests/load/test_llm_benchmark.py -s` to see timings.
+"""
+
+import asyncio
+import time
+
+import pytest
+import requests
+
+from app.core.config import settings
+from app.services.llm_service import LLMService
+
+CONCURRENT_GENERATIONS = 100
+PROVIDER_LATENCY = 0.1
+TICK = 0.01
+REPLY = {"choices": [{"message": {"content": "Your pizza is on the way."}}]}
+
+
+async def _measure_lag(work):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    result = await work()
+    done.set()
+    await ticker_task
+    return result, max(lags)
+
+
+@pytest.fixture
+def openai_stub(stub_server, monkeypatch):
+    stub_server.route("POST", "/v1/chat/completions", REPLY, delay=PROVIDER_LATENCY)
+    monkeypatch.setattr(settings, "OPENAI_API_URL", stub_server.url)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(settings, "ANTHROPIC_API_KEY", "")
+    return stub_server
+
+
+@pytest.mark.asyncio
+async def test_llm_event_loop_lag(openai_stub):
+    async def blocking_generations():
+        # What generate_reply did before: a sync client call inside a coroutine
+        for _ in range(3):
+            requests.post(f"{openai_stub.url}/v1/chat/completions", json={}, timeout=5).json()
+
+    llm = LLMService(provider="openai")
+
+    async def async_generations():
+        return await asyncio.gather(*[llm.generate_reply("Where is my order?") for _ in range(CONCURRENT_GENERATIONS)])
+
+    _, blocking_lag = await _measure_lag(blocking_generations)
+    start = time.perf_counter()
+    replies, async_lag = await _measure_lag(async_generations)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nLLM loop lag: blocking {blocking_lag * 1000:.0f} ms max; "
+        f"{CONCURRENT_GENERATIONS} async generations {async_lag * 1000:.0f} ms max in {elapsed:.2f}s"
+    )
+    assert replies == ["Your pizza is on the way."] * CONCURRENT_GENERATIONS
+    assert blocking_lag >= PROVIDER_LATENCY * 2
+    assert async_lag < PROVIDER_LATENCY
@@ -0,0 +1,48 @@
+"""
+PaymentIntent creation benchmark against the local Stripe stub, with
+STRIPE_LATENCY per request.
+- one intent at a time (what the old blocking handler allowed) vs
+  1000 sessions creating intents concurrently over the shared pool
+- a retry storm: every session retried 3 times creates no extra intents
+Run with `pytest tests/load/test_payment_benchmark.py -s` to see timings.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.payment_service import PaymentService
+
+STRIPE_LATENCY = 0.02
+
+
+@pytest.mark.asyncio
+async def test_intent_creation_throughput(stripe_stub):
+    stripe_stub.delay = STRIPE_LATENCY
+
+    start = time.perf_counter()
+    for i in range(50):
+        await PaymentService.create_payment_intent_async(1000, session_id=f"serial-{i}")
+    serial_rate = 50 / (time.perf_counter() - start)
+
+    sessions = [f"CA{i:04d}" for i in range(1000)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(PaymentService.create_payment_intent_async(1000, session_id=s) for s in sessions))
+    concurrent_rate = len(sessions) / (time.perf_counter() - start)
+    assert all(r["success"] for r in results)
+
+    PaymentService.intent_cache.clear()
+    stripe_stub.requests.clear()
+    created = len(stripe_stub.intents)
+    start = time.perf_counter()
+    retries = await asyncio.gather(*(PaymentService.create_payment_intent_async(1000, session_id=s)
+                                     for s in sessions for _ in range(3)))
+    storm = time.perf_counter() - start
+
+    print(f"\nintents: one at a time {serial_rate:.0f}/s, concurrent {concurrent_rate:.0f}/s; "
+          f"3x retry storm over {len(sessions)} sessions: {len(stripe_stub.requests)} requests in {storm:.2f} s, "
+          f"{len(stripe_stub.intents) - created} new intents")
+    assert concurrent_rate > 10 * serial_rate
+    assert len(stripe_stub.intents) == created
+    assert [r["payment_intent"]["id"] for r in retries[::3]] == [r["payment_intent"]["id"] for r in results]
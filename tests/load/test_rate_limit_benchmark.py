@@ -0,0 +1,67 @@
+"""
+Rate limiter overhead per request:
+- TokenBucketLimiter.acquire on Redis and on the in-process fallback bucket
+- end to end: a trivial endpoint with and without RateLimitMiddleware
+fakeredis interprets the Lua script in-process, so its timings are an upper
+bound on script cost and include no network; against a real server a check
+is one EVALSHA round trip on a pooled connection (the old check_rate_limit
+opened a new connection and made two round trips).
+Run with `pytest tests/load/test_rate_limit_benchmark.py -s` to see timings.
+"""
+
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.database import create_redis_client
+from app.core.security import LocalTokenBucket, RateLimitMiddleware, TokenBucketLimiter
+
+N = 2000
+
+
+def _us(start, n=N):
+    return (time.perf_counter() - start) * 1e6 / n
+
+
+@pytest.mark.asyncio
+async def test_limiter_overhead(monkeypatch):
+    redis_limiter = TokenBucketLimiter(create_redis_client("fakeredis://"))
+    start = time.perf_counter()
+    for i in range(N):
+        await redis_limiter.acquire(f"ip:{i % 50}", capacity=1000, rate=100)
+    redis_us = _us(start)
+
+    local = LocalTokenBucket()
+    start = time.perf_counter()
+    for i in range(N):
+        local.acquire(f"ip:{i % 50}", capacity=1000, rate=100)
+    local_us = _us(start)
+
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_REQUESTS", 10 ** 9)
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_EXEMPT_PATHS", "")
+
+    async def endpoint_us(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/ping")
+            start = time.perf_counter()
+            for _ in range(N // 4):
+                await client.get("/ping")
+            return _us(start, N // 4)
+
+    def build(limiter=None):
+        app = FastAPI()
+        if limiter:
+            app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        app.get("/ping")(lambda: {"ok": True})
+        return app
+
+    bare = await endpoint_us(build())
+    limited = await endpoint_us(build(redis_limiter))
+
+    print(f"\nacquire: fakeredis/lua {redis_us:.0f} us, in-process {local_us:.1f} us; "
+          f"request {bare:.0f} us bare vs {limited:.0f} us with middleware (+{limited - bare:.0f} us)")
+    assert local_us * 20 < redis_us
+    # The middleware costs about one acquire per request
+    assert limited - bare < 3 * redis_us
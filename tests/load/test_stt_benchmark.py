@@ -0,0 +1,72 @@
+"""
+Throughput benchmark for Deepgram prerecorded transcription against a local stub:
+- baseline: blocking `transcribe_bytes` via run_in_executor (previous Orchestrator path)
+- pooled:   `transcribe_bytes_async` over the shared keep-alive client
+Run with `pytest tests/load/test_stt_benchmark.py -s` to see requests/second.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.stt_service import STTService
+
+REQUESTS = 200
+PROVIDER_LATENCY = 0.02
+DEEPGRAM_RESPONSE = {
+    "results": {"channels": [{"alternatives": [{"transcript": "one pepperoni pizza", "confidence": 0.98}]}]}
+}
+
+
+@pytest.fixture
+def deepgram_stt(stub_server):
+    stub_server.route("POST", "/v1/listen", DEEPGRAM_RESPONSE, delay=PROVIDER_LATENCY)
+    return STTService(api_key="test", prerecorded_url=f"{stub_server.url}/v1/listen")
+
+
+async def _run_executor(stt, audio):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*[
+        loop.run_in_executor(None, stt.transcribe_bytes, audio, "audio/wav") for _ in range(REQUESTS)
+    ])
+
+
+async def _run_async(stt, audio):
+    return await asyncio.gather(*[stt.transcribe_bytes_async(audio, "audio/wav") for _ in range(REQUESTS)])
+
+
+@pytest.mark.asyncio
+async def test_stt_pooled_client_throughput(deepgram_stt, stub_server):
+    audio = b"\x00" * 3200  # 200 ms of 8 kHz PCM16
+
+    start = time.perf_counter()
+    baseline = await _run_executor(deepgram_stt, audio)
+    baseline_rps = REQUESTS / (time.perf_counter() - start)
+    baseline_connections = stub_server.connections
+
+    stub_server.reset_stats()
+    start = time.perf_counter()
+    pooled = await _run_async(deepgram_stt, audio)
+    pooled_rps = REQUESTS / (time.perf_counter() - start)
+
+    print(
+        f"\nDeepgram prerecorded: executor {baseline_rps:.0f} req/s over {baseline_connections} connections, "
+        f"pooled async {pooled_rps:.0f} req/s over {stub_server.connections} connections"
+    )
+    assert baseline == pooled == ["one pepperoni pizza"] * REQUESTS
+    # Keep-alive pool: connections are reused instead of one per request
+    assert baseline_connections == REQUESTS
+    assert stub_server.connections <= settings.DEEPGRAM_MAX_CONCURRENCY
+
+
+@pytest.mark.asyncio
+async def test_stt_async_deadline(stub_server):
+    stub_server.route("POST", "/v1/listen", DEEPGRAM_RESPONSE, delay=0.5)
+    stt = STTService(api_key="test", prerecorded_url=f"{stub_server.url}/v1/listen")
+    stt.timeout = 0.1
+
+    start = time.perf_counter()
+    assert await stt.transcribe_bytes_async(b"\x00" * 320) is None
+    assert time.perf_counter() - start < 0.4
@@ -0,0 +1,42 @@
+"""
+Multi-tool turn benchmark for BaseAgent._execute_tool_calls.
+Three independent I/O tools (profile lookup, address check, driver search) with
+different latencies should finish in about max(latency), not sum(latency).
+Run with `pytest tests/load/test_tool_benchmark.py -s` to see timings.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.agents.customer_order_agent import CustomerOrderAgent
+
+TOOL_LATENCY = {"get_customer_profile": 0.1, "verify_address": 0.2, "find_available_drivers": 0.3}
+
+
+class SlowRegistry:
+    def get_tool_parameters(self, tool_name):
+        return []
+
+    async def execute_tool(self, tool_name, arguments):
+        await asyncio.sleep(TOOL_LATENCY[tool_name])
+        return {"tool": tool_name}
+
+
+@pytest.mark.asyncio
+async def test_multi_tool_turn_latency():
+    agent = CustomerOrderAgent()
+    agent.tool_registry = SlowRegistry()
+    calls = [{"id": f"call_{i}", "name": name, "arguments": {}} for i, name in enumerate(TOOL_LATENCY)]
+
+    start = time.perf_counter()
+    results = await agent._execute_tool_calls(calls, {})
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\nMulti-tool turn: {elapsed * 1000:.0f} ms "
+        f"(max {max(TOOL_LATENCY.values()) * 1000:.0f} ms, sum {sum(TOOL_LATENCY.values()) * 1000:.0f} ms)"
+    )
+    assert [r["tool_name"] for r in results] == list(TOOL_LATENCY)
+    assert elapsed < max(TOOL_LATENCY.values()) + 0.1
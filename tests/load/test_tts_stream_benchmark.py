@@ -0,0 +1,45 @@
+"""
+Time-to-first-audio benchmark for streaming TTS against a local ElevenLabs stub
+that emits 16 kHz PCM in chunks (simulating synthesis progressing in real time).
+Run with `pytest tests/load/test_tts_stream_benchmark.py -s` to see timings.
+"""
+
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.tts_cache import TTSCache
+from app.services.tts_service import FRAME_BYTES, TTSService
+
+CHUNKS = 10
+CHUNK_DELAY = 0.1
+CHUNK_PCM = b"\x00\x10" * 3200  # 200 ms of 16 kHz PCM16 per chunk
+
+
+@pytest.mark.asyncio
+async def test_streaming_time_to_first_frame(stub_server, monkeypatch):
+    stub_server.route(
+        "POST", "/v1/text-to-speech/voice-en/stream", None,
+        content_type="application/octet-stream", chunks=[CHUNK_PCM] * CHUNKS, chunk_delay=CHUNK_DELAY,
+    )
+    monkeypatch.setattr(settings, "ELEVENLABS_API_URL", stub_server.url)
+    monkeypatch.setattr(settings, "ELEVENLABS_STREAM_FORMAT", "pcm_16000")
+    tts = TTSService(api_key="test")
+    tts.cache = TTSCache(max_memory_bytes=1024 * 1024)
+
+    start = time.perf_counter()
+    first_frame_at = None
+    frames = 0
+    async for frame in tts.synthesize_stream("A long sentence " * 20, voice="voice-en"):
+        if first_frame_at is None:
+            first_frame_at = time.perf_counter() - start
+        assert len(frame) == FRAME_BYTES
+        frames += 1
+    total = time.perf_counter() - start
+
+    print(f"\nStreaming TTS: first frame after {first_frame_at * 1000:.0f} ms, {frames} frames in {total * 1000:.0f} ms")
+    assert frames == CHUNKS * 10  # 2 s of audio in 20 ms frames
+    assert first_frame_at < 0.3
+    assert total >= CHUNK_DELAY * (CHUNKS - 1)
+    assert len(tts.cache) == 1
@@ -0,0 +1,115 @@
+"""
+Menu indexing benchmark: the old one-embedding-request-per-item loop vs the
+batched upsert_menu_items pipeline, with EMBEDDING_LATENCY per request.
+- 200 items, both ways
+- 20k-item catalog through the pipeline, then a re-index with nothing changed
+- hybrid search over a 10k-item catalog: in-process lexical hits vs
+  embedding + Qdrant for the same spoken queries
+- local int8 index: 20k x 1536-dim search latency and memory vs float32
+Qdrant runs in memory, so this measures request count and overlap, not Qdrant.
+Run with `pytest tests/load/test_vector_benchmark.py -s` to see timings.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from app.services.local_vector_index import LocalVectorIndex
+
+EMBEDDING_LATENCY = 0.01
+
+
+def _menu(n):
+    return ({"id": i, "name": f"Dish {i}", "description": f"House special number {i}", "price": 100}
+            for i in range(n))
+
+
+@pytest.mark.asyncio
+async def test_batched_indexing_vs_per_item(vector_service, embeddings_stub):
+    embeddings_stub.delay = EMBEDDING_LATENCY
+    await vector_service.ensure_collection()
+
+    items = list(_menu(200))
+    start = time.perf_counter()
+    for item in items:
+        await vector_service._get_embedding(f"{item['name']} - {item['description']}")
+    per_item = time.perf_counter() - start
+
+    embeddings_stub.batches.clear()
+    start = time.perf_counter()
+    await vector_service.upsert_menu_items(items)
+    batched = time.perf_counter() - start
+
+    print(f"\n200 items: per-item {per_item * 1000:.0f} ms ({200} requests), "
+          f"batched {batched * 1000:.0f} ms ({len(embeddings_stub.batches)} requests)")
+    assert len(embeddings_stub.batches) == 1
+    assert batched * 5 < per_item
+
+
+@pytest.mark.asyncio
+async def test_catalog_reindex(vector_service, embeddings_stub):
+    embeddings_stub.delay = EMBEDDING_LATENCY
+
+    start = time.perf_counter()
+    first = await vector_service.upsert_menu_items(_menu(20_000))
+    indexed = time.perf_counter() - start
+    requests = len(embeddings_stub.batches)
+
+    start = time.perf_counter()
+    again = await vector_service.upsert_menu_items(_menu(20_000))
+    reindexed = time.perf_counter() - start
+
+    print(f"\n20k items: indexed in {indexed:.1f} s ({requests} embedding requests, "
+          f"{20_000 / indexed:.0f} items/s); unchanged re-index {reindexed:.1f} s")
+    assert first["upserted"] == again["unchanged"] == 20_000
+    assert len(embeddings_stub.batches) == requests
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_latency(vector_service, embeddings_stub):
+    dishes = ["pizza", "burger", "pasta", "roll", "curry", "biryani", "salad", "soup", "wrap", "noodles"]
+    styles = ["pepperoni", "veggie", "paneer", "chicken", "spicy", "classic", "bbq", "garlic", "mushroom", "tandoori"]
+    items = [
+        {"id": i, "name": f"{styles[i % 10].title()} {dishes[i // 10 % 10].title()} {i}",
+         "description": f"{styles[(i // 100) % 10]} special with house sauce"}
+        for i in range(10_000)
+    ]
+    await vector_service.upsert_menu_items(items)
+    queries = [f"I want a {styles[i % 10]} {dishes[i // 10 % 10]} {i} please" for i in range(0, 10_000, 10)]
+
+    embeddings_stub.batches.clear()
+    start = time.perf_counter()
+    for query in queries:
+        hits = await vector_service.semantic_search(query, top_k=5)
+    lexical_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    assert embeddings_stub.batches == []
+    assert hits[0]["id"] == 9990
+
+    embeddings_stub.delay = EMBEDDING_LATENCY
+    start = time.perf_counter()
+    for query in queries[:50]:
+        await vector_service.semantic_search(query, top_k=5, mode="vector")
+    vector_ms = (time.perf_counter() - start) * 1000 / 50
+
+    print(f"\nmenu search over 10k items: lexical {lexical_ms:.3f} ms/query, "
+          f"embedding + Qdrant {vector_ms:.1f} ms/query")
+    assert lexical_ms * 10 < vector_ms
+
+
+def test_local_index_search_latency():
+    rng = np.random.default_rng(3)
+    n, dim = 20_000, 1536
+    index = LocalVectorIndex(dim)
+    for start in range(0, n, 2_000):
+        index.upsert(list(range(start, start + 2_000)), rng.normal(size=(2_000, dim)).astype(np.float32), [{}] * 2_000)
+
+    queries = rng.normal(size=(20, dim)).astype(np.float32)
+    start = time.perf_counter()
+    hits = [index.search(query, top_k=5) for query in queries]
+    search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    codes_mb = index._codes[:n].nbytes / 2**20
+    print(f"\nlocal index {n} x {dim}: {search_ms:.1f} ms/query, vectors {codes_mb:.0f} MB int8 "
+          f"(float32 would be {codes_mb * 4:.0f} MB)")
+    assert all(len(found) == 5 for found in hits)
@@ -0,0 +1,65 @@
+"""
+Webhook burst benchmark: 500 Stripe events, each delivered 3 times at once
+(provider retries), applied by a handler that holds one of DB_POOL
+connections for APPLY_LATENCY.
+- inline: the endpoint applies the event before answering (the old path)
+- queued: the endpoint appends to the log backend (fsync, group commit)
+  and answers; workers apply in the background
+Run with `pytest tests/load/test_webhook_benchmark.py -s` to see timings.
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+
+from app.services import webhook_queue as wq
+from app.services.webhook_queue import LogWebhookBackend, WebhookQueue
+
+APPLY_LATENCY = 0.01
+DB_POOL = 10
+
+
+def _p99(samples):
+    return statistics.quantiles(samples, n=100)[98]
+
+
+@pytest.mark.asyncio
+async def test_webhook_latency_under_burst(tmp_path, monkeypatch):
+    pool = asyncio.Semaphore(DB_POOL)
+    applied = []
+
+    async def apply(event):
+        async with pool:
+            await asyncio.sleep(APPLY_LATENCY)
+        applied.append(event["id"])
+
+    deliveries = [(f"evt_{i}", f"pi_{i % 100}") for i in range(500)] * 3
+
+    async def timed(call):
+        start = time.perf_counter()
+        await call
+        return time.perf_counter() - start
+
+    inline = await asyncio.gather(*(timed(apply({"id": event_id})) for event_id, _ in deliveries))
+    applied.clear()
+
+    monkeypatch.setattr(wq, "_handlers", {"stripe": [apply]})
+    queue = WebhookQueue(LogWebhookBackend(str(tmp_path / "webhooks.log")), workers=DB_POOL)
+    queue.READ_TIMEOUT = 0.02
+    queue.start()
+    try:
+        start = time.perf_counter()
+        queued = await asyncio.gather(*(timed(queue.enqueue("stripe", event_id, "payment_intent.succeeded", obj, {}))
+                                        for event_id, obj in deliveries))
+        await queue.join()
+        drained = time.perf_counter() - start
+    finally:
+        await queue.stop()
+
+    print(f"\n{len(deliveries)} deliveries: inline p50 {statistics.median(inline) * 1000:.0f} ms / "
+          f"p99 {_p99(inline) * 1000:.0f} ms; queued p50 {statistics.median(queued) * 1000:.1f} ms / "
+          f"p99 {_p99(queued) * 1000:.1f} ms, {len(applied)} applied in {drained:.2f} s")
+    assert sorted(applied) == sorted({event_id for event_id, _ in deliveries})
+    assert _p99(queued) * 5 < _p99(inline)
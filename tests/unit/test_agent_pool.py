@@ -0,0 +1,97 @@
+"""
+Tests for the agent pool:
+- one prototype per agent type; LLM client, registry and prompt are shared
+- forks get their own history, context window and tool limiter
+- conversation state round-trips through the StateManager session (fakeredis)
+- the agents router no longer constructs an agent per request
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents.agent_pool import AgentPool
+from app.core.database import create_redis_client
+from app.orchestration.state_manager import StateManager
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_response(self, messages, tools=None, tool_choice=None, **kwargs):
+        self.calls.append(list(messages))
+        return {"content": f"reply {len(self.calls)}", "tool_calls": []}
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    AgentPool.clear()
+    yield
+    AgentPool.clear()
+
+
+@pytest.fixture
+def redis_state():
+    StateManager.use_redis(create_redis_client("fakeredis://"))
+    yield
+    StateManager.use_memory()
+
+
+def test_forks_share_immutable_parts():
+    first = AgentPool.create("support_agent")
+    second = AgentPool.create("support_agent")
+    prototype = AgentPool.prototype("support_agent")
+
+    assert first is not second and first is not prototype
+    assert first.llm_service is second.llm_service is prototype.llm_service
+    assert first.tool_registry is second.tool_registry
+    assert first.system_prompt is second.system_prompt
+    assert first.conversation_history is not second.conversation_history
+    assert first.context is not second.context
+    assert first._tool_limiter is not second._tool_limiter
+
+    first.add_message("user", "where is my refund?")
+    assert len(second.conversation_history) == 1
+    assert len(prototype.conversation_history) == 1
+
+def test_unknown_agent_type():
+    with pytest.raises(ValueError):
+        AgentPool.create("billing_agent")
+
+@pytest.mark.asyncio
+async def test_conversation_state_persists_across_requests(redis_state):
+    session_id = await StateManager.create_session("CA200", "+15550002222")
+    llm = FakeLLM()
+    AgentPool.prototype("support_agent").llm_service = llm
+
+    async with AgentPool.session("support_agent", session_id) as agent:
+        agent.context.summary = "customer asked about order 42"
+        await agent.process_message("my food was cold", {"session_id": session_id})
+
+    async with AgentPool.session("support_agent", session_id) as agent:
+        assert [m["role"] for m in agent.conversation_history] == ["system", "user", "assistant"]
+        assert agent.context.summary == "customer asked about order 42"
+        await agent.process_message("can I get a refund?", {"session_id": session_id})
+
+    # Second call saw the first exchange; other agent types start clean
+    assert [m.get("content") for m in llm.calls[1][-3:]] == ["my food was cold", "reply 1", "can I get a refund?"]
+    fresh = await AgentPool.acquire("tracking_agent", session_id)
+    assert len(fresh.conversation_history) == 1
+
+def test_router_reuses_prototype(monkeypatch):
+    from app.main import app
+
+    llm = FakeLLM()
+    AgentPool.prototype("customer_order_agent").llm_service = llm
+    built = []
+    monkeypatch.setattr(AgentPool, "AGENT_CLASSES", {**AgentPool.AGENT_CLASSES, "customer_order_agent": lambda: built.append(1)})
+
+    client = TestClient(app)
+    for i in range(3):
+        response = client.post("/api/v1/agents/agents/customer-order/process", json={"message": "I want pizza"})
+        assert response.status_code == 200
+        assert response.json()["response"]["content"] == f"reply {i + 1}"
+
+    assert built == []
+    # No session_id: every request starts from the bare system prompt
+    assert [len(messages) for messages in llm.calls] == [2, 2, 2]
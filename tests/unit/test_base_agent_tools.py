@@ -0,0 +1,83 @@
+"""
+Tests for concurrent tool execution in BaseAgent:
+- results come back in call order
+- one failing or timed-out tool doesn't affect the others
+- the per-agent concurrency cap is respected
+- session_data tools run one at a time
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.support_agent import SupportAgent
+
+
+class FakeRegistry:
+    def __init__(self, delays, session_tools=()):
+        self.delays = delays
+        self.session_tools = set(session_tools)
+        self.active = 0
+        self.max_active = 0
+        self.active_session = 0
+        self.max_active_session = 0
+
+    def get_tool_parameters(self, tool_name):
+        return ["session_data"] if tool_name in self.session_tools else []
+
+    async def execute_tool(self, tool_name, arguments):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        if tool_name in self.session_tools:
+            self.active_session += 1
+            self.max_active_session = max(self.max_active_session, self.active_session)
+        try:
+            await asyncio.sleep(self.delays[tool_name])
+            if tool_name == "broken":
+                raise RuntimeError("upstream unavailable")
+            return {"tool": tool_name}
+        finally:
+            self.active -= 1
+            if tool_name in self.session_tools:
+                self.active_session -= 1
+
+
+def _calls(*names):
+    return [{"id": f"call_{i}", "name": name, "arguments": {}} for i, name in enumerate(names)]
+
+
+@pytest.mark.asyncio
+async def test_results_in_call_order_with_isolated_failures(monkeypatch):
+    monkeypatch.setattr("app.agents.base_agent.settings.AGENT_TOOL_TIMEOUT_SECONDS", 0.1)
+    agent = SupportAgent()
+    agent.tool_registry = FakeRegistry({"slow": 0.05, "broken": 0.0, "hung": 1.0, "fast": 0.0})
+
+    results = await agent._execute_tool_calls(_calls("slow", "broken", "hung", "fast"), {})
+
+    assert [r["tool_call_id"] for r in results] == ["call_0", "call_1", "call_2", "call_3"]
+    assert results[0]["result"] == {"tool": "slow"}
+    assert results[1]["result"] == "Error: upstream unavailable"
+    assert results[2]["result"] == "Error: hung timed out"
+    assert results[3]["result"] == {"tool": "fast"}
+
+@pytest.mark.asyncio
+async def test_concurrency_cap(monkeypatch):
+    monkeypatch.setattr("app.agents.base_agent.settings.AGENT_TOOL_CONCURRENCY", 2)
+    agent = SupportAgent()
+    agent.tool_registry = FakeRegistry({f"t{n}": 0.01 for n in range(6)})
+
+    await agent._execute_tool_calls(_calls(*[f"t{n}" for n in range(6)]), {})
+    assert agent.tool_registry.max_active == 2
+
+@pytest.mark.asyncio
+async def test_session_tools_run_one_at_a_time():
+    agent = SupportAgent()
+    agent.tool_registry = FakeRegistry(
+        {"add_to_order": 0.01, "remove_from_order": 0.01, "verify_address": 0.01},
+        session_tools={"add_to_order", "remove_from_order"},
+    )
+    session_data = {"order_items": []}
+
+    await agent._execute_tool_calls(_calls("add_to_order", "remove_from_order", "verify_address"), session_data)
+    assert agent.tool_registry.max_active_session == 1
+    assert agent.tool_registry.max_active == 2
@@ -0,0 +1,90 @@
+"""
+Tests for the agent context window:
+- system prompt and the last N turns stay verbatim
+- older turns fold into the rolling summary, which is rendered into the system prompt
+  and drops its oldest text (not the newest turns) once full
+- the token budget folds further, but never the current turn
+- tool results are serialized and capped
+- prompt size stays flat over a long agent conversation
+"""
+
+import pytest
+
+from app.agents.context_window import ContextWindow
+from app.agents.support_agent import SupportAgent
+
+
+def _history(turns):
+    history = [{"role": "system", "content": "You are a support agent."}]
+    for n in range(turns):
+        history.append({"role": "user", "content": f"question {n}"})
+        history.append({"role": "assistant", "content": f"answer {n}"})
+    return history
+
+
+def test_keeps_last_turns_verbatim():
+    window = ContextWindow(max_tokens=10_000, keep_turns=2)
+    history = window.compact(_history(5))
+
+    assert [m["content"] for m in history] == [
+        "You are a support agent.", "question 3", "answer 3", "question 4", "answer 4",
+    ]
+    assert "question 0" in window.summary
+
+    rendered = window.render(history)
+    assert rendered[0]["content"].startswith("You are a support agent.")
+    assert "Summary of the earlier conversation" in rendered[0]["content"]
+    assert history[0]["content"] == "You are a support agent."  # stored prompt untouched
+
+def test_token_budget_folds_more_but_keeps_current_turn():
+    window = ContextWindow(max_tokens=50, keep_turns=5)
+    history = _history(3)
+    history.append({"role": "user", "content": "x" * 400})
+
+    window.compact(history)
+    assert [m["role"] for m in history] == ["system", "user"]
+    assert history[-1]["content"] == "x" * 400
+
+def test_full_summary_keeps_rolling_forward():
+    window = ContextWindow(max_tokens=10_000, keep_turns=1, summary_max_chars=200)
+    history = [{"role": "system", "content": "You are a support agent."}]
+    for n in range(30):
+        history.append({"role": "user", "content": f"user turn number {n} about the late order"})
+        history.append({"role": "assistant", "content": f"assistant reply {n}"})
+        window.compact(history)
+
+    assert len(window.summary) <= 200
+    assert "user turn number 28 about the late order" in window.summary
+    assert "user turn number 0 " not in window.summary
+    assert window.summary.count("...") == 1
+
+def test_short_history_untouched():
+    window = ContextWindow(max_tokens=10_000, keep_turns=3)
+    history = _history(3)
+    assert window.compact(history) == _history(3)
+    assert window.summary == ""
+
+def test_tool_results_capped():
+    window = ContextWindow(max_tool_result_chars=20)
+    assert window.cap_tool_result({"status": "ok"}) == '{"status":"ok"}'
+    capped = window.cap_tool_result({"drivers": ["d" * 50]})
+    assert capped.startswith('{"drivers":["ddddddd') and capped.endswith("[truncated 46 chars]")
+
+@pytest.mark.asyncio
+async def test_agent_prompt_stays_bounded():
+    sent = []
+
+    class FakeLLM:
+        async def generate_response(self, messages, tools=None, tool_choice=None):
+            sent.append(messages)
+            return {"content": "Let me check that for you.", "tool_calls": []}
+
+    agent = SupportAgent()
+    agent.context = ContextWindow(max_tokens=10_000, keep_turns=3)
+    agent.llm_service = FakeLLM()
+
+    for n in range(20):
+        await agent.process_message(f"My order {n} is late", {})
+
+    assert len(sent[-1]) == len(sent[3]) == 1 + 2 * 3 - 1
+    assert sent[-1][-1]["content"] == "My order 19 is late"
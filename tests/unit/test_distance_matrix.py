@@ -0,0 +1,56 @@
+"""
+Tests for the vectorized Haversine API:
+- every cell of the matrix matches the scalar calculate_distance
+- shapes for single points, lists and (n, 2) arrays
+- TrackingService.eta_matrix rounds like compute_eta
+- find_available_drivers' fallback path returns nearest first
+"""
+
+import numpy as np
+import pytest
+
+from app.services.tracking_service import TrackingService
+from app.tools import driver_tools
+from app.tools.driver_tools import calculate_distance, calculate_distance_matrix
+
+
+def test_matrix_matches_scalar():
+    rng = np.random.default_rng(3)
+    origins = np.column_stack([rng.uniform(-80, 80, 7), rng.uniform(-180, 180, 7)])
+    destinations = np.column_stack([rng.uniform(-80, 80, 5), rng.uniform(-180, 180, 5)])
+
+    matrix = calculate_distance_matrix(origins, destinations)
+
+    assert matrix.shape == (7, 5)
+    expected = [[calculate_distance(*o, *d) for d in destinations] for o in origins]
+    np.testing.assert_allclose(matrix, expected, rtol=1e-9)
+
+def test_shapes_and_edge_cases():
+    assert calculate_distance_matrix((12.97, 77.59), (12.97, 77.59)).shape == (1, 1)
+    assert calculate_distance_matrix([(12.97, 77.59)], [(12.97, 77.59)])[0, 0] == 0.0
+    assert calculate_distance_matrix([(0, 0)], np.empty((0, 2))).shape == (1, 0)
+    # Antipodal points: half the circumference, no NaN from rounding
+    assert calculate_distance_matrix([(0, 0)], [(0, 180)])[0, 0] == pytest.approx(np.pi * 6371)
+
+def test_eta_matrix_rounds_like_compute_eta():
+    origin = [(12.97, 77.59)]
+    destinations = [(12.97, 77.59), (13.07, 77.59), (12.97, 78.59)]
+    result = TrackingService.eta_matrix(origin, destinations)
+
+    distances = calculate_distance_matrix(origin, destinations)[0]
+    assert result["eta_min"] == [[TrackingService.compute_eta(d) for d in distances]]
+    assert result["distance_km"] == [[round(d, 2) for d in distances]]
+    assert TrackingService.eta_matrix(origin, destinations, avg_speed_kmph=0)["eta_min"] == [[999, 999, 999]]
+
+@pytest.mark.asyncio
+async def test_fallback_path_sorted_nearest_first(monkeypatch):
+    async def drivers(location):
+        return [
+            {"id": "far", "name": "Far", "current_location": {"latitude": 13.0, "longitude": 77.59}},
+            {"id": "none", "name": "Unplaced", "current_location": None},
+            {"id": "near", "name": "Near", "current_location": {"latitude": 12.98, "longitude": 77.59}},
+        ]
+
+    monkeypatch.setattr(driver_tools, "_load_available_drivers", drivers)
+    found = await driver_tools.find_available_drivers({"latitude": 12.97, "longitude": 77.59}, radius_km=5)
+    assert [d["driver_id"] for d in found] == ["near", "far"]
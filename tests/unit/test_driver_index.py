@@ -0,0 +1,173 @@
+"""
+Tests for the driver spatial index:
+- radius and k-nearest queries match a brute-force Haversine scan
+- moves, availability changes and removals keep the grid consistent
+- find_available_drivers / find_nearest_drivers / update_driver_location use it;
+  the index only follows committed updates
+- the index loads from the drivers table's latitude/longitude columns, reloads
+  pick up other replicas' changes, and a stale index falls back to the database
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services.driver_index import DriverIndex, load_driver_index
+from app.tools import driver_tools
+from app.tools.driver_tools import calculate_distance
+
+CENTER = (12.97, 77.59)
+
+
+def brute_force(drivers, lat, lon, radius_km):
+    distances = sorted((calculate_distance(lat, lon, dlat, dlon), driver_id) for driver_id, (dlat, dlon) in drivers.items())
+    return [(driver_id, distance) for distance, driver_id in distances if distance <= radius_km]
+
+
+@pytest.fixture
+def fleet():
+    rng = random.Random(7)
+    drivers = {
+        i: (CENTER[0] + rng.uniform(-0.3, 0.3), CENTER[1] + rng.uniform(-0.3, 0.3))
+        for i in range(2000)
+    }
+    index = DriverIndex(cell_degrees=0.01)
+    for driver_id, (lat, lon) in drivers.items():
+        index.upsert(driver_id, lat, lon, name=f"Driver {driver_id}")
+    return index, drivers
+
+
+@pytest.fixture
+def live_index(monkeypatch):
+    index = DriverIndex(cell_degrees=0.01)
+    index.replace([])
+    monkeypatch.setattr(driver_tools, "get_driver_index", lambda: index)
+    return index
+
+
+@pytest.fixture
+def drivers_db(tmp_path, monkeypatch):
+    """SQLite drivers table behind driver_tools; yields (sync engine, async session factory)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.ext.compiler import compiles
+
+    from app.core.database import create_async_db_engine
+    from app.models.database import Base
+
+    compiles(JSONB, "sqlite")(lambda type_, compiler, **kw: "JSON")
+    url = f"sqlite:///{tmp_path / 'drivers.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables["drivers"]])
+    async_engine = create_async_db_engine(url)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    monkeypatch.setattr(driver_tools, "AsyncSessionLocal", session_factory)
+    yield engine, session_factory
+    asyncio.run(async_engine.dispose())
+
+
+def _add_drivers(engine, *drivers):
+    from sqlalchemy.orm import Session
+
+    from app.models.database import Driver
+
+    with Session(engine) as db:
+        for i, (name, lat, lon, available) in enumerate(drivers, start=1):
+            location = {"latitude": lat, "longitude": lon} if lat is not None else None
+            db.add(Driver(id=i, name=name, phone_number=str(i), vehicle_number=name, latitude=lat, longitude=lon,
+                          current_location=location, is_available=available, updated_at=datetime.utcnow()))
+        db.commit()
+
+
+def test_within_matches_brute_force(fleet):
+    index, drivers = fleet
+    for lat, lon, radius in [(*CENTER, 2.0), (12.8, 77.4, 5.0), (13.1, 77.8, 0.5)]:
+        expected = brute_force(drivers, lat, lon, radius)
+        found = index.within(lat, lon, radius)
+        assert [m.driver_id for m in found] == [driver_id for driver_id, _ in expected]
+        assert [m.distance_km for m in found] == pytest.approx([d for _, d in expected])
+
+def test_nearest_matches_brute_force(fleet):
+    index, drivers = fleet
+    expected = brute_force(drivers, 13.5, 78.0, 500.0)[:5]  # far outside the fleet: radius must widen
+    assert [m.driver_id for m in index.nearest(13.5, 78.0, k=5)] == [driver_id for driver_id, _ in expected]
+    assert index.nearest(13.5, 78.0, k=5, max_radius_km=10) == []
+
+def test_moves_and_removals(fleet):
+    index, _ = fleet
+    index.upsert(0, 40.0, -74.0)
+    assert [m.driver_id for m in index.nearest(40.0, -74.0, k=1)] == [0]
+    assert index.get(0).info == {"name": "Driver 0"}  # details kept across moves
+    assert all(m.driver_id != 0 for m in index.within(*CENTER, 100))
+
+    assert index.remove(0) and not index.remove(0)
+    assert 0 not in index and len(index) == 1999
+    assert index.within(40.0, -74.0, 50) == []
+
+@pytest.mark.asyncio
+async def test_tools_use_the_index(live_index, drivers_db):
+    engine, _ = drivers_db
+    _add_drivers(engine, ("Asha", CENTER[0] + 0.01, CENTER[1], True), ("Ravi", CENTER[0] + 0.03, CENTER[1], True))
+    live_index.upsert(1, CENTER[0] + 0.01, CENTER[1], name="Asha")
+    live_index.upsert(2, CENTER[0] + 0.03, CENTER[1], name="Ravi")
+    live_index.upsert(3, CENTER[0] + 0.30, CENTER[1], name="Far")
+    location = {"latitude": CENTER[0], "longitude": CENTER[1]}
+
+    drivers = await driver_tools.find_available_drivers(location, radius_km=5)
+    assert [d["name"] for d in drivers] == ["Asha", "Ravi"]
+    assert drivers[0]["distance_km"] == pytest.approx(1.11, abs=0.01)
+
+    nearest = await driver_tools.find_nearest_drivers(location, k=1)
+    assert [d["driver_id"] for d in nearest] == [1]
+
+    # Ravi moves next to the restaurant, Asha goes off shift
+    assert (await driver_tools.update_driver_location("2", CENTER[0], CENTER[1] + 0.001))["persisted"]
+    assert (await driver_tools.update_driver_location("1", CENTER[0], CENTER[1], is_available=False))["persisted"]
+    drivers = await driver_tools.find_available_drivers(location, radius_km=5)
+    assert [d["name"] for d in drivers] == ["Ravi"]
+    assert drivers[0]["distance_km"] < 0.2
+
+@pytest.mark.asyncio
+async def test_failed_commit_leaves_the_index_alone(live_index, monkeypatch):
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(driver_tools, "AsyncSessionLocal", unreachable)
+    live_index.upsert(1, *CENTER, name="Asha")
+    result = await driver_tools.update_driver_location("1", 40.0, -74.0, is_available=False)
+    assert result["success"] and not result["persisted"]
+    assert live_index.get(1).latitude == CENTER[0]
+
+@pytest.mark.asyncio
+async def test_reload_and_staleness(drivers_db, monkeypatch):
+    from sqlalchemy import update
+
+    from app.models.database import Driver
+
+    engine, session_factory = drivers_db
+    _add_drivers(engine, ("Asha", 12.97, 77.59, True), ("Busy", 12.97, 77.59, False), ("Unplaced", None, None, True))
+    index = DriverIndex()
+    monkeypatch.setattr(driver_tools, "get_driver_index", lambda: index)
+    assert not index.is_fresh()
+
+    assert await load_driver_index(index, session_factory) == 1
+    assert index.is_fresh()
+    assert [m.info["name"] for m in index.nearest(12.97, 77.59, k=3)] == ["Asha"]
+
+    # Another replica takes Asha off shift: the next reload drops her
+    with engine.begin() as db:
+        db.execute(update(Driver).where(Driver.name == "Asha").values(is_available=False))
+        db.execute(update(Driver).where(Driver.name == "Busy").values(is_available=True))
+    assert await load_driver_index(index, session_factory) == 1
+    assert [m.info["name"] for m in index.nearest(12.97, 77.59, k=3)] == ["Busy"]
+
+    # Reloads failing: once stale, lookups read the database instead
+    index.upsert(1, 12.97, 77.59, name="Asha")
+    assert len(await driver_tools.find_available_drivers({"latitude": 12.97, "longitude": 77.59})) == 2
+    index.loaded_at = time.monotonic() - 3600
+    assert not index.is_fresh()
+    assert [d["name"] for d in await driver_tools.find_available_drivers({"latitude": 12.97, "longitude": 77.59})] == ["Busy"]
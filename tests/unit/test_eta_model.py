@@ -0,0 +1,149 @@
+"""
+Tests for the offline ETA model:
+- untrained estimates use the default speed and road factor
+- speeds are learned per zone and hour, with hour-wide and default fallbacks
+- hours are UTC everywhere, whatever the host's local time zone
+- implausible legs are discarded; timelines fall back to order addresses
+- recalibration moves road factors towards Google Maps in one batched request
+- training from delivered orders in the database
+- TrackingService answers polls without calling Maps
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.eta_model import EtaModel, trip_from_timeline
+from app.services.tracking_service import TrackingService
+from app.tools.driver_tools import calculate_distance
+
+RESTAURANT = (12.9716, 77.5946)
+CUSTOMER = (12.9352, 77.6245)
+EVENING = datetime(2026, 3, 2, 19, 15)
+
+
+def _trips(minutes, start=EVENING, count=5):
+    return [(RESTAURANT, CUSTOMER, start, start + timedelta(minutes=minutes)) for _ in range(count)]
+
+
+def test_untrained_estimate_uses_defaults():
+    model = EtaModel(default_speed_kmph=30, road_factor=1.3, min_samples=5)
+    result = model.estimate(*RESTAURANT, *CUSTOMER, at=EVENING)
+
+    road_km = calculate_distance(*RESTAURANT, *CUSTOMER) * 1.3
+    assert result == {"distance_km": round(road_km, 2), "eta_min": int(road_km / 30 * 60), "source": "eta_model"}
+
+def test_learns_zone_and_hour_speeds():
+    model = EtaModel(default_speed_kmph=30, road_factor=1.3, min_samples=5)
+    assert model.fit(_trips(minutes=30)) == 5
+
+    # Learned leg: same zone and hour
+    assert model.estimate(*RESTAURANT, *CUSTOMER, at=EVENING)["eta_min"] == 30
+    # Another zone at the same hour uses the city-wide speed for that hour
+    zone_speed = model.speed_kmph(model._trip_zone(RESTAURANT, CUSTOMER), 19)
+    assert model.speed_kmph((0, 0), 19) == pytest.approx(zone_speed)
+    # Unseen hour: default speed
+    assert model.speed_kmph((0, 0), 3) == 30
+
+def test_hours_are_utc(monkeypatch):
+    model = EtaModel(default_speed_kmph=30, road_factor=1.3, min_samples=5)
+    model.fit(_trips(minutes=30))
+
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert model.estimate(*RESTAURANT, *CUSTOMER, at=EVENING.replace(tzinfo=timezone.utc).astimezone(ist))["eta_min"] == 30
+
+    class LocalClock(datetime):
+        """A host whose local time is 5:30 ahead of UTC."""
+
+        @classmethod
+        def utcnow(cls):
+            return EVENING
+
+        @classmethod
+        def now(cls, tz=None):
+            return EVENING + timedelta(hours=5, minutes=30)
+
+    monkeypatch.setattr("app.services.eta_model.datetime", LocalClock)
+    assert model.estimate(*RESTAURANT, *CUSTOMER)["eta_min"] == 30
+    # Too few trips in a bucket are not trusted yet
+    sparse = EtaModel(default_speed_kmph=30, min_samples=5)
+    sparse.fit(_trips(minutes=30, count=4))
+    assert sparse.speed_kmph(sparse._trip_zone(RESTAURANT, CUSTOMER), 19) == 30
+
+def test_implausible_legs_are_discarded():
+    model = EtaModel(min_samples=1)
+    assert model.fit(_trips(minutes=0.5) + _trips(minutes=600) + _trips(minutes=1.5)) == 0
+    assert model.trips == 0
+
+def test_trip_from_timeline():
+    timeline = {"picked_up": "2026-03-02T19:15:00", "delivered": "2026-03-02T19:45:00Z"}
+    restaurant = {"street": "MG Road", "latitude": RESTAURANT[0], "longitude": RESTAURANT[1]}
+    delivery = {"lat": CUSTOMER[0], "lon": CUSTOMER[1]}
+
+    origin, destination, start, end = trip_from_timeline(timeline, delivery, restaurant)
+    assert (origin, destination, start.hour) == (RESTAURANT, CUSTOMER, 19)
+    assert (end - start).total_seconds() == 1800
+
+    pinned = {**timeline, "pickup_location": {"latitude": 1.0, "longitude": 2.0}}
+    assert trip_from_timeline(pinned, delivery, restaurant)[0] == (1.0, 2.0)
+    assert trip_from_timeline({"picked_up": "2026-03-02T19:15:00"}, delivery, restaurant) is None
+    assert trip_from_timeline(timeline, {"street": "no coordinates"}, restaurant) is None
+
+@pytest.mark.asyncio
+async def test_recalibrate_against_maps(maps_stub):
+    model = EtaModel(road_factor=1.0, min_samples=1)
+    points = [(12.90 + i * 0.01, 77.50) for i in range(5)]
+    for point in points:
+        model.estimate(*point, *RESTAURANT)
+    assert maps_stub.requests == []
+
+    assert await model.recalibrate() == 5
+    assert len(maps_stub.requests) == 1
+    # The stub's roads are 1.3x the straight line: factors move up from 1.0
+    zone = model._trip_zone(points[0], RESTAURANT)
+    assert 1.0 < model.road_factor(zone) < 1.3
+    # Nothing new was estimated since, so there is nothing to ask about
+    assert await model.recalibrate() == 0
+
+@pytest.mark.asyncio
+async def test_load_from_database(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.orm import Session
+
+    from app.core.database import create_async_db_engine
+    from app.models.database import Base, Customer, Order, OrderStatus, Restaurant
+
+    compiles(JSONB, "sqlite")(lambda type_, compiler, **kw: "JSON")
+    url = f"sqlite:///{tmp_path / 'orders.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[t] for t in ("customers", "restaurants", "drivers", "orders")])
+    now = datetime.utcnow()
+    timeline = {"picked_up": EVENING.isoformat(), "delivered": (EVENING + timedelta(minutes=25)).isoformat()}
+    with Session(engine) as db:
+        customer = Customer(name="Asha", phone_number="1", updated_at=now)
+        restaurant = Restaurant(name="Spice", address={"latitude": RESTAURANT[0], "longitude": RESTAURANT[1]},
+                                operating_hours={}, updated_at=now)
+        db.add_all([customer, restaurant])
+        db.flush()
+        for status in (OrderStatus.DELIVERED, OrderStatus.COMPLETED, OrderStatus.IN_TRANSIT):
+            db.add(Order(customer_id=customer.id, restaurant_id=restaurant.id, status=status, timeline=timeline,
+                         delivery_address={"latitude": CUSTOMER[0], "longitude": CUSTOMER[1]}, updated_at=now))
+        db.commit()
+
+    async_engine = create_async_db_engine(url)
+    model = EtaModel(min_samples=2)
+    try:
+        assert await model.load(async_sessionmaker(async_engine)) == 2
+    finally:
+        await async_engine.dispose()
+    assert model.estimate(*RESTAURANT, *CUSTOMER, at=EVENING)["eta_min"] == 25
+
+@pytest.mark.asyncio
+async def test_tracking_polls_stay_offline(maps_stub):
+    result = await TrackingService.eta_from_coords(*RESTAURANT, *CUSTOMER)
+    assert result["source"] == "eta_model"
+    assert TrackingService.estimate_eta(*RESTAURANT, *CUSTOMER)["distance_km"] == result["distance_km"]
+    assert maps_stub.requests == []
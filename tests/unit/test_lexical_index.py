@@ -0,0 +1,46 @@
+"""
+Tests for the in-process lexical menu index:
+- BM25 ranks the item naming the query words first, ignoring filler words
+- misheard words match by trigram similarity, at reduced confidence
+- unknown words lower confidence; re-adding an item replaces it
+"""
+
+from app.services.lexical_index import LexicalIndex
+from app.services.menu_catalog import DEFAULT_MENU
+
+
+def _index():
+    index = LexicalIndex()
+    for category in DEFAULT_MENU.values():
+        for key, item in category["items"].items():
+            index.add(key + "-" + category["name"], dict(item))
+    return index
+
+
+def test_ranks_named_item_first():
+    hits, confidence = _index().search("can I get a pepperoni pizza please", top_k=3)
+    assert hits[0][2]["name"] == "Pepperoni Pizza"
+    assert [score for _, score, _ in hits] == sorted((score for _, score, _ in hits), reverse=True)
+    assert confidence == 1.0
+
+def test_fuzzy_and_unknown_words():
+    index = _index()
+    hits, confidence = index.search("peperoni")
+    assert hits[0][2]["name"] == "Pepperoni Pizza"
+    assert 0.5 <= confidence < 1.0
+
+    _, confidence = index.search("something spicy")
+    assert confidence < 0.6
+    assert index.search("light and refreshing") == ([], 0.0)
+    assert index.search("please") == ([], 0.0)
+
+def test_readd_replaces_item():
+    index = LexicalIndex()
+    index.add(1, {"name": "Masala Dosa", "description": "Crispy crepe"})
+    index.add(1, {"name": "Plain Dosa", "description": "Crispy crepe"})
+    assert len(index) == 1
+    assert index.search("masala") == ([], 0.0)
+    assert index.search("plain dosa")[0][0][0] == 1
+
+    index.remove(1)
+    assert len(index) == 0 and index.search("dosa") == ([], 0.0)
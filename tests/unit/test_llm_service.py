@@ -0,0 +1,142 @@
+"""
+Tests for the async LLMService (httpx MockTransport instead of the providers):
+- OpenAI tool-call parsing and neutral tool descriptor conversion
+- tool results converted to a shape OpenAI accepts
+- retry with backoff on retryable status codes
+- fallback from the primary (Anthropic) to OpenAI
+- generate_reply degrades to an apology when every provider fails
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.services.llm_service import LLMService
+
+
+def _openai_reply(content="", tool_calls=None):
+    return {"choices": [{"message": {"content": content, "tool_calls": tool_calls}}]}
+
+
+@pytest.fixture
+def provider_stub(monkeypatch, mock_http):
+    """Route provider calls to `handler(request) -> httpx.Response`; records requests."""
+    stub = {"handler": None, "requests": []}
+
+    def transport(request):
+        stub["requests"].append(request)
+        return stub["handler"](request)
+
+    mock_http("app.services.llm_service", transport)
+    monkeypatch.setattr("app.services.llm_service.settings.LLM_RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr("app.services.llm_service.settings.ANTHROPIC_API_KEY", "sk-ant-test")
+    monkeypatch.setattr("app.services.llm_service.settings.OPENAI_API_KEY", "sk-test")
+    return stub
+
+
+@pytest.mark.asyncio
+async def test_openai_tool_calls(provider_stub):
+    provider_stub["handler"] = lambda request: httpx.Response(200, json=_openai_reply(tool_calls=[
+        {"id": "call_1", "function": {"name": "search_restaurants", "arguments": '{"cuisine": "pizza"}'}}
+    ]))
+    llm = LLMService(provider="openai")
+
+    response = await llm.generate_response(
+        [{"role": "user", "content": "pizza near me"}],
+        tools=[{"name": "search_restaurants", "description": "Tool: search_restaurants"}],
+        tool_choice="auto",
+    )
+
+    assert response["tool_calls"] == [{"id": "call_1", "name": "search_restaurants", "arguments": {"cuisine": "pizza"}}]
+    sent = json.loads(provider_stub["requests"][0].content)
+    assert sent["tools"][0]["function"]["name"] == "search_restaurants"
+    assert provider_stub["requests"][0].url.path == "/v1/chat/completions"
+
+@pytest.mark.asyncio
+async def test_openai_tool_results_are_sent_in_a_valid_shape(provider_stub):
+    provider_stub["handler"] = lambda request: httpx.Response(200, json=_openai_reply("Found two places."))
+    call = {"id": "call_1", "type": "function", "function": {"name": "search_restaurants", "arguments": "{}"}}
+
+    await LLMService(provider="openai").generate_response([
+        {"role": "user", "content": "pizza near me"},
+        # Agent histories store results without the assistant tool_calls turn
+        {"role": "tool", "content": "2 results", "tool_call_id": "call_0", "name": "search_restaurants"},
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "content": "2 results", "tool_call_id": "call_1", "name": "search_restaurants"},
+    ])
+
+    sent = json.loads(provider_stub["requests"][0].content)["messages"]
+    assert sent[1] == {"role": "user", "content": "Result of search_restaurants: 2 results"}
+    assert sent[3] == {"role": "tool", "tool_call_id": "call_1", "content": "2 results"}
+
+@pytest.mark.asyncio
+async def test_retries_retryable_status(provider_stub):
+    statuses = iter([503, 429, 200])
+    provider_stub["handler"] = lambda request: httpx.Response(next(statuses), json=_openai_reply("Hi there!"))
+
+    assert await LLMService(provider="openai").generate_reply("hello") == "Hi there!"
+    assert len(provider_stub["requests"]) == 3
+
+@pytest.mark.asyncio
+async def test_falls_back_to_openai(provider_stub):
+    def handler(request):
+        if request.url.path == "/v1/messages":
+            return httpx.Response(400, json={"error": "bad request"})
+        return httpx.Response(200, json=_openai_reply("from fallback"))
+
+    provider_stub["handler"] = handler
+    llm = LLMService()
+
+    assert llm.providers == ["anthropic", "openai"]
+    assert (await llm.generate_response([{"role": "user", "content": "hi"}]))["content"] == "from fallback"
+    # 400 is not retryable: one Anthropic attempt, then OpenAI
+    assert [r.url.path for r in provider_stub["requests"]] == ["/v1/messages", "/v1/chat/completions"]
+
+@pytest.mark.asyncio
+async def test_anthropic_system_prompt_and_content(provider_stub):
+    provider_stub["handler"] = lambda request: httpx.Response(200, json={"content": [
+        {"type": "text", "text": "Sure."},
+        {"type": "tool_use", "id": "tu_1", "name": "track_order", "input": {"order_id": "42"}},
+    ]})
+
+    response = await LLMService().generate_response([
+        {"role": "system", "content": "You are a voice agent."},
+        {"role": "user", "content": "where is my order"},
+    ])
+
+    sent = json.loads(provider_stub["requests"][0].content)
+    assert sent["system"] == "You are a voice agent."
+    assert [m["role"] for m in sent["messages"]] == ["user"]
+    assert response == {"content": "Sure.", "tool_calls": [{"id": "tu_1", "name": "track_order", "arguments": {"order_id": "42"}}]}
+
+@pytest.mark.asyncio
+async def test_generate_reply_when_all_providers_fail(provider_stub):
+    provider_stub["handler"] = lambda request: httpx.Response(500)
+
+    reply = await LLMService().generate_reply("hello")
+    assert reply.startswith("Sorry")
+
+@pytest.mark.asyncio
+async def test_stream_openai_deltas(provider_stub):
+    events = [{"choices": [{"delta": {"content": token}}]} for token in ["Your ", "pizza ", "is ready."]]
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    provider_stub["handler"] = lambda request: httpx.Response(200, text=body)
+
+    deltas = [delta async for delta in LLMService(provider="openai").stream_reply("status?")]
+
+    assert deltas == ["Your ", "pizza ", "is ready."]
+    assert json.loads(provider_stub["requests"][0].content)["stream"] is True
+
+@pytest.mark.asyncio
+async def test_stream_anthropic_deltas(provider_stub):
+    events = [
+        {"type": "message_start"},
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "On "}},
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "its way."}},
+        {"type": "message_stop"},
+    ]
+    body = "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events)
+    provider_stub["handler"] = lambda request: httpx.Response(200, text=body)
+
+    assert [delta async for delta in LLMService().stream_response([{"role": "user", "content": "hi"}])] == ["On ", "its way."]
@@ -0,0 +1,131 @@
+"""
+Tests for the local int8 vector index and VectorService's use of it:
+- quantized search agrees with exact float cosine search
+- upserts overwrite; snapshots round-trip memory-mapped and stay writable
+- small catalogs are searched locally; large ones use Qdrant and fall back
+  to the local index when Qdrant fails
+- the index and lexical index load from a snapshot without Qdrant; a
+  snapshot the collection has moved past is rebuilt, at startup or on refresh
+"""
+
+import numpy as np
+import pytest
+
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.vector_service import VectorService
+
+MENU = [
+    {"id": 1, "name": "Spicy Paneer", "description": "Hot and spicy paneer dish", "price": 200},
+    {"id": 2, "name": "Mango Lassi", "description": "Sweet yogurt drink", "price": 90},
+    {"id": 3, "name": "Garlic Naan", "description": "Buttery flatbread with garlic", "price": 60},
+]
+
+
+class QdrantDown(Exception):
+    pass
+
+
+def _down(*_args, **_kwargs):
+    raise QdrantDown("connection refused")
+
+
+def test_quantized_search_matches_exact_search():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(2000, 64)).astype(np.float32)
+    index = LocalVectorIndex(64)
+    index.upsert(list(range(2000)), vectors, [{"n": i} for i in range(2000)])
+
+    units = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    recall = []
+    for query in rng.normal(size=(20, 64)):
+        exact = np.argsort(-(units @ (query / np.linalg.norm(query))))[:10]
+        hits = index.search(query, top_k=10)
+        assert hits[0]["payload"] == {"n": hits[0]["id"]}
+        assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+        recall.append(len(set(exact) & {h["id"] for h in hits}) / 10)
+    assert np.mean(recall) >= 0.9
+
+def test_upsert_overwrites_and_snapshot_round_trips(tmp_path):
+    index = LocalVectorIndex(3)
+    index.upsert(["a", "b"], [[1, 0, 0], [0, 1, 0]], [{"v": 1}, {"v": 2}])
+    index.upsert(["a"], [[0, 0, 1]], [{"v": 3}])
+    assert len(index) == 2
+    assert index.search([0, 0, 1], top_k=1)[0] == {"id": "a", "score": pytest.approx(1.0), "payload": {"v": 3}}
+
+    index.save(str(tmp_path))
+    loaded = LocalVectorIndex.load(str(tmp_path))
+    assert isinstance(loaded._codes, np.memmap)
+    assert loaded.search([0, 1, 0], top_k=2) == index.search([0, 1, 0], top_k=2)
+
+    loaded.upsert(["c"], [[1, 1, 0]], [{"v": 4}])
+    assert len(loaded) == 3 and not isinstance(loaded._codes, np.memmap)
+    # The snapshot itself is unchanged until saved again
+    assert len(LocalVectorIndex.load(str(tmp_path))) == 2
+    assert LocalVectorIndex.load(str(tmp_path / "missing")) is None
+
+@pytest.mark.asyncio
+async def test_small_catalog_searches_locally(vector_service, monkeypatch):
+    await vector_service.upsert_menu_items(MENU)
+    monkeypatch.setattr(vector_service.client, "search", _down)
+
+    hits = await vector_service.semantic_search("something hot and spicy", top_k=2, mode="vector")
+    assert hits[0]["id"] == 1 and hits[0]["payload"]["name"] == "Spicy Paneer"
+    assert set(hits[0]) == {"id", "score", "payload"}
+
+@pytest.mark.asyncio
+async def test_large_catalog_falls_back_when_qdrant_is_down(vector_service, monkeypatch):
+    monkeypatch.setattr("app.services.vector_service.settings.VECTOR_LOCAL_MAX_ITEMS", 2)
+    await vector_service.upsert_menu_items(MENU)
+
+    from_qdrant = await vector_service.semantic_search("sweet drink", top_k=1, mode="vector")
+    monkeypatch.setattr(vector_service.client, "search", _down)
+    from_local = await vector_service.semantic_search("sweet drink", top_k=1, mode="vector")
+    assert from_local[0]["id"] == from_qdrant[0]["id"] == 2
+    assert from_local[0]["score"] == pytest.approx(from_qdrant[0]["score"], abs=0.02)
+
+@pytest.mark.asyncio
+async def test_load_local_index(vector_service, embeddings_stub, monkeypatch):
+    await vector_service.upsert_menu_items(MENU)
+
+    # Qdrant down: the snapshot alone serves
+    restarted = VectorService(client=vector_service.client, dim=vector_service.dim,
+                              local_index_dir=vector_service.local_index_dir)
+    scroll = restarted.client.scroll
+    monkeypatch.setattr(restarted.client, "scroll", _down)
+    assert await restarted.load_local_index() == 3
+    assert (await restarted.semantic_search("garlic naan"))[0]["id"] == 3
+    monkeypatch.setattr(restarted.client, "scroll", scroll)
+
+    # No snapshot yet: pulled from Qdrant
+    fresh = VectorService(client=vector_service.client, dim=vector_service.dim, local_index_dir="")
+    assert await fresh.load_local_index() == 3
+    assert (await fresh.semantic_search("yogurt", mode="vector"))[0]["id"] == 2
+
+    # Unchanged items re-indexed against an empty local index are mirrored, not re-embedded
+    embeddings_stub.batches.clear()
+    mirror = VectorService(client=vector_service.client, dim=vector_service.dim, local_index_dir="")
+    assert (await mirror.upsert_menu_items(MENU))["unchanged"] == 3
+    assert len(mirror.local) == 3 and embeddings_stub.batches == []
+
+@pytest.mark.asyncio
+async def test_outdated_snapshot_is_rebuilt(vector_service, tmp_path):
+    await vector_service.upsert_menu_items(MENU)
+
+    # Another replica (its own snapshot directory) re-indexes the menu
+    other = VectorService(client=vector_service.client, dim=vector_service.dim, local_index_dir=str(tmp_path / "other"))
+    changed = [{**MENU[1], "name": "Rose Lassi", "description": "Chilled rose milk drink"},
+               {"id": 4, "name": "Masala Chai", "description": "Spiced milk tea", "price": 40}]
+    await other.upsert_menu_items(changed)
+
+    assert await vector_service.refresh_local_index()
+    assert not await vector_service.refresh_local_index()
+    assert len(vector_service.local) == 4
+    assert vector_service.local.payload(2)["name"] == "Rose Lassi"
+    assert (await vector_service.semantic_search("masala chai"))[0]["id"] == 4
+
+    # An old snapshot on disk is not served once the collection has moved on
+    old = VectorService(client=vector_service.client, dim=vector_service.dim, local_index_dir=str(tmp_path / "old"))
+    old.local.upsert([1], [[1.0] * vector_service.dim], [{"name": "Gone", "content_hash": "x"}])
+    old.local.save(old.local_index_dir)
+    assert await old.load_local_index() == 4
+    assert old.local.payload(1)["name"] == "Spicy Paneer"
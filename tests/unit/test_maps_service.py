@@ -0,0 +1,127 @@
+"""
+Tests for the cached, batched MapsService (local MapsStub instead of Google):
+- geocodes are cached by normalized address; misses are not cached
+- concurrent identical lookups share one request, even if the first caller is cancelled
+- ETAs are cached per coordinate cell
+- many pairs go out as one distance_matrix request, split at Google's limits
+- API errors degrade to None; TrackingService falls back to the offline model
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.maps_service import MapsService, normalize_address
+from app.services.tracking_service import TrackingService
+
+RESTAURANT = (12.9716, 77.5946)
+
+
+def _paths(stub):
+    return [request.url.path for request in stub.requests]
+
+
+def test_normalize_address():
+    assert normalize_address("  123 Main St.,  Springfield ") == normalize_address("123 main st springfield")
+    assert normalize_address("123 Main St") != normalize_address("124 Main St")
+
+@pytest.mark.asyncio
+async def test_geocode_cache(maps_stub):
+    maps_stub.addresses["123 Main St, Springfield"] = (39.78, -89.65)
+    maps = MapsService()
+
+    first = await maps.verify_address("123 Main St, Springfield")
+    again = await MapsService().verify_address("  123 main st   springfield ")
+    assert first == again == {"formatted_address": "123 Main St, Springfield", "latitude": 39.78, "longitude": -89.65}
+    assert len(maps_stub.requests) == 1
+
+    # Callers get copies; mutating one doesn't poison the cache
+    first["latitude"] = 0
+    assert (await maps.verify_address("123 Main St, Springfield"))["latitude"] == 39.78
+
+    assert await maps.verify_address("nowhere") is None
+    assert await maps.verify_address("nowhere") is None
+    assert len(maps_stub.requests) == 3
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request(maps_stub):
+    maps_stub.addresses["456 Oak Ave"] = (12.9, 77.6)
+    maps = MapsService()
+
+    results = await asyncio.gather(*[maps.verify_address("456 Oak Ave") for _ in range(10)])
+    assert all(result["latitude"] == 12.9 for result in results)
+    assert len(maps_stub.requests) == 1
+
+    etas = await asyncio.gather(*[maps.calculate_eta(RESTAURANT, (12.99, 77.60)) for _ in range(10)])
+    assert len({eta["duration_min"] for eta in etas}) == 1
+    assert _paths(maps_stub).count("/maps/api/distancematrix/json") == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_lookup(maps_stub, monkeypatch):
+    maps_stub.addresses["789 Pine St"] = (12.8, 77.5)
+    release = asyncio.Event()
+    get = MapsService._get
+
+    async def slow_get(self, path, params):
+        await release.wait()
+        return await get(self, path, params)
+
+    monkeypatch.setattr(MapsService, "_get", slow_get)
+    maps = MapsService()
+    owner = asyncio.create_task(maps.verify_address("789 Pine St"))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(maps.verify_address("789 Pine St"))
+    await asyncio.sleep(0)
+
+    owner.cancel()  # the caller that started the request hangs up
+    release.set()
+    assert (await follower)["latitude"] == 12.8
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    assert len(maps_stub.requests) == 1
+
+@pytest.mark.asyncio
+async def test_eta_cached_per_cell(maps_stub):
+    maps = MapsService()
+    eta = await maps.calculate_eta(RESTAURANT, (12.99, 77.60))
+    assert eta["distance_km"] > 0 and eta["duration_min"] > 0
+
+    # A few metres away falls in the same cell; a kilometre away does not
+    assert await maps.calculate_eta((12.97161, 77.59461), (12.99001, 77.60001)) == eta
+    await maps.calculate_eta(RESTAURANT, (13.0, 77.60))
+    assert len(maps_stub.requests) == 2
+
+@pytest.mark.asyncio
+async def test_pairs_batched_into_distance_matrix(maps_stub):
+    maps = MapsService()
+    drivers = [(12.95 + i * 0.003, 77.58) for i in range(30)]
+
+    etas = await maps.calculate_etas([(driver, RESTAURANT) for driver in drivers])
+    assert all(eta is not None for eta in etas)
+    assert etas[0]["distance_km"] < etas[-1]["distance_km"]
+    # 30 origins x 1 destination: two requests of at most 25 origins
+    assert len(maps_stub.requests) == 2
+    assert [len(r.url.params["origins"].split("|")) for r in maps_stub.requests] == [25, 5]
+
+    # Everything is cached now, including when asked individually
+    await maps.calculate_eta(drivers[3], RESTAURANT)
+    assert len(maps_stub.requests) == 2
+
+    # 10 x 10 fits in a single 100-element request
+    origins = [(12.90 + i * 0.01, 77.50) for i in range(10)]
+    destinations = [(12.90, 77.50 + j * 0.01) for j in range(10)]
+    await maps.calculate_etas([(o, d) for o in origins for d in destinations])
+    assert len(maps_stub.requests) == 3
+
+@pytest.mark.asyncio
+async def test_errors_degrade_to_fallback(maps_stub):
+    maps_stub.status = "OVER_QUERY_LIMIT"
+    assert await MapsService().calculate_eta(RESTAURANT, (12.99, 77.60)) is None
+    assert await MapsService().get_optimal_route(RESTAURANT, (12.99, 77.60)) is None
+
+    result = await TrackingService.eta_from_coords(*RESTAURANT, 12.99, 77.60, live=True)
+    assert result["source"] == "eta_model"
+
+    maps_stub.status = "OK"
+    result = await TrackingService.eta_from_coords(*RESTAURANT, 12.99, 77.60, live=True)
+    assert result["source"] == "google_maps"
@@ -0,0 +1,41 @@
+"""
+Tests for the precompiled voice menu catalog:
+- category detection from speech
+- token-index item resolution (within a category and across the menu)
+- catalog entries are read-only
+"""
+
+import pytest
+from app.services.menu_catalog import MenuCatalog, DEFAULT_MENU, get_menu_catalog
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return MenuCatalog(DEFAULT_MENU)
+
+def test_match_category(catalog):
+    assert catalog.match_category("I'd like some burgers please") == "burger"
+    assert catalog.match_category("something to eat") is None
+
+def test_match_item_within_category(catalog):
+    category_key, item_key, item = catalog.match_item("the spicy tuna one", "sushi")
+    assert (category_key, item_key) == ("sushi", "spicy")
+    assert item["price"] == 1799
+
+def test_match_item_prefers_most_specific(catalog):
+    assert catalog.match_item("double cheese", "burger")[1] == "double"
+    assert catalog.match_item("cheese burger", "burger")[1] == "cheese"
+
+def test_match_item_across_menu(catalog):
+    category_key, item_key, _ = catalog.match_item("can I get fettuccine alfredo")
+    assert (category_key, item_key) == ("pasta", "fettuccine")
+    assert catalog.match_item("hello there") is None
+
+def test_options_are_prerendered(catalog):
+    assert catalog.options("pizza").startswith("Margherita, Pepperoni")
+    assert "Margherita for $15.99" in catalog.options("pizza", with_prices=True)
+
+def test_catalog_is_read_only():
+    item = get_menu_catalog().get_category("pizza")["items"]["margherita"]
+    with pytest.raises(TypeError):
+        item["price"] = 1
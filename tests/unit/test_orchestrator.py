@@ -0,0 +1,130 @@
+"""
+Tests for the Orchestrator's per-call streaming STT session:
+- all frames of a call go through a single stream, in order
+- interim and final transcripts reach the callback
+- the bounded frame queue drops the oldest audio instead of blocking
+- a dropped stream reconnects and keeps consuming queued frames
+- reply speech starts before the LLM has finished generating
+"""
+
+import asyncio
+import base64
+
+import pytest
+
+from app.orchestration.orchestrator import Orchestrator
+
+
+def _frame(n: int) -> str:
+    return base64.b64encode(bytes([n]) * 160).decode()
+
+
+class FakeStreamingSTT:
+    """Stands in for STTService.stream_results; emits an interim+final pair per frame."""
+
+    def __init__(self, fail_first: bool = False):
+        self.sessions = 0
+        self.frames = []
+        self.fail_first = fail_first
+
+    async def stream_results(self, audio_generator):
+        self.sessions += 1
+        async for chunk in audio_generator:
+            self.frames.append(chunk[0])
+            if self.fail_first and self.sessions == 1:
+                raise ConnectionError("socket closed")
+            yield {"text": f"frame {chunk[0]}", "is_final": False}
+            yield {"text": f"frame {chunk[0]}", "is_final": True}
+
+
+@pytest.fixture
+def orchestrator():
+    transcripts = []
+    orch = Orchestrator("sess-1", {}, on_transcript=lambda text, is_final: transcripts.append((text, is_final)))
+    orch.transcripts = transcripts
+    return orch
+
+
+@pytest.mark.asyncio
+async def test_single_stream_per_call(orchestrator):
+    orchestrator.stt = FakeStreamingSTT()
+    await orchestrator.start_stream()
+    for n in range(3):
+        assert await orchestrator.process_audio(_frame(n)) is None
+    await orchestrator.stop_stream()
+
+    assert orchestrator.stt.sessions == 1
+    assert orchestrator.stt.frames == [0, 1, 2]
+    assert orchestrator.transcripts[:2] == [("frame 0", False), ("frame 0", True)]
+    assert len(orchestrator.transcripts) == 6
+
+
+@pytest.mark.asyncio
+async def test_async_callback(orchestrator):
+    finals = []
+
+    async def on_transcript(text, is_final):
+        await asyncio.sleep(0)
+        if is_final:
+            finals.append(text)
+
+    orchestrator.on_transcript = on_transcript
+    orchestrator.stt = FakeStreamingSTT()
+    await orchestrator.start_stream()
+    orchestrator.feed_audio(_frame(7))
+    await orchestrator.stop_stream()
+
+    assert finals == ["frame 7"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_frame(orchestrator, monkeypatch):
+    monkeypatch.setattr("app.orchestration.orchestrator.settings.STT_STREAM_QUEUE_SIZE", 2)
+    orchestrator.stt = FakeStreamingSTT()
+    await orchestrator.start_stream()
+    # Frames are queued synchronously, before the stream task gets to run
+    for n in range(4):
+        orchestrator.feed_audio(_frame(n))
+    await orchestrator.stop_stream()
+
+    assert orchestrator.stt.frames == [2, 3]
+    assert orchestrator.dropped_frames == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_reconnects_after_drop(orchestrator, monkeypatch):
+    monkeypatch.setattr(Orchestrator, "STREAM_RECONNECT_DELAY", 0)
+    orchestrator.stt = FakeStreamingSTT(fail_first=True)
+    await orchestrator.start_stream()
+    for n in range(3):
+        orchestrator.feed_audio(_frame(n))
+    await orchestrator.stop_stream()
+
+    assert orchestrator.stt.sessions == 2
+    assert orchestrator.stt.frames == [0, 1, 2]
+    assert ("frame 2", True) in orchestrator.transcripts
+
+
+@pytest.mark.asyncio
+async def test_reply_tts_overlaps_generation(orchestrator):
+    events = []
+
+    class FakeLLM:
+        async def stream_reply(self, prompt):
+            for token in ["Great choice. ", "Your pizza ", "is on the way."]:
+                await asyncio.sleep(0.01)
+                yield token
+            events.append("llm done")
+
+    class FakeTTS:
+        async def synthesize_stream(self, text, voice=None):
+            events.append(f"tts: {text}")
+            yield text.encode()
+
+    orchestrator.llm = FakeLLM()
+    orchestrator.tts = FakeTTS()
+
+    frames = [frame async for frame in orchestrator.speak_reply("one pizza")]
+
+    assert frames == [b"Great choice.", b"Your pizza is on the way."]
+    assert events.index("tts: Great choice.") < events.index("llm done")
@@ -1,5 +1,7 @@
+import asyncio
+
 import pytest
-from app.services.payment_service import PaymentService
+from app.services.payment_service import PaymentService, _form_encode, session_idempotency_key
 
 def test_create_payment_intent_mocked(monkeypatch):
     """Mock Stripe PaymentIntent to test PaymentService logic."""
@@ -19,3 +21,73 @@ def test_create_payment_intent_mocked(monkeypatch):
     assert res["success"] is True
     assert "payment_intent" in res
     assert res["payment_intent"]["id"] == "pi_123"
+
+
+def test_session_idempotency_key():
+    key = session_idempotency_key("CA123", 1999, "usd")
+    assert key == session_idempotency_key("CA123", 1999, "USD")
+    assert key != session_idempotency_key("CA123", 2499, "usd")
+    assert key != session_idempotency_key("CA456", 1999, "usd")
+    # Same total, corrected delivery address
+    moved = session_idempotency_key("CA123", 1999, "usd", metadata={"delivery_address": "12 Oak St"})
+    assert moved != session_idempotency_key("CA123", 1999, "usd", metadata={"delivery_address": "21 Oak St"})
+    assert _form_encode({"amount": 5, "payment_method_types": ["card"], "metadata": {"session_id": "CA123"}, "customer": None}) == {
+        "amount": "5", "payment_method_types[0]": "card", "metadata[session_id]": "CA123",
+    }
+
+@pytest.mark.asyncio
+async def test_session_retries_reuse_the_same_intent(stripe_stub):
+    metadata = {"session_id": "CA123"}
+    first = await PaymentService.create_payment_intent_async(1999, session_id="CA123", metadata=metadata)
+    assert first["success"] and first["payment_intent"]["metadata"] == {"session_id": "CA123"}
+
+    # Concurrent and repeated retries of the same turn: one intent, one request
+    retries = await asyncio.gather(*(
+        PaymentService.create_payment_intent_async(1999, session_id="CA123", metadata=dict(metadata)) for _ in range(5)
+    ))
+    assert {r["payment_intent"]["id"] for r in retries} == {first["payment_intent"]["id"]}
+    assert len(stripe_stub.intents) == 1 and len(stripe_stub.requests) == 1
+
+    # After a restart (empty local cache) Stripe replays the intent for the same key
+    PaymentService.intent_cache.clear()
+    again = await PaymentService.create_payment_intent_async(1999, session_id="CA123", metadata={"session_id": "CA123"})
+    assert again["payment_intent"]["id"] == first["payment_intent"]["id"]
+    assert len(stripe_stub.intents) == 1
+
+    # A changed cart, or a corrected address for the same total, is a new intent
+    changed = await PaymentService.create_payment_intent_async(2499, session_id="CA123", metadata=metadata)
+    assert changed["payment_intent"]["id"] != first["payment_intent"]["id"]
+    moved = await PaymentService.create_payment_intent_async(
+        1999, session_id="CA123", metadata={**metadata, "delivery_address": "21 Oak St"}
+    )
+    assert moved["success"] and moved["payment_intent"]["metadata"]["delivery_address"] == "21 Oak St"
+    assert len(stripe_stub.intents) == 3
+
+@pytest.mark.asyncio
+async def test_transient_stripe_errors_are_retried_with_the_same_key(stripe_stub):
+    stripe_stub.fail_next = 2
+    res = await PaymentService.create_payment_intent_async(500, session_id="CA789")
+    assert res["success"]
+    keys = {request.headers["Idempotency-Key"] for request in stripe_stub.requests}
+    assert len(stripe_stub.requests) == 3 and keys == {session_idempotency_key("CA789", 500)}
+    assert len(stripe_stub.intents) == 1
+
+    stripe_stub.fail_next = 10
+    res = await PaymentService.create_payment_intent_async(500, session_id="CA000")
+    assert res == {"success": False, "error": "stubbed outage"}
+
+@pytest.mark.asyncio
+async def test_confirm_payment_async(stripe_stub):
+    created = await PaymentService.create_payment_intent_async(1000, "inr", session_id="CA1")
+    res = await PaymentService.confirm_payment_async(created["payment_intent"]["id"])
+    assert res == {"success": True, "status": "requires_payment_method", "amount": 1000, "currency": "inr"}
+    assert not (await PaymentService.confirm_payment_async("pi_missing"))["success"]
+    assert (await PaymentService.confirm_payment_async("pi_mock_demo"))["status"] == "succeeded"
+
+@pytest.mark.asyncio
+async def test_simulation_mode_is_deterministic_per_session(monkeypatch):
+    monkeypatch.setattr("app.services.payment_service.settings.STRIPE_API_KEY", "")
+    a = await PaymentService.create_payment_intent_async(1000, session_id="CA1")
+    b = await PaymentService.create_payment_intent_async(1000, session_id="CA1")
+    assert a["payment_intent"]["id"] == b["payment_intent"]["id"]
+    assert a["payment_intent"]["id"].startswith("pi_mock_")
@@ -0,0 +1,168 @@
+"""
+Tests for the token-bucket rate limiter in app.core.security:
+- the Redis (Lua) bucket admits exactly `capacity` concurrent requests and refills
+- in-process buckets take over while Redis fails, and Redis is retried later
+- RateLimitMiddleware, the rate_limit() dependency and check_rate_limit()
+- clients are keyed by peer address; X-Forwarded-For only counts from trusted proxies
+"""
+
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core.database import create_redis_client
+from app.core.security import (
+    LocalTokenBucket, RateLimitMiddleware, TokenBucketLimiter, check_rate_limit, rate_limit, rate_limit_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_redis_bucket_is_atomic_and_refills():
+    limiter = TokenBucketLimiter(create_redis_client("fakeredis://"))
+
+    results = await asyncio.gather(*(limiter.acquire("ip:1", capacity=5, rate=0.5) for _ in range(40)))
+    assert sum(r.allowed for r in results) == 5
+    denied = next(r for r in results if not r.allowed)
+    assert 0 < denied.retry_after <= 2
+    # Other clients have their own bucket
+    assert (await limiter.acquire("ip:2", capacity=5, rate=0.5)).allowed
+
+    assert (await limiter.acquire("ip:3", capacity=1, rate=50)).allowed
+    assert not (await limiter.acquire("ip:3", capacity=1, rate=50)).allowed
+    await asyncio.sleep(0.05)
+    assert (await limiter.acquire("ip:3", capacity=1, rate=50)).allowed
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_buckets_while_redis_is_down(monkeypatch):
+    limiter = TokenBucketLimiter(create_redis_client("fakeredis://"), local=LocalTokenBucket(clock=Clock()))
+    calls = []
+
+    async def down(**kwargs):
+        calls.append(kwargs)
+        raise ConnectionError("redis unreachable")
+
+    monkeypatch.setattr(limiter, "_script", down)
+    results = [await limiter.acquire("ip:1", capacity=3, rate=1) for _ in range(5)]
+    assert [r.allowed for r in results] == [True, True, True, False, False]
+    assert len(calls) == 1  # not retried on every request
+
+    monkeypatch.setattr(limiter, "_redis_down_until", 0.0)
+    monkeypatch.setattr(limiter, "_script", limiter.client.register_script(
+        "return {1, '9', '0'}"
+    ))
+    assert await limiter.acquire("ip:1", capacity=3, rate=1) == (True, 9.0, 0.0)
+
+def test_local_bucket_refill_and_bound():
+    clock = Clock()
+    bucket = LocalTokenBucket(max_keys=2, clock=clock)
+    assert [bucket.acquire("a", 2, 1).allowed for _ in range(3)] == [True, True, False]
+    assert bucket.acquire("a", 2, 1).retry_after == pytest.approx(1.0)
+    clock.now = 1.5
+    assert bucket.acquire("a", 2, 1).allowed
+    bucket.acquire("b", 2, 1)
+    bucket.acquire("c", 2, 1)
+    assert list(bucket._buckets) == ["b", "c"]
+
+
+def _app(monkeypatch, limiter):
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_REQUESTS", 3)
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_PERIOD_SECONDS", 60)
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_BURST", 0)
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_EXEMPT_PATHS", "/webhook")
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/orders")
+    async def orders():
+        return {"ok": True}
+
+    @app.post("/webhook")
+    async def webhook():
+        return {"ok": True}
+
+    return app
+
+def test_default_exemptions_cover_only_provider_callbacks():
+    from app.core.config import settings
+    from app.main import app
+
+    middleware = RateLimitMiddleware(app)
+    assert middleware.exempt == tuple(settings.RATE_LIMIT_EXEMPT_PATHS.split(","))
+    for path in ("/api/v1/voice/voice", "/api/v1/voice/incoming-call", "/api/v1/voice/handle-speech/s-1",
+                 "/api/v1/voice/call-status", "/api/v1/voice/payment/webhook"):
+        assert path.startswith(middleware.exempt), path
+    # Paid Twilio calls and Stripe intents are the endpoints most worth limiting
+    for path in ("/api/v1/voice/outbound-call", "/api/v1/voice/test-integrations",
+                 "/api/v1/voice/simulate-payment-confirmation/s-1", "/api/v1/orders/"):
+        assert not path.startswith(middleware.exempt), path
+    # Every exempt prefix is a mounted route
+    routes = [route.path for route in app.routes]
+    assert all(any(route.startswith(prefix.rstrip("/")) for route in routes) for prefix in middleware.exempt)
+
+def test_middleware_limits_per_client(monkeypatch):
+    app = _app(monkeypatch, TokenBucketLimiter(create_redis_client("fakeredis://")))
+    with TestClient(app) as client:
+        responses = [client.get("/orders") for _ in range(4)]
+        assert [r.status_code for r in responses] == [200, 200, 200, 429]
+        assert [r.headers.get("x-ratelimit-remaining") for r in responses[:3]] == ["2", "1", "0"]
+        assert int(responses[3].headers["retry-after"]) >= 1
+        # A forged X-Forwarded-For is no way out; exempt webhooks are unaffected
+        assert client.get("/orders", headers={"x-forwarded-for": "10.0.0.9"}).status_code == 429
+        assert all(client.post("/webhook").status_code == 200 for _ in range(5))
+
+def _request(peer, forwarded=(), api_key=None):
+    headers = [(b"x-forwarded-for", hops.encode()) for hops in forwarded]
+    if api_key:
+        headers.append((b"x-api-key", api_key.encode()))
+    return Request({"type": "http", "headers": headers, "client": (peer, 50000)})
+
+def test_key_uses_forwarded_hops_only_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8, 192.168.1.5")
+    monkeypatch.setattr("app.core.security.settings.INTERNAL_API_KEY", "internal-key")
+
+    # Untrusted peers are keyed by their own address whatever they send
+    assert rate_limit_key(_request("203.0.113.7", ["1.2.3.4"])) == "ip:203.0.113.7"
+    # Behind trusted proxies: the right-most hop no proxy of ours added
+    assert rate_limit_key(_request("10.0.0.2", ["198.51.100.1"])) == "ip:198.51.100.1"
+    assert rate_limit_key(_request("10.0.0.2", ["1.2.3.4, 198.51.100.1, 192.168.1.5"])) == "ip:198.51.100.1"
+    assert rate_limit_key(_request("10.0.0.2", ["1.2.3.4", "198.51.100.1, 10.1.1.1"])) == "ip:198.51.100.1"
+    assert rate_limit_key(_request("10.0.0.2")) == "ip:10.0.0.2"
+    # Made-up API keys do not get a bucket of their own
+    assert rate_limit_key(_request("203.0.113.7", api_key="random")) == "ip:203.0.113.7"
+    assert rate_limit_key(_request("203.0.113.7", api_key="internal-key")).startswith("key:")
+
+    monkeypatch.setattr("app.core.security.settings.RATE_LIMIT_TRUSTED_PROXIES", "")
+    assert rate_limit_key(_request("10.0.0.2", ["198.51.100.1"])) == "ip:10.0.0.2"
+
+@pytest.mark.asyncio
+async def test_dependency_and_check_rate_limit(monkeypatch):
+    limiter = TokenBucketLimiter(create_redis_client("fakeredis://"))
+    monkeypatch.setattr("app.core.security._rate_limiter", limiter)
+
+    await check_rate_limit("user-1", limit=2, period=60)
+    await check_rate_limit("user-1", limit=2, period=60)
+    with pytest.raises(HTTPException) as exc:
+        await check_rate_limit("user-1", limit=2, period=60)
+    assert exc.value.status_code == 429 and exc.value.headers["Retry-After"] == "30"
+
+    app = FastAPI()
+
+    @app.post("/create-intent", dependencies=[Depends(rate_limit(1))])
+    async def create_intent():
+        return {"ok": True}
+
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post("/create-intent")).status_code == 200
+        assert (await client.post("/create-intent")).status_code == 429
@@ -0,0 +1,53 @@
+"""
+Tests for clause chunking of streamed LLM text:
+- sentences are emitted as soon as their boundary arrives, regardless of delta size
+- prices and abbreviations don't split
+- soft breaks only split long clauses
+"""
+
+import pytest
+
+from app.services.sentence_chunker import SentenceChunker, chunk_sentences
+
+
+def _feed_all(text, step, min_clause_chars=40):
+    chunker = SentenceChunker(min_clause_chars)
+    clauses = []
+    for i in range(0, len(text), step):
+        clauses += chunker.feed(text[i:i + step])
+    tail = chunker.flush()
+    return clauses + ([tail] if tail else [])
+
+
+def test_sentences_independent_of_delta_size():
+    text = "Great choice! Your Margherita Pizza is $15.99. Shall I place the order?"
+    expected = ["Great choice!", "Your Margherita Pizza is $15.99.", "Shall I place the order?"]
+    assert _feed_all(text, 1) == expected
+    assert _feed_all(text, 7) == expected
+
+def test_sentence_emitted_once_followed_by_space():
+    chunker = SentenceChunker()
+    assert chunker.feed("Your order is confirmed.") == []
+    assert chunker.feed(" Driver") == ["Your order is confirmed."]
+
+def test_abbreviations_do_not_split():
+    assert _feed_all("Dr. Smith's order is ready. Thanks!", 5) == ["Dr. Smith's order is ready.", "Thanks!"]
+
+def test_soft_breaks_only_split_long_clauses():
+    assert _feed_all("Sure, one moment.", 3) == ["Sure, one moment."]
+    text = "Your driver Michael is picking up the order right now, and he should arrive in about twenty minutes."
+    assert _feed_all(text, 4) == [
+        "Your driver Michael is picking up the order right now,",
+        "and he should arrive in about twenty minutes.",
+    ]
+
+def test_hindi_danda_is_a_boundary():
+    assert _feed_all("धन्यवाद। आपका ऑर्डर कन्फर्म हो गया है।", 3) == ["धन्यवाद।", "आपका ऑर्डर कन्फर्म हो गया है।"]
+
+@pytest.mark.asyncio
+async def test_chunk_sentences_async():
+    async def deltas():
+        for token in ["Hi", " there", ".", " Bye", "!"]:
+            yield token
+
+    assert [clause async for clause in chunk_sentences(deltas())] == ["Hi there.", "Bye!"]
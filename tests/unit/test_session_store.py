@@ -0,0 +1,56 @@
+"""
+Tests for the voice router's SessionStore:
+- call_sid secondary index
+- TTL expiry in last-activity order
+- hard cap on live sessions
+"""
+
+from app.orchestration.session_store import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lookup_by_call_sid():
+    store = SessionStore()
+    store["s1"] = {"call_sid": "CA1"}
+    store["s2"] = {"call_sid": "CA2"}
+    session_id, data = store.get_by_call_sid("CA2")
+    assert session_id == "s2"
+    assert data["call_sid"] == "CA2"
+    assert store.get_by_call_sid("CA3") is None
+
+def test_pop_by_call_sid_removes_all_indexes():
+    store = SessionStore()
+    store["s1"] = {"call_sid": "CA1"}
+    session_id, _ = store.pop_by_call_sid("CA1")
+    assert session_id == "s1"
+    assert "s1" not in store
+    assert store.get_by_call_sid("CA1") is None
+
+def test_evict_expired_keeps_recently_active():
+    clock = FakeClock()
+    store = SessionStore(ttl_seconds=60, clock=clock)
+    store["old"] = {"call_sid": "CA1"}
+    store["fresh"] = {"call_sid": "CA2"}
+    clock.now = 50
+    store.get("old")  # activity moves "old" to the back of the queue
+    clock.now = 100
+    assert store.evict_expired() == 1
+    assert "fresh" not in store
+    assert "old" in store
+
+def test_max_entries_evicts_least_recently_active():
+    store = SessionStore(max_entries=2)
+    store["a"] = {"call_sid": "CA1"}
+    store["b"] = {"call_sid": "CA2"}
+    store.get("a")
+    store["c"] = {"call_sid": "CA3"}
+    assert len(store) == 2
+    assert "b" not in store
+    assert store.get_by_call_sid("CA2") is None
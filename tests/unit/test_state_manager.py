@@ -0,0 +1,79 @@
+"""
+Tests for the Redis-backed StateManager (fakeredis test mode):
+- create/get/update round trip with partial hash updates
+- call_sid -> session_id index
+- conversation turns appended to the history list
+- native key TTLs (refreshed on every write, call index included) instead of
+  the periodic sweep
+"""
+
+import pytest
+from app.core.database import create_redis_client
+from app.orchestration.state_manager import StateManager
+
+
+@pytest.fixture
+def redis_state():
+    client = create_redis_client("fakeredis://")
+    StateManager.use_redis(client)
+    yield client
+    StateManager.use_memory()
+
+
+@pytest.mark.asyncio
+async def test_redis_session_round_trip(redis_state):
+    session_id = await StateManager.create_session("CA100", "+15550001111")
+
+    assert await StateManager.update_session(session_id, current_agent="address_agent", total_amount=1599)
+    session = await StateManager.get_session(session_id)
+
+    assert session["current_agent"] == "address_agent"
+    assert session["total_amount"] == 1599
+    assert session["customer_phone"] == "+15550001111"
+    assert await redis_state.hget(f"session:{session_id}", "total_amount") == "1599"
+
+@pytest.mark.asyncio
+async def test_redis_call_sid_index_and_end(redis_state):
+    session_id = await StateManager.create_session("CA200", "+15550002222")
+
+    session = await StateManager.get_session_by_call_sid("CA200")
+    assert session["session_id"] == session_id
+
+    await StateManager.end_session_by_call_sid("CA200")
+    assert await StateManager.get_session(session_id) is None
+    assert await redis_state.exists("call:CA200") == 0
+
+@pytest.mark.asyncio
+async def test_redis_conversation_history(redis_state):
+    session_id = await StateManager.create_session("CA300", "+15550003333")
+    await StateManager.add_conversation_turn(session_id, "user", "one pepperoni pizza")
+    await StateManager.add_conversation_turn(session_id, "assistant", "Great choice!")
+
+    session = await StateManager.get_session(session_id)
+    assert [turn["role"] for turn in session["conversation_history"]] == ["user", "assistant"]
+
+@pytest.mark.asyncio
+async def test_redis_keys_carry_ttl(redis_state):
+    session_id = await StateManager.create_session("CA400", "+15550004444")
+    await StateManager.add_conversation_turn(session_id, "user", "hello")
+
+    ttl = int(StateManager.SESSION_TTL.total_seconds())
+    for key in (f"session:{session_id}", f"session:{session_id}:history", "call:CA400"):
+        assert 0 < await redis_state.ttl(key) <= ttl
+
+@pytest.mark.asyncio
+async def test_update_missing_session_returns_false(redis_state):
+    assert await StateManager.update_session("does-not-exist", current_agent="x") is False
+    assert await redis_state.exists("session:does-not-exist") == 0
+
+@pytest.mark.asyncio
+async def test_writes_refresh_call_sid_ttl(redis_state):
+    session_id = await StateManager.create_session("CA500", "+15550005555")
+    await redis_state.expire("call:CA500", 5)
+
+    await StateManager.update_session(session_id, current_agent="address_agent")
+    assert await redis_state.ttl("call:CA500") > 5
+    await redis_state.expire("call:CA500", 5)
+    await StateManager.add_conversation_turn(session_id, "user", "still here")
+    assert await redis_state.ttl("call:CA500") > 5
+    assert (await StateManager.get_session_by_call_sid("CA500"))["session_id"] == session_id
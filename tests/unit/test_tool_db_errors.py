@@ -0,0 +1,44 @@
+"""
+Tools when the database is unreachable:
+- no fabricated drivers or "new customer" profiles for real calls, and no
+  notifications or preparation times reported for restaurants/orders never found
+- the demo data only comes back with TOOLS_DEMO_DATA
+"""
+
+import pytest
+
+from app.services.driver_index import DriverIndex
+from app.tools import customer_tools, driver_tools, restaurant_tools
+
+LOCATION = {"latitude": 12.97, "longitude": 77.59}
+
+
+@pytest.fixture
+def db_down(monkeypatch):
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(driver_tools, "AsyncSessionLocal", unreachable)
+    monkeypatch.setattr(customer_tools, "AsyncSessionLocal", unreachable)
+    monkeypatch.setattr(restaurant_tools, "AsyncSessionLocal", unreachable)
+    monkeypatch.setattr("app.tools.driver_tools.get_driver_index", DriverIndex)
+
+
+@pytest.mark.asyncio
+async def test_database_errors_are_not_hidden(db_down):
+    assert await driver_tools.find_available_drivers(LOCATION) == []
+    assert await customer_tools.get_customer_profile("+15550001111") == {"error": "Failed to retrieve customer profile"}
+    assert await restaurant_tools.notify_restaurant("7", {"order_id": "1"}) == {"error": "Failed to notify restaurant"}
+    assert await restaurant_tools.confirm_preparation_time("1", 25) == {"error": "Failed to confirm preparation time"}
+    # Ids that can never exist are unknown, not notified
+    assert await restaurant_tools.notify_restaurant("rest_1", {}) == {"error": "Restaurant not found"}
+    assert await restaurant_tools.confirm_preparation_time("ord_1", 25) == {"error": "Order not found"}
+
+@pytest.mark.asyncio
+async def test_demo_data_only_with_flag(db_down, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.TOOLS_DEMO_DATA", True)
+
+    assert [d["driver_id"] for d in await driver_tools.find_available_drivers(LOCATION)] == ["drv-1"]
+    assert (await customer_tools.get_customer_profile("+15550001111"))["is_new_customer"]
+    assert (await restaurant_tools.notify_restaurant("7", {"order_id": "1"}))["notification_sent"]
+    assert (await restaurant_tools.confirm_preparation_time("1", 25))["success"]
@@ -0,0 +1,73 @@
+"""
+Tests for ToolRegistry resolution and dispatch:
+- tools are imported and introspected once, then served from the cache
+- parameters come from the real signature
+- each call invokes the tool exactly once (sync and async)
+- arguments the tool doesn't accept are dropped
+"""
+
+import pytest
+
+from app.tools.registry import ToolRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+    yield registry
+    for name in ("sync_tool", "async_tool", "kwargs_tool"):
+        ToolRegistry._resolved.pop(name, None)
+    ToolRegistry._descriptors = None
+
+
+def test_resolves_and_introspects_once(monkeypatch, registry):
+    imports = []
+    real_import = __import__("importlib").import_module
+    monkeypatch.setattr("app.tools.registry.importlib.import_module", lambda path: imports.append(path) or real_import(path))
+    ToolRegistry._resolved.pop("calculate_distance", None)
+
+    for _ in range(3):
+        tool = registry.resolve("calculate_distance")
+    assert imports == ["app.tools.driver_tools"]
+    assert tool.is_async is False
+    assert tool.parameters == {"lat1", "lon1", "lat2", "lon2"}
+
+def test_parameters_from_signature(registry):
+    assert "session_data" in registry.get_tool_parameters("calculate_total")
+    assert "session_data" not in registry.get_tool_parameters("verify_address")
+    assert registry.get_tool_parameters("no_such_tool") == []
+
+@pytest.mark.asyncio
+async def test_each_call_runs_once(registry):
+    calls = []
+
+    def sync_tool(x):
+        calls.append(("sync", x))
+        return x * 2
+
+    async def async_tool(x):
+        calls.append(("async", x))
+        return x + 1
+
+    registry.register("sync_tool", sync_tool)
+    registry.register("async_tool", async_tool)
+
+    assert await registry.execute_tool("sync_tool", {"x": 2}) == 4
+    assert await registry.execute_tool("async_tool", {"x": 2}) == 3
+    assert calls == [("sync", 2), ("async", 2)]
+
+@pytest.mark.asyncio
+async def test_unexpected_arguments_dropped(registry):
+    registry.register("sync_tool", lambda item_id: item_id)
+    registry.register("kwargs_tool", lambda **kwargs: kwargs)
+
+    assert await registry.execute_tool("sync_tool", {"item_id": "i1", "confidence": 0.9}) == "i1"
+    assert await registry.execute_tool("kwargs_tool", {"a": 1}) == {"a": 1}
+
+@pytest.mark.asyncio
+async def test_unknown_tool(registry):
+    with pytest.raises(ValueError):
+        await registry.execute_tool("no_such_tool", {})
+
+def test_descriptors_built_once(registry):
+    assert registry.get_tools_for_agent("support_agent") is ToolRegistry().get_tools_for_agent("driver_agent")
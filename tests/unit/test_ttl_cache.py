@@ -0,0 +1,42 @@
+"""
+Tests for core.cache.TTLCache:
+- entries expire after the cache TTL or a per-entry override
+- least recently used entries are evicted at maxsize
+"""
+
+from app.core.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("geocode", {"lat": 1})
+    cache.set("eta", 12, ttl=5)
+
+    clock.now = 10
+    assert cache.get("geocode") == {"lat": 1}
+    assert cache.get("eta") is None
+    assert "eta" not in cache and "geocode" in cache
+
+    clock.now = 61
+    assert cache.get("geocode", "gone") == "gone"
+    assert cache.stats == {"hits": 1, "misses": 2, "expired": 2, "evictions": 0}
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a becomes most recent
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2 and cache.stats["evictions"] == 1
@@ -0,0 +1,71 @@
+"""
+Tests for the phrase-level TTS cache:
+- content-addressed keys (voice, format, normalized text)
+- byte-bounded LRU memory tier with eviction stats
+- disk tier survives a restart (new cache instance) and is byte-bounded LRU
+- TTSService.synthesize serves repeated prompts without calling ElevenLabs
+"""
+
+import os
+
+import pytest
+
+from app.services.tts_cache import TTSCache, phrase_key
+from app.services.tts_service import TTSService
+
+
+def test_phrase_key_normalizes_whitespace_only():
+    key = phrase_key("Say 'notify restaurant' to continue.", "voice-en", "ulaw_8000")
+    assert key == phrase_key("  Say 'notify restaurant'   to continue. ", "voice-en", "ulaw_8000")
+    assert key != phrase_key("Say 'notify restaurant' to continue.", "voice-hi", "ulaw_8000")
+    assert key != phrase_key("Say 'notify restaurant' to continue.", "voice-en", "pcm_16000")
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TTSCache(max_memory_bytes=300)
+    cache.put("a", b"\xff" * 100)
+    cache.put("b", b"\xff" * 100)
+    cache.put("c", b"\xff" * 100)
+    assert cache.get("a") is not None  # a becomes most recent
+
+    cache.put("d", b"\xff" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["misses"] == 1
+
+def test_disk_tier_survives_restart(tmp_path):
+    TTSCache(max_memory_bytes=1024, disk_dir=str(tmp_path)).put("k1", b"\x7f\x80" * 80)
+
+    restarted = TTSCache(max_memory_bytes=1024, disk_dir=str(tmp_path))
+    assert restarted.get("k1") == b"\x7f\x80" * 80
+    assert restarted.get("k1") == b"\x7f\x80" * 80
+    assert restarted.stats["disk_hits"] == 1
+    assert restarted.stats["memory_hits"] == 1
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=300)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.encode() * 100)
+    assert cache.get("a") == b"a" * 100  # a becomes most recent
+
+    cache.put("d", b"d" * 100)
+    assert cache.get("b") is None
+    assert cache.stats["disk_evictions"] == 1
+
+    # After a restart the usage order is rebuilt from file mtimes
+    for age, key in enumerate("cad"):
+        os.utime(cache._path(key), (age, age))
+    restarted = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=300)
+    restarted.put("e", b"e" * 100)
+    assert [restarted.get(key) is not None for key in "acde"] == [True, False, True, True]
+
+def test_synthesize_serves_cached_phrase_without_network(monkeypatch, tmp_path):
+    def fail_post(*args, **kwargs):
+        raise AssertionError("ElevenLabs should not be called for a cached phrase")
+
+    monkeypatch.setattr("app.services.tts_service.requests.post", fail_post)
+    tts = TTSService(api_key="test")
+    tts.cache = TTSCache(max_memory_bytes=1024, disk_dir=str(tmp_path))
+    tts.cache.put(phrase_key("Welcome!", "voice-en", TTSService.OUTPUT_FORMAT), b"\x01" * 160)
+
+    assert tts.synthesize("Welcome!", voice="voice-en") == b"\x01" * 160
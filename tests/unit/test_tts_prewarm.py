@@ -0,0 +1,85 @@
+"""
+Tests for the static prompt TTS bundle:
+- only placeholder-free prompts are rendered, per language voice
+- rendering respects the concurrency bound
+- bundle round trip into the phrase cache, where it stays pinned through
+  LRU evictions
+- an unchanged prompt set reuses the existing bundle version
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.language_service import LanguageService, Language
+from app.services.tts_cache import TTSCache, phrase_key
+from app.services.tts_prewarm import build_bundle, load_bundle, static_prompts
+from app.services.tts_service import TTSService
+
+
+class FakeTTS:
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, voice=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        with self._lock:
+            self.active -= 1
+        return f"{voice}:{text}".encode()
+
+
+@pytest.fixture(autouse=True)
+def voices(monkeypatch):
+    monkeypatch.setattr("app.services.tts_prewarm.settings.ELEVENLABS_VOICE_EN", "voice-en")
+    monkeypatch.setattr("app.services.tts_prewarm.settings.ELEVENLABS_VOICE_HI", "voice-hi")
+    monkeypatch.setattr("app.services.tts_prewarm.settings.ELEVENLABS_VOICE_TA", "voice-ta")
+
+
+def test_static_prompts_skip_templates():
+    prompts = static_prompts()
+    keys = {(p["language"], p["key"]) for p in prompts}
+
+    assert ("en", "welcome") in keys and ("hi", "welcome") in keys and ("ta", "welcome") in keys
+    assert ("en", "payment_prompt") not in keys  # contains {amount}
+    assert all(p["voice_id"] == f"voice-{p['language']}" for p in prompts)
+
+@pytest.mark.asyncio
+async def test_bundle_round_trip(tmp_path):
+    tts = FakeTTS()
+    version = await build_bundle(str(tmp_path), concurrency=3, tts=tts)
+
+    assert version and (tmp_path / "CURRENT").read_text() == version
+    assert tts.calls == len(static_prompts())
+    assert tts.max_active <= 3
+
+    cache = TTSCache(max_memory_bytes=1024 * 1024)
+    assert load_bundle(str(tmp_path), cache) == tts.calls
+
+    welcome = LanguageService.get_text("welcome", Language.HINDI)
+    key = phrase_key(welcome, "voice-hi", TTSService.OUTPUT_FORMAT)
+    assert cache.get(key) == f"voice-hi:{welcome}".encode()
+
+    # Live traffic fills and churns the LRU; the pre-rendered prompts stay
+    for i in range(100):
+        cache.put(f"live-{i}", b"x" * 64 * 1024)
+    assert cache.stats["evictions"] > 0
+    assert cache.get(key) == f"voice-hi:{welcome}".encode()
+    assert (tmp_path / "CURRENT").read_text() == version and not list(tmp_path.glob("*.tmp"))
+
+@pytest.mark.asyncio
+async def test_unchanged_prompts_reuse_bundle(tmp_path):
+    first = await build_bundle(str(tmp_path), tts=FakeTTS())
+    tts = FakeTTS()
+    assert await build_bundle(str(tmp_path), tts=tts) == first
+    assert tts.calls == 0
+
+def test_missing_bundle_loads_nothing(tmp_path):
+    assert load_bundle(str(tmp_path), TTSCache(max_memory_bytes=1024)) == 0
@@ -0,0 +1,65 @@
+"""
+Tests for streaming TTS framing:
+- incremental PCM -> 8 kHz μ-law conversion is independent of chunk boundaries
+- every frame is exactly 20 ms (160 bytes), last one silence-padded
+- μ-law pass-through and unsupported formats
+- cached phrases are replayed as frames without a request
+"""
+
+import audioop
+import math
+import struct
+
+import pytest
+
+from app.services.tts_cache import TTSCache, phrase_key
+from app.services.tts_service import FRAME_BYTES, TTSService, UlawFrameEncoder
+
+
+def _tone_pcm16(seconds: float, rate: int = 16000) -> bytes:
+    samples = int(seconds * rate)
+    return struct.pack(f"<{samples}h", *(int(8000 * math.sin(2 * math.pi * 440 * n / rate)) for n in range(samples)))
+
+
+def _encode(source_format, chunks):
+    encoder = UlawFrameEncoder(source_format)
+    frames = []
+    for chunk in chunks:
+        frames += encoder.feed(chunk)
+    return frames + encoder.flush(), bytes(encoder.audio)
+
+
+def test_chunk_boundaries_do_not_change_output():
+    pcm = _tone_pcm16(0.5)
+    whole_frames, whole_audio = _encode("pcm_16000", [pcm])
+    # Odd-sized chunks split 16-bit samples across reads
+    split_frames, split_audio = _encode("pcm_16000", [pcm[i:i + 333] for i in range(0, len(pcm), 333)])
+
+    assert split_audio == whole_audio
+    assert split_frames == whole_frames
+    assert len(whole_audio) == 4000  # 0.5 s at 8 kHz
+    assert all(len(frame) == FRAME_BYTES for frame in whole_frames)
+
+def test_last_frame_padded_with_silence():
+    frames, audio = _encode("ulaw_8000", [b"\x10" * 200])
+    assert [len(f) for f in frames] == [FRAME_BYTES, FRAME_BYTES]
+    assert frames[1] == b"\x10" * 40 + b"\xff" * 120
+    assert audio == b"\x10" * 200
+
+def test_pcm_8000_needs_no_resampling():
+    pcm = _tone_pcm16(0.1, rate=8000)
+    _, audio = _encode("pcm_8000", [pcm])
+    assert audio == audioop.lin2ulaw(pcm, 2)
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        UlawFrameEncoder("mp3_44100_128")
+
+@pytest.mark.asyncio
+async def test_stream_replays_cached_phrase(monkeypatch):
+    tts = TTSService(api_key="")
+    tts.cache = TTSCache(max_memory_bytes=4096)
+    tts.cache.put(phrase_key("Welcome!", "voice-en", TTSService.OUTPUT_FORMAT), b"\x01" * 480)
+
+    frames = [frame async for frame in tts.synthesize_stream("Welcome!", voice="voice-en")]
+    assert frames == [b"\x01" * FRAME_BYTES] * 3
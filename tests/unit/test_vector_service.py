@@ -1,8 +1,15 @@
 import pytest
-from app.services.vector_service import VectorService
+from app.services.vector_service import VectorService, point_id
+
+
+def _menu(n, start=0, description="Hot and spicy"):
+    return [{"id": f"m{i}", "name": f"Dish {i}", "description": description, "price": 100 + i}
+            for i in range(start, start + n)]
+
 
 @pytest.mark.skipif(True, reason="Requires OpenAI + Qdrant keys")
-def test_upsert_and_search():
+@pytest.mark.asyncio
+async def test_upsert_and_search():
     """Integration-style test for semantic vector search (manual run)."""
     vs = VectorService()
 
@@ -14,9 +21,107 @@ def test_upsert_and_search():
     }]
 
     # Test upsert
-    res = vs.upsert_menu_items(items)
+    res = await vs.upsert_menu_items(items)
     assert res["success"]
 
     # Test semantic search
-    hits = vs.semantic_search("something spicy and hot")
+    hits = await vs.semantic_search("something spicy and hot")
     assert isinstance(hits, list)
+
+
+def test_point_ids_are_valid_for_qdrant():
+    assert point_id(42) == point_id("42") == 42
+    assert point_id("m1") == point_id("m1") != point_id("m2")
+    assert point_id("9b2f6d0e-8c55-4c1e-9a5e-3f0d2b7c1a44") == "9b2f6d0e-8c55-4c1e-9a5e-3f0d2b7c1a44"
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_batched(vector_service, embeddings_stub, monkeypatch):
+    monkeypatch.setattr("app.services.vector_service.settings.EMBEDDING_BATCH_SIZE", 10)
+    monkeypatch.setattr("app.services.vector_service.settings.EMBEDDING_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr("app.services.vector_service.settings.VECTOR_UPSERT_CHUNK_SIZE", 7)
+
+    result = await vector_service.upsert_menu_items(iter(_menu(45)))
+    assert result == {"success": True, "upserted": 45, "unchanged": 0}
+    # Windows of 2 x 10 items: 20 + 20 + 5
+    assert [len(batch) for batch in embeddings_stub.batches] == [10, 10, 10, 10, 5]
+    assert (await vector_service.client.count(vector_service.collection)).count == 45
+
+
+@pytest.mark.asyncio
+async def test_unchanged_items_are_not_reembedded(vector_service, embeddings_stub):
+    await vector_service.upsert_menu_items(_menu(20))
+    embeddings_stub.batches.clear()
+
+    changed = _menu(20)
+    changed[3]["description"] = "Mild and creamy"
+    changed[4]["price"] = 999  # payload-only change: same text, same hash
+    result = await vector_service.upsert_menu_items(changed + _menu(2, start=20))
+    assert result == {"success": True, "upserted": 3, "unchanged": 19}
+    assert sorted(text for batch in embeddings_stub.batches for text in batch) == [
+        "Dish 20 - Hot and spicy", "Dish 21 - Hot and spicy", "Dish 3 - Mild and creamy",
+    ]
+
+    # Identical texts in one run are embedded once
+    embeddings_stub.batches.clear()
+    twins = [{"id": f"t{i}", "name": "Masala Dosa", "description": "Crispy"} for i in range(5)]
+    await vector_service.upsert_menu_items(twins)
+    assert embeddings_stub.batches == [["Masala Dosa - Crispy"]]
+
+
+@pytest.mark.asyncio
+async def test_semantic_search(vector_service):
+    await vector_service.upsert_menu_items([
+        {"id": 1, "name": "Spicy Paneer", "description": "Hot and spicy paneer dish", "price": 200},
+        {"id": 2, "name": "Mango Lassi", "description": "Sweet yogurt drink", "price": 90},
+    ])
+    hits = await vector_service.semantic_search("something spicy and hot", top_k=1)
+    assert [hit["payload"]["name"] for hit in hits] == ["Spicy Paneer"]
+    assert set(hits[0]) == {"id", "score", "payload"}
+
+
+MENU = [
+    {"id": 1, "name": "Pepperoni Pizza", "description": "Pepperoni, mozzarella, tomato sauce", "price": 1799},
+    {"id": 2, "name": "Veggie Burger", "description": "Plant-based patty with fresh veggies", "price": 1199},
+    {"id": 3, "name": "Spicy Tuna Roll", "description": "Spicy tuna with cucumber", "price": 1799},
+    {"id": 4, "name": "Mango Lassi", "description": "Sweet yogurt drink", "price": 90},
+]
+
+
+@pytest.mark.asyncio
+async def test_query_embeddings_are_cached(vector_service, embeddings_stub):
+    await vector_service.upsert_menu_items(MENU)
+    embeddings_stub.batches.clear()
+
+    for query in ("Pepperoni pizza", "pepperoni  PIZZA!", "pepperoni pizza"):
+        await vector_service.semantic_search(query, mode="vector")
+    assert embeddings_stub.batches == [["pepperoni pizza"]]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_answers_confident_matches_in_process(vector_service, embeddings_stub):
+    await vector_service.upsert_menu_items(MENU)
+    embeddings_stub.batches.clear()
+
+    hits = await vector_service.semantic_search("I want a veggie burger please", top_k=2)
+    assert hits[0]["payload"]["name"] == "Veggie Burger"
+    assert hits[0]["score"] == 1.0 and hits[0]["id"] == 2
+    # Transcription slip still resolves lexically
+    hits = await vector_service.semantic_search("peperoni pizza")
+    assert hits[0]["payload"]["name"] == "Pepperoni Pizza"
+    assert embeddings_stub.batches == []
+
+    # Nothing on the menu says "refreshing": falls back to Qdrant
+    hits = await vector_service.semantic_search("something sweet and refreshing to drink", top_k=1)
+    assert hits[0]["payload"]["name"] == "Mango Lassi"
+    assert len(embeddings_stub.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_lexical_index_reloads_from_qdrant(vector_service):
+    await vector_service.upsert_menu_items(MENU)
+    restarted = VectorService(client=vector_service.client, dim=vector_service.dim)
+    assert await restarted.load_lexical_index() == 4
+
+    hits = await restarted.semantic_search("spicy tuna")
+    assert hits[0]["id"] == 3
@@ -0,0 +1,281 @@
+"""
+Tests for the webhook ingestion queue:
+- duplicate event ids are accepted once; pending events survive a restart
+  and acked ones stay deduplicated
+- concurrent appends share writes (group commit); a torn record is skipped
+- events for one object are applied in order, other objects in parallel
+- failing handlers are retried, then dead-lettered
+- the Redis stream backend (fakeredis) dedupes, acks and redelivers
+- /voice/call-status and the Stripe handler that updates orders
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app.services import webhook_queue as wq
+from app.services.webhook_queue import LogWebhookBackend, RedisWebhookBackend, WebhookQueue, make_event
+
+
+def _event(event_id, object_id="pi_1", source="test", event_type="payment_intent.succeeded"):
+    return make_event(source, event_id, event_type, object_id, {"n": event_id})
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Isolated handler registry; returns it for the test to fill."""
+    registry = {}
+    monkeypatch.setattr(wq, "_handlers", registry)
+    return registry
+
+
+def _queue(backend, **kwargs):
+    queue = WebhookQueue(backend, **kwargs)
+    queue.READ_TIMEOUT = 0.02
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_log_backend_dedupes_and_recovers(tmp_path):
+    path = str(tmp_path / "webhooks.log")
+    backend = LogWebhookBackend(path)
+    assert await backend.append(_event("evt_1"))
+    assert not await backend.append(_event("evt_1"))
+    assert await backend.append(_event("evt_2"))
+    [(seq, event)] = await backend.read(1, 0.01)
+    await backend.ack(seq, event["id"])
+    await backend.close()
+    # A crash mid-write leaves a torn last line
+    with open(path, "a") as f:
+        f.write('{"seq": 9, "ev')
+
+    restarted = LogWebhookBackend(path)
+    assert [event["id"] for _, event in await restarted.read(10, 0.01)] == ["evt_2"]
+    assert await restarted.is_done("evt_1")
+    assert not await restarted.append(_event("evt_1"))
+    assert not await restarted.append(_event("evt_2"))
+    await restarted.close()
+
+@pytest.mark.asyncio
+async def test_log_backend_group_commit(tmp_path, monkeypatch):
+    backend = LogWebhookBackend(str(tmp_path / "webhooks.log"), compact_records=50)
+    backend.open()
+    writes = []
+    write_lines = backend._write_lines
+    monkeypatch.setattr(backend, "_write_lines", lambda lines: (writes.append(len(lines)), write_lines(lines)))
+
+    results = await asyncio.gather(*(backend.append(_event(f"evt_{i % 100}")) for i in range(300)))
+    assert sum(results) == 100
+    assert sum(writes) == 100 and len(writes) < 100
+    # Compaction kept every pending event
+    await backend.close()
+    assert len(await LogWebhookBackend(backend.path).read(200, 0.01)) == 100
+
+@pytest.mark.asyncio
+async def test_log_compaction_is_proportional_to_appends(tmp_path, monkeypatch):
+    backend = LogWebhookBackend(str(tmp_path / "webhooks.log"), compact_records=50, max_done=300)
+    backend.open()
+    compactions = []
+    compact = backend._compact
+    monkeypatch.setattr(backend, "_compact", lambda events, done: (compactions.append(len(done)), compact(events, done)))
+
+    # The dedupe window outgrows compact_records; rewrites must not follow every flush
+    for i in range(400):
+        assert await backend.append(_event(f"evt_{i}"))
+        [(seq, event)] = await backend.read(1, 0.01)
+        await backend.ack(seq, event["id"])
+    assert len(compactions) < 10  # was one per flush once the window passed 50 ids
+    assert len(backend._done) == 300 and not await backend.is_done("evt_0")
+    await backend.close()
+
+    restarted = LogWebhookBackend(backend.path, max_done=300)
+    assert await restarted.is_done("evt_399") and await restarted.read(10, 0.01) == []
+    await restarted.close()
+
+@pytest.mark.asyncio
+async def test_events_are_applied_in_order_per_object(tmp_path, handlers):
+    applied = []
+    running = set()
+    overlapped = []
+
+    async def handler(event):
+        # Never two events of one object at once
+        assert event["object_id"] not in running
+        running.add(event["object_id"])
+        overlapped.append(len(running) > 1)
+        await asyncio.sleep(0.001)
+        applied.append((event["object_id"], event["id"]))
+        running.discard(event["object_id"])
+
+    handlers["test"] = [handler]
+    queue = _queue(LogWebhookBackend(str(tmp_path / "webhooks.log")), workers=4)
+    queue.start()
+    try:
+        for i in range(40):
+            await queue.enqueue("test", f"evt_{i}", "x", f"pi_{i % 5}", {})
+        await queue.enqueue("test", "evt_3", "x", "pi_3", {})  # provider retry
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert len(applied) == 40 and queue.stats["duplicates"] == 1
+    for obj in range(5):
+        ids = [int(event_id[4:]) for object_id, event_id in applied if object_id == f"pi_{obj}"]
+        assert ids == sorted(ids)
+    assert any(overlapped)
+
+@pytest.mark.asyncio
+async def test_failing_handler_is_retried_then_dead_lettered(tmp_path, handlers, monkeypatch):
+    monkeypatch.setattr(wq.asyncio, "sleep", _no_sleep)
+    calls = {"flaky": 0, "broken": 0}
+
+    async def handler(event):
+        calls[event["object_id"]] += 1
+        if event["object_id"] == "broken" or calls["flaky"] < 3:
+            raise RuntimeError("db down")
+
+    handlers["test"] = [handler]
+    backend = LogWebhookBackend(str(tmp_path / "webhooks.log"))
+    queue = _queue(backend, workers=2, max_attempts=4)
+    queue.start()
+    try:
+        await queue.enqueue("test", "evt_flaky", "x", "flaky", {})
+        await queue.enqueue("test", "evt_broken", "x", "broken", {})
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert calls == {"flaky": 3, "broken": 4}
+    assert queue.stats["applied"] == 1 and queue.stats["dead"] == 1
+    with open(f"{backend.path}.dead") as f:
+        assert [json.loads(line)["event"]["id"] for line in f] == ["evt_broken"]
+    assert await backend.is_done("evt_broken")
+
+@pytest.mark.asyncio
+async def test_failing_handler_does_not_block_the_others(tmp_path, handlers, monkeypatch):
+    monkeypatch.setattr(wq.asyncio, "sleep", _no_sleep)
+    calls = {"orders": 0, "session": 0}
+
+    async def update_orders(event):
+        calls["orders"] += 1
+        raise ConnectionError("database unreachable")
+
+    async def update_session(event):
+        calls["session"] += 1
+
+    handlers["test"] = [update_orders, update_session]
+    queue = _queue(LogWebhookBackend(str(tmp_path / "webhooks.log")), max_attempts=3)
+    queue.start()
+    try:
+        await queue.enqueue("test", "evt_1", "x", "pi_1", {})
+        await queue.join()
+    finally:
+        await queue.stop()
+
+    assert calls == {"orders": 3, "session": 1}
+    assert queue.stats["dead"] == 1
+
+
+_real_sleep = asyncio.sleep
+
+
+async def _no_sleep(seconds, *args):
+    await _real_sleep(0 if seconds > 0.05 else seconds)
+
+
+@pytest.mark.asyncio
+async def test_redis_backend(handlers):
+    from app.core.database import create_redis_client
+
+    client = create_redis_client("fakeredis://")
+    backend = RedisWebhookBackend(client, stream="test-webhooks", consumer="a")
+    assert await backend.append(_event("evt_1"))
+    assert not await backend.append(_event("evt_1"))
+    assert await backend.append(_event("evt_2"))
+
+    entries = await backend.read(10, 0.01)
+    assert [event["id"] for _, event in entries] == ["evt_1", "evt_2"]
+    await backend.ack(entries[0][0], "evt_1")
+    assert await backend.is_done("evt_1") and not await backend.is_done("evt_2")
+
+    # Another replica claims the entry this consumer never acked
+    other = RedisWebhookBackend(client, stream="test-webhooks", consumer="b", claim_idle=0)
+    claimed = await other.read(10, 0.01)
+    assert [event["id"] for _, event in claimed] == ["evt_2"]
+    await other.ack(claimed[0][0], "evt_2")
+    assert await other.read(10, 0.01) == []
+    assert await client.xlen("test-webhooks") == 0
+
+def test_call_status_is_queued_and_applied(client, tmp_path, monkeypatch, handlers):
+    from app.routers import voice
+
+    queue = _queue(LogWebhookBackend(str(tmp_path / "webhooks.log")))
+    monkeypatch.setattr(wq, "_webhook_queue", queue)
+    monkeypatch.setattr("app.core.middleware.settings.TWILIO_AUTH_TOKEN", "")
+    handlers["twilio"] = [voice.apply_call_status]
+    voice.sessions.put("s-1", {"call_sid": "CA1"})
+
+    # A missing auth token is no reason to accept unsigned callbacks
+    form = {"CallSid": "CA1", "CallStatus": "completed", "SequenceNumber": "3"}
+    assert client.post("/api/v1/voice/call-status", data=form).status_code == 400
+    assert client.post("/api/v1/voice/call-status", data=form, headers={"X-Twilio-Signature": "forged"}).status_code == 403
+    assert queue.stats["accepted"] == 0
+
+    monkeypatch.setattr("app.core.middleware.settings.TWILIO_SKIP_SIGNATURE_VALIDATION", True)
+    for _ in range(3):
+        assert client.post("/api/v1/voice/call-status", data=form).json() == {"success": True}
+    assert queue.stats == {**queue.stats, "accepted": 1, "duplicates": 2}
+    assert voice.sessions.get("s-1") is not None
+
+    async def apply():
+        queue.start()
+        try:
+            await queue.join()
+        finally:
+            await queue.stop()
+
+    asyncio.run(apply())
+    assert voice.sessions.get("s-1") is None
+
+@pytest.mark.asyncio
+async def test_stripe_event_updates_order(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.orm import Session
+
+    from app.core.database import create_async_db_engine
+    from app.models.database import Base, Customer, Order, OrderStatus, Restaurant
+    from app.services.payment_service import PaymentService
+
+    compiles(JSONB, "sqlite")(lambda type_, compiler, **kw: "JSON")
+    url = f"sqlite:///{tmp_path / 'orders.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[t] for t in ("customers", "restaurants", "drivers", "orders")])
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        customer = Customer(name="Asha", phone_number="1", updated_at=now)
+        restaurant = Restaurant(name="Spice", address={}, operating_hours={}, updated_at=now)
+        db.add_all([customer, restaurant])
+        db.flush()
+        for intent in ("pi_paid", "pi_other"):
+            db.add(Order(customer_id=customer.id, restaurant_id=restaurant.id, status=OrderStatus.PLACED,
+                         delivery_address={}, payment_info={"payment_intent_id": intent}, updated_at=now))
+        db.commit()
+
+    async_engine = create_async_db_engine(url)
+    monkeypatch.setattr("app.services.payment_service.AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    try:
+        event = make_event("stripe", "evt_1", "payment_intent.succeeded", "pi_paid", {"data": {"object": {"id": "pi_paid"}}})
+        await PaymentService.apply_webhook_event(event)
+        await PaymentService.apply_webhook_event(event)  # redelivery is harmless
+        async with async_sessionmaker(async_engine)() as db:
+            orders = {o.payment_info["payment_intent_id"]: o for o in (await db.execute(select(Order))).scalars()}
+    finally:
+        await async_engine.dispose()
+    assert orders["pi_paid"].status == OrderStatus.CONFIRMED
+    assert orders["pi_paid"].payment_info == {"payment_intent_id": "pi_paid", "status": "succeeded"}
+    assert orders["pi_other"].status == OrderStatus.PLACED